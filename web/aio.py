@@ -0,0 +1,80 @@
+"""异步数据访问层
+
+ASGI 模式（asgi.py）下的异步处理函数通过这里访问文件和存储：
+阻塞的调用用 asyncio.to_thread 放到线程池执行，事件循环本身从不等待磁盘或文件锁。
+"""
+import asyncio
+
+from events import VersionWatch, format_event, format_sync
+
+
+class AsyncStore:
+    """把同步存储对象（UploadSessionStore、OrderStore 等）的方法包装为在线程池中执行的协程
+
+        uploads = AsyncStore(upload_sessions)
+        session = await uploads.get(upload_id)
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getattr__(self, name):
+        method = getattr(self._store, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        call.__name__ = name
+        return call
+
+
+class AsyncSubscription:
+    """事件循环中的 SSE 订阅：EventBroker 在任意线程中 put，协程中 await get()"""
+
+    def __init__(self, maxsize, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 客户端消费太慢，断开让它重连后按 Last-Event-ID 补发
+            self.closed = True
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+async def stream_events(broker, last_event_id=None, heartbeat=15, watch=None, watch_interval=5):
+    """EventBroker.stream 的异步版本：每个连接只占用一个协程，watch 在线程池中调用"""
+    subscription = AsyncSubscription(broker.queue_size)
+    broker.subscribe(last_event_id, subscription)
+    watcher = VersionWatch(await asyncio.to_thread(watch), watch_interval) if watch else None
+    timeout = min(heartbeat, watch_interval) if watch else heartbeat
+    idle = 0
+    try:
+        yield 'retry: 3000\n\n'
+        while not subscription.closed:
+            try:
+                event = await subscription.get(timeout=timeout)
+            except asyncio.TimeoutError:
+                event = None
+            if event is not None:
+                idle = 0
+                if watcher:
+                    watcher.seen(await asyncio.to_thread(watch))
+                yield format_event(event)
+            elif watcher and watcher.due() and watcher.changed(await asyncio.to_thread(watch)):
+                idle = 0
+                yield format_sync(watcher.version)
+            else:
+                idle += timeout
+                if idle >= heartbeat:
+                    idle = 0
+                    yield ': heartbeat\n\n'
+    finally:
+        broker.unsubscribe(subscription)
@@ -1,35 +1,159 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, g, has_request_context
+from markupsafe import Markup
 import os
+import copy
+import csv
 import json
+import time
 import uuid
 import math
 from datetime import datetime, date, timedelta
-from werkzeug.utils import secure_filename
-from PIL import Image
-import shutil
+from werkzeug.utils import secure_filename, safe_join
+from werkzeug.exceptions import NotFound
 import random
+import fcntl
+import mimetypes
+import threading
+from contextlib import contextmanager
+import click
+from storage import CORE_PART, create_user_store, copy_user_data, ConflictError, JsonUserStore, JsonPartsUserStore, SqliteUserStore, UserDataSession, UserDocument
+from order_store import OrderStore
+from migrations import MigrationRegistry, migrate_json_file
+from images import (ImageWorkerPool, VARIANT_FORMATS, VARIANT_WIDTHS, convert_image, make_variants, variant_filename,
+                    save_stream, file_digest, existing_variants, remove_image, collect_garbage, is_hashed_image,
+                    image_placeholder, UnsafeCollection)
+from events import EventBroker
+from uploads import UploadSessionStore, UploadError, OffsetMismatch
+from assets import AssetManifest, build_assets, is_stale, precompressed
+from fragments import FragmentCache, file_version
+from compression import CompressionMiddleware
+from jinja2.utils import htmlsafe_json_dumps
 
-app = Flask(__name__)
+class DishSelectorApp(Flask):
+    """视图函数返回后立即提交用户数据，提交冲突时回滚并重新执行视图"""
+
+    def send_static_file(self, filename):
+        """静态文件旁边有 .br / .gz 预压缩文件时，按客户端支持的编码直接发送压缩后的文件"""
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            return super().send_static_file(filename)
+        compressed, encoding = precompressed(path, request.accept_encodings)
+        if encoding is None:
+            return super().send_static_file(filename)
+        response = send_from_directory(self.static_folder, os.path.relpath(compressed, self.static_folder),
+                                       mimetype=mimetypes.guess_type(filename)[0],
+                                       max_age=self.get_send_file_max_age(filename))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def dispatch_request(self):
+        attempt = 0
+        while True:
+            attempt += 1
+            # 为重试保存会话快照，不算作使用了会话（否则图片、静态资源响应也会带上 Vary: Cookie）
+            accessed, modified = session.accessed, session.modified
+            snapshot = copy.deepcopy(dict(session))
+            session.accessed = accessed
+            rv = super().dispatch_request()
+            user_data_session = g.get('user_data_session')
+            if user_data_session is None:
+                return rv
+            try:
+                user_data_session.commit()
+                return rv
+            except ConflictError:
+                # commit 已回滚（订单文件等副作用由 on_rollback 撤销），会话（游戏进度、flash 消息等）
+                # 也恢复到本次执行之前再重试
+                if attempt >= self.config['USER_DATA_COMMIT_RETRIES']:
+                    raise
+                session.clear()
+                session.update(snapshot)
+                session.modified = modified
+                time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+
+app = DishSelectorApp(__name__)
 app.secret_key = 'dish_selector_secret_key_2024'
+# 文本类响应超过 COMPRESSION_MIN_SIZE 字节时按客户端支持压缩（gzip，安装了 brotli 时优先 brotli）
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_GZIP_LEVEL'] = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+app.wsgi_app = CompressionMiddleware(app.wsgi_app,
+                                     min_size=app.config['COMPRESSION_MIN_SIZE'],
+                                     gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+                                     brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'])
 
 # 配置文件上传
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# 图片由 nginx 发送时的内部 location 前缀（X-Accel-Redirect），例如 /protected-images/，
+# 对应 nginx 中 `location /protected-images/ { internal; alias <web/static>/; }`；
+# 使用 Apache / lighttpd 时可改为设置 USE_X_SENDFILE=1
+app.config['IMAGE_ACCEL_REDIRECT_PREFIX'] = os.environ.get('IMAGE_ACCEL_REDIRECT_PREFIX')
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
+# 内容哈希命名的图片缓存一年
+IMMUTABLE_MAX_AGE = 31536000
+# 带内容哈希文件名的 JS / CSS 打包文件（见 assets.py）
+ASSETS_DIST_DIR = os.path.join(UPLOAD_FOLDER, 'dist')
+asset_manifest = AssetManifest(ASSETS_DIST_DIR)
+# 菜品图片的各尺寸缩略图（JPEG / WebP）
+IMAGE_VARIANTS_DIR = os.path.join(UPLOAD_FOLDER, 'variants')
+# 等待后台处理的原始上传
+IMAGE_UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+# 图片处理进程数和最多同时排队的任务数
+app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+app.config['IMAGE_MAX_PENDING'] = int(os.environ.get('IMAGE_MAX_PENDING', 32))
+# 定期检查菜品图片（删除未引用的文件、补齐缩略图）的间隔秒数，0 表示不启用；
+# 修改时间在 IMAGE_GC_GRACE 秒以内的文件视为正在处理，不会被删除
+app.config['IMAGE_GC_INTERVAL'] = int(os.environ.get('IMAGE_GC_INTERVAL', 0))
+app.config['IMAGE_GC_GRACE'] = int(os.environ.get('IMAGE_GC_GRACE', 3600))
+# 分块上传：每个分块的最大字节数和单个文件的最大字节数
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024))
+app.config['UPLOAD_MAX_FILE_SIZE'] = int(os.environ.get('UPLOAD_MAX_FILE_SIZE', 64 * 1024 * 1024))
 
 # 数据文件路径
 DISHES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dishes.json')
 ORDERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'orders')
 USER_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_data.json')
+USER_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_data')
 QUESTIONNAIRE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questionnaire_responses.json')
 SEEDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seeds_data.json')
+USER_DATA_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_data.db')
+LEDGER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ledger')
+
+# 用户数据存储后端：json（默认，user_data/ 目录下按部分拆分的文件）或 sqlite（user_data.db，WAL 模式）
+app.config['USER_DATA_BACKEND'] = os.environ.get('USER_DATA_BACKEND', 'json')
+# JSON 后端可选延迟写入：每隔 FLUSH_INTERVAL 秒或累计 FLUSH_MAX_PENDING 次修改合并写一次（仅限单进程部署）
+app.config['USER_DATA_WRITE_BEHIND'] = os.environ.get('USER_DATA_WRITE_BEHIND', '0') == '1'
+app.config['USER_DATA_FLUSH_INTERVAL'] = float(os.environ.get('USER_DATA_FLUSH_INTERVAL', 1.0))
+app.config['USER_DATA_FLUSH_MAX_PENDING'] = int(os.environ.get('USER_DATA_FLUSH_MAX_PENDING', 50))
+# 多个 worker 同时修改用户数据发生冲突时，单个请求最多执行的次数
+app.config['USER_DATA_COMMIT_RETRIES'] = int(os.environ.get('USER_DATA_COMMIT_RETRIES', 10))
+# /api/batch 一次最多执行的操作数
+app.config['BATCH_MAX_ACTIONS'] = int(os.environ.get('BATCH_MAX_ACTIONS', 100))
+user_store = create_user_store(app.config['USER_DATA_BACKEND'], USER_DATA_DIR, USER_DATA_DB, LEDGER_DIR,
+                               legacy_json=USER_DATA_FILE,
+                               write_behind=app.config['USER_DATA_WRITE_BEHIND'],
+                               flush_interval=app.config['USER_DATA_FLUSH_INTERVAL'],
+                               flush_max_pending=app.config['USER_DATA_FLUSH_MAX_PENDING'])
 
 # 确保必要的目录存在
-for directory in [UPLOAD_FOLDER, ORDERS_DIR]:
+for directory in [UPLOAD_FOLDER, ORDERS_DIR, IMAGE_UPLOAD_DIR]:
     if not os.path.exists(directory):
         os.makedirs(directory)
 
+order_store = OrderStore(ORDERS_DIR)
+# 模板片段缓存（菜单、订单列表、问卷记录），按数据源版本失效
+fragment_cache = FragmentCache()
+fragment_cache.register_source('dishes', lambda: file_version(DISHES_FILE))
+fragment_cache.register_source('seeds', lambda: file_version(SEEDS_FILE))
+upload_sessions = UploadSessionStore(os.path.join(IMAGE_UPLOAD_DIR, 'sessions'))
+image_pool = ImageWorkerPool(max_workers=app.config['IMAGE_WORKERS'], max_pending=app.config['IMAGE_MAX_PENDING'])
+# 订单和余额变化的实时推送（/events）
+event_broker = EventBroker()
+
 # 默认用户凭据（保留用于兼容性）
 DEFAULT_USER = {
     'username': 'wxb',
@@ -40,65 +164,201 @@ def allowed_file(filename):
     """检查文件扩展名是否允许"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def load_user_data():
-    """加载用户数据"""
-    default_data = {
-        'balance': 520,  # 初始宝宝币余额
-        'transactions': [],  # 交易记录
-        'daily_questionnaire_completed': {},  # 每日问卷完成状态
-        'optimism_streak': 0,  # 乐观连续天数
-        'medicine_streak': 0,  # 按时吃药连续天数
-        'checkin_streak': 0,  # 小打卡连续天数
-        'exercise_streak': 0,  # 健身连续天数
-        'check_in_history': {},  # 签到历史 {date: {'checked': True, 'reward': amount}}
-        'consecutive_days': 0,  # 连续签到天数
-        'total_check_ins': 0,  # 总签到天数
-        'coupons': [],  # 优惠券 [{'type': 'discount', 'value': 0.9, 'description': '9折优惠券', 'expires': date, 'used': False}]
-        'guess_game_history': {},  # 猜数字游戏历史 {date: {'games_played': count, 'total_reward': amount}}
-        'daily_guess_games': 0,  # 今日已玩游戏次数
-        'inventory': [],  # 背包物品 [{'type': 'item', 'name': '物品名', 'description': '描述', 'category': '类别', 'quantity': 数量}]
-        'make_up_cards': 0,  # 补签卡数量
-        'extra_game_chances': 0,  # 额外游戏机会
-        'farm': {  # 农场数据
-            'seeds_inventory': {},  # 种子库存 {seed_id: quantity}
-            'planted_crops': [],  # 已种植作物 [{'id': 'uuid', 'seed_id': 'seed1', 'planted_date': 'date', 'last_watered': 'date', 'water_count': 0, 'fertilizer_count': 0, 'status': 'growing|mature|dead'}]
-            'last_farm_visit': None,  # 最后访问农场时间
-            'farm_slots': 6,  # 农场种植位数量
-            'fertilizer': 0,  # 粪便数量
-            'daily_poop_count': 0,  # 每日农场打卡次数
-            'last_poop_date': None  # 最后农场打卡日期
-        }
+# 用户数据的初始字段，由迁移（add_default_user_fields）补齐到已有数据中
+DEFAULT_USER_DATA = {
+    'balance': 520,  # 初始宝宝币余额（交易记录单独保存在账本中）
+    'daily_questionnaire_completed': {},  # 每日问卷完成状态
+    'optimism_streak': 0,  # 乐观连续天数
+    'medicine_streak': 0,  # 按时吃药连续天数
+    'checkin_streak': 0,  # 小打卡连续天数
+    'exercise_streak': 0,  # 健身连续天数
+    'check_in_history': {},  # 签到历史 {date: {'checked': True, 'reward': amount}}
+    'consecutive_days': 0,  # 连续签到天数
+    'total_check_ins': 0,  # 总签到天数
+    'coupons': [],  # 优惠券 [{'type': 'discount', 'value': 0.9, 'description': '9折优惠券', 'expires': date, 'used': False}]
+    'guess_game_history': {},  # 猜数字游戏历史 {date: {'games_played': count, 'total_reward': amount}}
+    'daily_guess_games': 0,  # 今日已玩游戏次数
+    'inventory': [],  # 背包物品 [{'type': 'item', 'name': '物品名', 'description': '描述', 'category': '类别', 'quantity': 数量}]
+    'make_up_cards': 0,  # 补签卡数量
+    'extra_game_chances': 0,  # 额外游戏机会
+    'farm': {  # 农场数据
+        'seeds_inventory': {},  # 种子库存 {seed_id: quantity}
+        'planted_crops': [],  # 已种植作物 [{'id': 'uuid', 'seed_id': 'seed1', 'planted_date': 'date', 'last_watered': 'date', 'water_count': 0, 'fertilizer_count': 0, 'status': 'growing|mature|dead'}]
+        'last_farm_visit': None,  # 最后访问农场时间
+        'farm_slots': 6,  # 农场种植位数量
+        'fertilizer': 0,  # 粪便数量
+        'daily_poop_count': 0,  # 每日农场打卡次数
+        'last_poop_date': None  # 最后农场打卡日期
     }
-    
-    if not os.path.exists(USER_DATA_FILE):
-        save_user_data(default_data)
-        return default_data
-    
-    try:
-        with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-            loaded_data = json.load(f)
-            
-        # 确保所有必需的字段都存在
-        updated = False
-        for key, value in default_data.items():
-            if key not in loaded_data:
-                loaded_data[key] = value
-                updated = True
-        
-        # 如果数据结构有更新，保存它
-        if updated:
-            save_user_data(loaded_data)
-            
-        return loaded_data
-    except Exception as e:
-        print(f"Error loading user data: {e}")
-        save_user_data(default_data)
-        return default_data
+}
+
+def read_user_data():
+    """创建按需加载的用户数据视图（访问字段时才读取它所属的部分）"""
+    return UserDocument(user_store)
+
+# 数据迁移：每类数据带 schema_version，启动时由 run_migrations 迁移到最新版本，加载时不再补齐字段
+dishes_migrations = MigrationRegistry('dishes')
+seeds_migrations = MigrationRegistry('seeds')
+user_data_migrations = MigrationRegistry('user_data')
+
+@dishes_migrations.migration(1)
+def add_default_dish_price(document):
+    """为旧菜品添加默认价格"""
+    for dish in document['dishes']:
+        dish.setdefault('price', 52)  # 默认价格52宝宝币
+
+@dishes_migrations.migration(2)
+def add_dish_ids(document):
+    """为菜品分配固定 ID（用于查询图片处理状态）"""
+    for dish in document['dishes']:
+        dish.setdefault('id', new_dish_id())
+
+@dishes_migrations.migration(3)
+def use_content_hashed_images(document):
+    """把旧的 dish_<时间戳>_<随机串> 图片改为内容哈希文件名，内容相同的图片合并为一份
+
+    只复制（硬链接）不删除，旧文件在迁移写回后由 collect_dish_images 清理。
+    """
+    for dish in document['dishes']:
+        filename = dish['image_path'].split('/')[-1]
+        path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if not os.path.exists(path):
+            continue
+        hashed = f"{file_digest(path)}.{filename.rsplit('.', 1)[1].lower()}"
+        if hashed == filename:
+            continue
+        renames = [(path, os.path.join(app.config['UPLOAD_FOLDER'], hashed))]
+        renames += [(os.path.join(IMAGE_VARIANTS_DIR, variant_filename(filename, w, fmt)),
+                     os.path.join(IMAGE_VARIANTS_DIR, variant_filename(hashed, w, fmt)))
+                    for w in VARIANT_WIDTHS for fmt in VARIANT_FORMATS]
+        for source, target in renames:
+            if os.path.exists(source) and not os.path.exists(target):
+                os.link(source, target)
+        dish['image_path'] = f'images/{hashed}'
+
+@seeds_migrations.migration(1)
+def add_seed_fertilizer_requirement(document):
+    """旧种子不需要施肥"""
+    for seed in document['seeds'].values():
+        seed.setdefault('required_fertilizer_count', 0)
+
+@user_data_migrations.migration(1)
+def add_default_user_fields(user_data):
+    """补齐缺失的字段"""
+    fill_defaults(user_data, DEFAULT_USER_DATA)
+
+def fill_defaults(data, defaults):
+    """按默认值补齐缺失的字段，嵌套的字典（例如 farm）逐层补齐"""
+    for key, value in defaults.items():
+        if key not in data:
+            data[key] = copy.deepcopy(value)
+        elif isinstance(value, dict) and value and isinstance(data[key], dict):
+            fill_defaults(data[key], value)
+
+@user_data_migrations.migration(2)
+def add_crop_fertilizer_count(user_data):
+    """为现有作物添加 fertilizer_count 字段"""
+    for crop in user_data['farm']['planted_crops']:
+        crop.setdefault('fertilizer_count', 0)
+
+@user_data_migrations.migration(3)
+def add_treasure_hunt(user_data):
+    """初始化寻宝日记游戏数据"""
+    if 'treasure_hunt' not in user_data:
+        user_data['treasure_hunt'] = new_treasure_hunt()
+
+@user_data_migrations.migration(4)
+def fill_farm_defaults(user_data):
+    """补齐农场的默认字段（SQLite 后端曾在新建的数据库中只保存 planted_crops）"""
+    fill_defaults(user_data, {'farm': DEFAULT_USER_DATA['farm']})
+
+def migrate_user_data():
+    """把用户数据迁移到最新版本（多个进程同时启动时由版本号比较保证只有一个生效）"""
+    while True:
+        user_data_session = UserDataSession(user_store, read_user_data)
+        user_data = user_data_session.data
+        if user_data_migrations.is_current(user_data):
+            return []
+        applied = user_data_migrations.apply(user_data)
+        user_data_session.stage(user_data)
+        try:
+            user_data_session.commit()
+            return applied
+        except ConflictError:
+            continue
+
+def run_migrations():
+    """启动时执行一次全部数据迁移"""
+    with locked_dishes():
+        dishes_applied = migrate_json_file(DISHES_FILE, dishes_migrations, lambda raw: {'dishes': raw or []})
+    if dishes_applied:
+        try:
+            collect_dish_images()
+        except (OSError, ValueError, UnsafeCollection) as e:
+            print(f"跳过清理菜品图片: {e}")
+    results = {
+        'dishes': dishes_applied,
+        'seeds': migrate_json_file(SEEDS_FILE, seeds_migrations, lambda raw: raw or load_seeds_data()),
+        'user_data': migrate_user_data()
+    }
+    for name, applied in results.items():
+        if applied:
+            print(f"已迁移 {name} 数据到 schema_version {applied[-1]}")
+
+def get_user_data_session():
+    """获取当前请求的用户数据工作单元，不在请求中时返回 None"""
+    if not has_request_context():
+        return None
+    if 'user_data_session' not in g:
+        g.user_data_session = UserDataSession(user_store, read_user_data)
+    return g.user_data_session
+
+@app.errorhandler(ConflictError)
+def handle_user_data_conflict(e):
+    """多次重试仍然冲突"""
+    return jsonify({'success': False, 'message': '操作太频繁，请稍后重试'}), 409
+
+@app.teardown_request
+def close_user_data_session(exc):
+    """请求结束时提交剩余的修改（通常已在 dispatch_request 中提交），出现异常则回滚"""
+    user_data_session = g.pop('user_data_session', None)
+    if user_data_session is None:
+        return
+    if exc is None:
+        user_data_session.commit()
+        if user_data_session.loaded and user_data_session.data.balance_changed():
+            event_broker.publish('balance_changed', {'balance': user_data_session.data['balance']})
+    else:
+        user_data_session.rollback()
+
+def load_user_data():
+    """加载用户数据（兼容视图：同一请求内各部分只在首次访问时读取一次）"""
+    user_data_session = get_user_data_session()
+    if user_data_session is None:
+        return read_user_data()
+    return user_data_session.data
 
 def save_user_data(data):
-    """保存用户数据"""
-    with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """保存用户数据（请求内只做标记，请求结束时统一写回）"""
+    user_data_session = get_user_data_session()
+    if user_data_session is None:
+        user_store.save(data)
+    else:
+        user_data_session.stage(data)
+
+# 可以通过 /api/batch 批量执行的操作 {名称: 视图函数}
+BATCH_ACTIONS = {}
+
+def batch_action(view):
+    """把视图登记为批量操作（视图需通过 action_params() 读取参数并返回 JSON）"""
+    BATCH_ACTIONS[view.__name__] = view
+    return view
+
+def action_params():
+    """当前操作的参数：在 /api/batch 中为该操作的 params，否则为请求的 JSON"""
+    if 'batch_params' in g:
+        return g.batch_params
+    return request.get_json()
 
 def load_seeds_data():
     """加载种子数据"""
@@ -149,8 +409,10 @@ def load_seeds_data():
 
 def save_seeds_data(data):
     """保存种子数据"""
+    data.setdefault('schema_version', seeds_migrations.latest)
     with open(SEEDS_FILE, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    fragment_cache.invalidate('seeds')
 
 def check_crop_status():
     """检查作物状态，处理死亡逻辑"""
@@ -204,10 +466,18 @@ def add_transaction(amount, description, transaction_type='income'):
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
     
-    user_data['transactions'].insert(0, transaction)  # 最新的在前面
+    record_transaction(transaction)
     save_user_data(user_data)
     return True, '操作成功'
 
+def record_transaction(transaction):
+    """把交易记录追加到账本（请求内随用户数据一起提交）"""
+    user_data_session = get_user_data_session()
+    if user_data_session is None:
+        user_store.ledger.append([transaction])
+    else:
+        user_data_session.record_transaction(transaction)
+
 def is_questionnaire_completed_today():
     """检查今天是否已完成问卷"""
     user_data = load_user_data()
@@ -224,16 +494,7 @@ def mark_questionnaire_completed():
 def save_questionnaire_response(responses):
     """保存问卷回答"""
     today = date.today().isoformat()
-    
-    # 加载现有的问卷数据
-    if os.path.exists(QUESTIONNAIRE_FILE):
-        try:
-            with open(QUESTIONNAIRE_FILE, 'r', encoding='utf-8') as f:
-                all_responses = json.load(f)
-        except:
-            all_responses = {}
-    else:
-        all_responses = {}
+    all_responses = load_questionnaire_responses()
     
     questionnaire_data = {
         'date': today,
@@ -247,76 +508,359 @@ def save_questionnaire_response(responses):
     with open(QUESTIONNAIRE_FILE, 'w', encoding='utf-8') as f:
         json.dump(all_responses, f, ensure_ascii=False, indent=2)
 
-def load_all_questionnaire_responses():
-    """加载所有问卷回答"""
+def load_questionnaire_responses():
+    """加载所有问卷回答 {日期: 回答}"""
     if not os.path.exists(QUESTIONNAIRE_FILE):
-        return []
+        return {}
     
     try:
         with open(QUESTIONNAIRE_FILE, 'r', encoding='utf-8') as f:
-            all_responses = json.load(f)
-            responses = list(all_responses.values())
-            return sorted(responses, key=lambda x: x.get('date', ''), reverse=True)
+            return json.load(f)
     except:
-        return []
+        return {}
+
+def questionnaire_responses_page(before=None, limit=20, start=None, end=None):
+    """按日期倒序分页的问卷回答，返回 (回答列表, 下一页游标)
+
+    游标是上一页最后一条的日期；start / end 为日期范围（YYYY-MM-DD，包含两端）。
+    """
+    all_responses = load_questionnaire_responses()
+    days = sorted((day for day in all_responses
+                   if (before is None or day < before) and (start is None or day >= start)
+                   and (end is None or day <= end)), reverse=True)
+    next_cursor = days[limit - 1] if len(days) > limit else None
+    return [all_responses[day] for day in days[:limit]], next_cursor
 
 def load_dishes():
-    """加载菜品数据"""
-    if not os.path.exists(DISHES_FILE):
-        with open(DISHES_FILE, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
-        return []
-    
+    """加载菜品数据（文件已在启动时迁移到最新格式）"""
     try:
-        with open(DISHES_FILE, 'r', encoding='utf-8') as f:
-            dishes = json.load(f)
-            # 为旧数据添加默认价格
-            for dish in dishes:
-                if 'price' not in dish:
-                    dish['price'] = 52  # 默认价格52宝宝币
-            return dishes
+        return read_dishes()
     except:
         return []
 
+def read_dishes():
+    """读取菜品数据，文件不存在或损坏时抛出异常（OSError / ValueError）
+
+    删除图片、检查就绪状态等不能把读取失败当作“没有菜品”的地方使用。
+    """
+    with open(DISHES_FILE, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    if not isinstance(document, dict) or not isinstance(document.get('dishes'), list):
+        raise ValueError('dishes.json 格式不正确')
+    return document['dishes']
+
 def save_dishes(dishes):
     """保存菜品数据"""
-    with open(DISHES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(dishes, f, ensure_ascii=False, indent=2)
-
-def load_orders():
-    """加载所有订单"""
-    orders = []
-    if os.path.exists(ORDERS_DIR):
-        for filename in os.listdir(ORDERS_DIR):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(ORDERS_DIR, filename), 'r', encoding='utf-8') as f:
-                        order = json.load(f)
-                        orders.append(order)
-                except:
-                    continue
-    return sorted(orders, key=lambda x: x.get('timestamp', 0), reverse=True)
+    tmp_path = DISHES_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'schema_version': dishes_migrations.latest, 'dishes': dishes}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, DISHES_FILE)
+    fragment_cache.invalidate('dishes')
+
+_dishes_lock = threading.RLock()
+
+@contextmanager
+def locked_dishes():
+    """修改 dishes.json 时进程内和进程间互斥（请求线程和图片处理回调会同时读-改-写）"""
+    with _dishes_lock:
+        with open(DISHES_FILE + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+def load_ready_dishes():
+    """加载图片已处理完成、可以展示给客户的菜品"""
+    return [dish for dish in load_dishes() if dish.get('status', 'ready') == 'ready']
+
+def new_dish_id():
+    return uuid.uuid4().hex[:8]
+
+def save_dish_upload(file, dish_id):
+    """把上传的原始文件直接写入磁盘（不解码），返回 (路径, 内容哈希)"""
+    file_ext = secure_filename(file.filename).rsplit('.', 1)[1].lower()
+    raw_path = os.path.join(IMAGE_UPLOAD_DIR, f'{dish_id}.{file_ext}')
+    return raw_path, save_stream(file.stream, raw_path)
+
+def new_processing_dish(dish_name, dish_price, file):
+    """保存原始上传并创建菜品记录
+
+    相同内容的图片已经处理过时直接复用（状态为 ready），否则为 processing 状态，
+    图片由 start_dish_image_processing 在后台处理。
+    """
+    dish_id = new_dish_id()
+    raw_path, digest = save_dish_upload(file, dish_id)
+    return register_dish_upload(dish_id, dish_name, dish_price, raw_path, digest)
+
+def register_dish_upload(dish_id, dish_name, dish_price, raw_path, digest):
+    """为已写入 IMAGE_UPLOAD_DIR 的原始图片创建菜品记录（见 new_processing_dish）"""
+    filename = f"{digest}.jpg"
+    dish = {
+        'id': dish_id,
+        'name': dish_name,
+        'price': dish_price,
+        'image_path': f'images/{filename}'
+    }
+    if os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename)):
+        os.remove(raw_path)
+        dish['status'] = 'ready'
+        apply_image_result(dish, stored_image_result(filename))
+    else:
+        dish['status'] = 'processing'
+        dish['raw_path'] = os.path.basename(raw_path)
+    return dish
+
+def stored_image_result(filename):
+    """已处理过的图片的缩略图、占位图和主色调（复用相同内容的图片时使用）"""
+    return {'variants': existing_variants(filename, IMAGE_VARIANTS_DIR),
+            **image_placeholder(os.path.join(app.config['UPLOAD_FOLDER'], filename))}
+
+def apply_image_result(dish, result):
+    """把图片处理结果（缩略图、占位图、主色调）写入菜品记录"""
+    for key in ('variants', 'placeholder', 'color'):
+        if key in result:
+            dish[key] = result[key]
+
+def image_refcounts(dishes):
+    """每个图片文件被多少道菜品引用"""
+    counts = {}
+    for dish in dishes:
+        filename = dish['image_path'].split('/')[-1]
+        counts[filename] = counts.get(filename, 0) + 1
+    return counts
+
+def release_dish_image(dishes, filename):
+    """菜品删除后，图片不再被任何菜品引用时删除图片和缩略图（需在 locked_dishes 中调用）"""
+    if filename not in image_refcounts(dishes):
+        remove_image(filename, app.config['UPLOAD_FOLDER'], IMAGE_VARIANTS_DIR)
+
+def collect_dish_images():
+    """删除所有未被引用的菜品图片，返回删除的文件名列表
+
+    菜品数据无法读取时抛出 OSError / ValueError，看起来不安全时抛出 UnsafeCollection，都不会删除任何文件。
+    """
+    with locked_dishes():
+        referenced = set(image_refcounts(read_dishes()))
+        return collect_garbage(referenced, app.config['UPLOAD_FOLDER'], IMAGE_VARIANTS_DIR)
+
+def scan_dish_images(grace=None, dry_run=False):
+    """检查菜品图片的完整性
+
+    删除未被任何菜品引用的图片、缩略图和遗留的原始上传文件，找出图片文件丢失的菜品，
+    并为缩略图或占位图不完整的菜品重新生成。dry_run 时只检查不修改。
+    返回 {'removed': [文件名], 'missing': [菜品], 'rebuilt': [菜品 ID], 'failed': {菜品 ID: 错误}}；
+    异常与 collect_dish_images 相同，此时不会删除任何文件。
+    """
+    grace = app.config['IMAGE_GC_GRACE'] if grace is None else grace
+    image_dir = app.config['UPLOAD_FOLDER']
+    with locked_dishes():
+        dishes = read_dishes()
+        removed = collect_garbage(set(image_refcounts(dishes)), image_dir, IMAGE_VARIANTS_DIR,
+                                  min_age=grace, dry_run=dry_run)
+        # 处理完成前进程退出、又没有对应菜品的原始上传文件
+        pending = {dish.get('raw_path') for dish in dishes if dish.get('status') == 'processing'}
+        deadline = time.time() - grace
+        with os.scandir(IMAGE_UPLOAD_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name not in pending and entry.stat().st_mtime < deadline:
+                    if not dry_run:
+                        os.remove(entry.path)
+                    removed.append(entry.name)
+    if not dry_run:
+        upload_sessions.expire()
+
+    missing = []
+    stale = {}
+    for dish in dishes:
+        if dish.get('status', 'ready') != 'ready':
+            continue
+        filename = dish['image_path'].split('/')[-1]
+        if not os.path.exists(os.path.join(image_dir, filename)):
+            missing.append(dish)
+        elif existing_variants(filename, IMAGE_VARIANTS_DIR) != dish.get('variants') or not dish.get('placeholder'):
+            stale.setdefault(filename, []).append(dish['id'])
+
+    results = {}
+    failed = {}
+    if stale and not dry_run:
+        futures = {filename: image_pool.submit(make_variants, os.path.join(image_dir, filename), IMAGE_VARIANTS_DIR)
+                   for filename in stale}
+        for filename, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.update((dish_id, str(e)) for dish_id in stale[filename])
+                continue
+            results.update((dish_id, result) for dish_id in stale[filename])
+        with locked_dishes():
+            dishes = read_dishes()
+            for dish in dishes:
+                if dish.get('id') in results:
+                    apply_image_result(dish, results[dish['id']])
+            save_dishes(dishes)
+    rebuilt = list(results) if not dry_run else [dish_id for ids in stale.values() for dish_id in ids]
+    return {'removed': removed, 'missing': missing, 'rebuilt': rebuilt, 'failed': failed}
+
+def start_image_gc_job(interval):
+    """在后台线程中每隔 interval 秒执行一次 scan_dish_images"""
+    def run():
+        reported_missing = set()
+        while True:
+            time.sleep(interval)
+            try:
+                report = scan_dish_images()
+            except Exception as e:
+                print(f"菜品图片检查失败: {e}")
+                continue
+            # 丢失的图片只在变化时报告一次
+            missing = {dish.get('id') for dish in report['missing']}
+            if report['removed'] or report['rebuilt'] or report['failed'] or missing != reported_missing:
+                reported_missing = missing
+                print(f"菜品图片检查：删除 {len(report['removed'])} 个文件，"
+                      f"{len(report['missing'])} 道菜品图片丢失，重新生成 {len(report['rebuilt'])} 道菜品的缩略图，"
+                      f"{len(report['failed'])} 道失败")
+
+    thread = threading.Thread(target=run, name='image-gc', daemon=True)
+    thread.start()
+    return thread
+
+def start_dish_image_processing(dish):
+    """把菜品图片交给进程池处理"""
+    raw_path = os.path.join(IMAGE_UPLOAD_DIR, dish['raw_path'])
+    dest_path = os.path.join(app.config['UPLOAD_FOLDER'], dish['image_path'].split('/')[-1])
+    image_pool.submit(convert_image, raw_path, dest_path, IMAGE_VARIANTS_DIR,
+                      callback=lambda future: finish_dish_image_processing(dish['id'], raw_path, dest_path, future))
+
+def finish_dish_image_processing(dish_id, raw_path, dest_path, future):
+    """图片处理完成（在后台线程中执行）：更新菜品状态并删除原始文件"""
+    error = future.exception()
+    with locked_dishes():
+        dishes = load_dishes()
+        dish = next((d for d in dishes if d.get('id') == dish_id), None)
+        if dish is not None and dish.get('status') == 'processing':
+            if error is None:
+                dish['status'] = 'ready'
+                apply_image_result(dish, future.result())
+            else:
+                print(f"Error processing image for dish {dish_id}: {error}")
+                dish['status'] = 'failed'
+                dish['error'] = str(error)
+            dish.pop('raw_path', None)
+            save_dishes(dishes)
+        elif dish is None:
+            # 处理期间菜品已被删除
+            release_dish_image(dishes, os.path.basename(dest_path))
+    if os.path.exists(raw_path):
+        os.remove(raw_path)
+
+def resume_dish_image_processing():
+    """重新提交上次退出时尚未处理完的图片"""
+    for dish in load_dishes():
+        if dish.get('status') == 'processing':
+            start_dish_image_processing(dish)
+
+def load_orders(status=None):
+    """加载订单（按时间倒序，可按状态过滤）"""
+    return order_store.list(status)
 
 def save_order(order):
     """保存订单"""
-    filename = f"order_{order['id']}.json"
-    filepath = os.path.join(ORDERS_DIR, filename)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(order, f, ensure_ascii=False, indent=2)
+    order_store.save(order)
 
 def delete_order(order_id):
     """删除订单"""
-    filename = f"order_{order_id}.json"
-    filepath = os.path.join(ORDERS_DIR, filename)
-    if os.path.exists(filepath):
-        os.remove(filepath)
-        return True
-    return False
+    return order_store.delete(order_id)
 
 @app.route('/images/<filename>')
 def uploaded_file(filename):
-    """提供上传的图片文件"""
-    return send_from_directory(os.path.join(app.config['UPLOAD_FOLDER']), filename)
+    """提供上传的图片文件，w（宽度）和 fmt（jpeg / webp）参数选择缩略图"""
+    width = request.args.get('w', type=int)
+    fmt = request.args.get('fmt', 'jpeg')
+    if width and fmt in VARIANT_FORMATS:
+        # 取不小于所需宽度的最小缩略图，没有合适的缩略图时返回原图
+        for variant_width in sorted(w for w in VARIANT_WIDTHS if w >= width):
+            variant = variant_filename(filename, variant_width, fmt)
+            if os.path.exists(os.path.join(IMAGE_VARIANTS_DIR, variant)):
+                return send_image(IMAGE_VARIANTS_DIR, variant)
+    return send_image(app.config['UPLOAD_FOLDER'], filename)
+
+def send_image(directory, filename):
+    """发送图片文件
+
+    带强 ETag（If-None-Match 返回 304）并支持 Range 请求；内容哈希命名的文件
+    缓存一年并标记 immutable，其他文件每次使用前用 ETag 重新验证。
+    配置了 IMAGE_ACCEL_REDIRECT_PREFIX 时只返回 X-Accel-Redirect 头，由 nginx 发送文件。
+    """
+    hashed = is_hashed_image(filename)
+    accel_prefix = app.config['IMAGE_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        path = safe_join(directory, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+        relative = os.path.relpath(path, app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + relative
+    else:
+        # 哈希文件名本身就是内容指纹，直接作为 ETag，多个 worker / 主机之间保持一致
+        response = send_from_directory(directory, filename, etag=filename if hashed else True,
+                                       max_age=IMMUTABLE_MAX_AGE if hashed else None)
+    if hashed:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+@app.route('/assets/<filename>')
+def asset_file(filename):
+    """提供打包后的 JS / CSS，客户端支持时发送预压缩的 .br / .gz 文件"""
+    path = safe_join(ASSETS_DIST_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+    path, encoding = precompressed(path, request.accept_encodings)
+    response = send_from_directory(ASSETS_DIST_DIR, os.path.basename(path),
+                                   mimetype=mimetypes.guess_type(filename)[0],
+                                   etag=f'{filename}-{encoding}' if encoding else filename,
+                                   max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.template_global()
+def asset_url(source):
+    """static 目录下 JS / CSS 源文件的地址：已构建时为带内容哈希的打包文件，否则为源文件本身"""
+    filename = asset_manifest.get(source)
+    if filename is None:
+        return url_for('static', filename=source)
+    return url_for('asset_file', filename=filename)
+
+@app.template_global()
+def dish_image_url(dish, width=None, fmt=None):
+    """菜品图片地址，指定 width / fmt 时为缩略图地址"""
+    filename = dish['image_path'].split('/')[-1]
+    if width is None:
+        return url_for('uploaded_file', filename=filename)
+    return url_for('uploaded_file', filename=filename, w=width, fmt=fmt or 'jpeg')
+
+@app.template_global()
+def dish_placeholder_style(dish):
+    """原图加载完成前显示的模糊占位图和主色调（作为 <img> 的背景）"""
+    if not dish.get('color'):
+        return ''
+    style = f"background-color: {dish['color']};"
+    if dish.get('placeholder'):
+        style += f" background-image: url('{dish['placeholder']}'); background-size: cover; background-position: center;"
+    return style
+
+@app.template_global()
+def dish_srcset(dish, fmt='jpeg'):
+    """菜品图片的 srcset（没有缩略图时为空字符串）"""
+    return ', '.join(f'{dish_image_url(dish, width, fmt)} {width}w' for width in dish.get('variants', {}).get(fmt, []))
 
 @app.route('/')
 def index():
@@ -325,16 +869,97 @@ def index():
 
 @app.route('/chef')
 def chef():
-    """厨师端主页"""
+    """厨师端主页（只渲染页面框架，各面板通过 /chef/api/* 分页加载自己的数据）"""
+    return render_template('chef.html')
+
+def page_args():
+    """分页参数：cursor 为上一页返回的 next_cursor，limit 默认 20、最多 100"""
+    limit = request.args.get('limit', 20, type=int)
+    return request.args.get('cursor') or None, max(1, min(limit, 100))
+
+def date_range_args():
+    """日期范围参数 from / to（YYYY-MM-DD，包含两端），格式错误时抛出 ValueError"""
+    start, end = request.args.get('from') or None, request.args.get('to') or None
+    return (date.fromisoformat(start) if start else None,
+            date.fromisoformat(end) if end else None)
+
+def bad_page_request(e):
+    return jsonify({'success': False, 'message': f'分页参数无效: {e}'}), 400
+
+@app.route('/chef/api/orders')
+def chef_orders_api():
+    """待处理订单（按下单时间倒序分页，from / to 按下单日期过滤）
+
+    返回的 version 可直接用于 /get_orders?since= 增量同步之后的变化。
+    """
+    try:
+        cursor, limit = page_args()
+        start, end = date_range_args()
+        before = None
+        if cursor:
+            timestamp, _, order_id = cursor.partition('_')
+            before = (int(timestamp), order_id)
+    except ValueError as e:
+        return bad_page_request(e)
+    
+    # 先读版本号：分页期间新增的订单会在下一次增量同步中补上
+    version = order_store.version
+    orders, last = order_store.page(
+        before=before, limit=limit,
+        start=datetime.combine(start, datetime.min.time()).timestamp() if start else None,
+        end=datetime.combine(end + timedelta(days=1), datetime.min.time()).timestamp() if end else None)
+    return jsonify({
+        'success': True,
+        'orders': orders,
+        'total': order_store.count,
+        'version': version,
+        'next_cursor': f'{last[0]}_{last[1]}' if last else None
+    })
+
+@app.route('/chef/api/dishes')
+def chef_dishes_api():
+    """菜品列表（按位置分页，html 为渲染好的菜品卡片）"""
+    try:
+        cursor, limit = page_args()
+        offset = max(int(cursor or 0), 0)
+    except ValueError as e:
+        return bad_page_request(e)
+    
     dishes = load_dishes()
-    orders = load_orders()
-    user_data = load_user_data()
-    questionnaire_responses = load_all_questionnaire_responses()
-    return render_template('chef.html', 
-                         dishes=dishes, 
-                         orders=orders,
-                         user_balance=user_data['balance'],
-                         questionnaire_responses=questionnaire_responses)
+    page = dishes[offset:offset + limit]
+    return jsonify({
+        'success': True,
+        'dishes': page,
+        'html': render_template('fragments/chef_dishes.html', dishes=page, offset=offset),
+        'total': len(dishes),
+        'next_cursor': str(offset + limit) if offset + limit < len(dishes) else None
+    })
+
+@app.route('/chef/api/questionnaire')
+def chef_questionnaire_api():
+    """问卷回答记录（按日期倒序分页，from / to 按日期过滤，html 为渲染好的记录）"""
+    try:
+        cursor, limit = page_args()
+        start, end = date_range_args()
+        if cursor:
+            date.fromisoformat(cursor)
+    except ValueError as e:
+        return bad_page_request(e)
+    
+    responses, next_cursor = questionnaire_responses_page(
+        before=cursor, limit=limit,
+        start=start.isoformat() if start else None, end=end.isoformat() if end else None)
+    return jsonify({
+        'success': True,
+        'responses': responses,
+        'html': render_template('fragments/chef_questionnaire.html', questionnaire_responses=responses),
+        'next_cursor': next_cursor
+    })
+
+@app.route('/chef/api/balance')
+def chef_balance_api():
+    """客户余额（只读取用户数据的 core 部分）"""
+    return jsonify({'success': True, 'balance': load_user_data()['balance']})
 
 @app.route('/update_balance', methods=['POST'])
 def update_balance():
@@ -382,28 +1007,48 @@ def reset_questionnaire():
     except Exception as e:
         return jsonify({'success': False, 'message': f'重置失败: {str(e)}'})
 
+def customer_menu():
+    """客户端的菜单（HTML 和页面脚本使用的菜品数据），按 dishes 版本缓存"""
+    def render():
+        dishes = load_ready_dishes()
+        return {'menu_section': Markup(render_template('fragments/customer_menu.html', dishes=dishes)),
+                'dishes_json': Markup(htmlsafe_json_dumps(dishes))}
+    return fragment_cache.get('customer_menu', ('dishes',), render)
+
 @app.route('/customer')
 def customer():
     """客户端主页"""
-    dishes = load_dishes()
     user_data = load_user_data()
     return render_template('customer.html', 
-                         dishes=dishes, 
+                         **customer_menu(),
                          user_data=user_data,
                          balance=user_data['balance'],
-                         transactions=user_data['transactions'][:10])  # 显示最近10条交易
+                         transactions=user_store.ledger.latest(20),  # 只读取最近20条交易
+                         ledger_stats=user_store.ledger.checkpoint())
 
 @app.route('/customer/<customer_id>')
 def customer_with_id(customer_id):
     """带有客户ID的客户端（用于分享链接）"""
-    dishes = load_dishes()
     user_data = load_user_data()
     return render_template('customer.html', 
-                         dishes=dishes, 
+                         **customer_menu(),
                          customer_id=customer_id,
                          user_data=user_data,
                          balance=user_data['balance'],
-                         transactions=user_data['transactions'][:10])
+                         transactions=user_store.ledger.latest(20),
+                         ledger_stats=user_store.ledger.checkpoint())
+
+@app.route('/transactions')
+def get_transactions():
+    """分页获取交易记录（before 为上一页返回的游标）"""
+    before = request.args.get('before', type=int)
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    transactions, next_cursor = user_store.ledger.page(before=before, limit=limit)
+    return jsonify({
+        'success': True,
+        'transactions': transactions,
+        'next_cursor': next_cursor
+    })
 
 @app.route('/daily_tasks')
 def daily_tasks():
@@ -418,17 +1063,22 @@ def daily_tasks():
 def farm():
     """农场主页面"""
     user_data = check_crop_status()  # 检查作物状态
-    seeds_data = load_seeds_data()
     
     return render_template('farm.html', 
                          balance=user_data['balance'],
                          farm_data=user_data['farm'],
-                         seeds=seeds_data['seeds'])
+                         **fragment_cache.get('farm_seeds', ('seeds',), farm_seeds))
+
+def farm_seeds():
+    """农场页面使用的种子数据（模板变量 seeds 和页面脚本使用的 JSON），按 seeds 版本缓存"""
+    seeds = load_seeds_data()['seeds']
+    return {'seeds': seeds, 'seeds_json': Markup(htmlsafe_json_dumps(seeds))}
 
 @app.route('/buy_seed', methods=['POST'])
+@batch_action
 def buy_seed():
     """购买种子"""
-    data = request.get_json()
+    data = action_params()
     seed_id = data.get('seed_id')
     quantity = data.get('quantity', 1)
     
@@ -467,9 +1117,10 @@ def buy_seed():
     })
 
 @app.route('/buy_fertilizer', methods=['POST'])
+@batch_action
 def buy_fertilizer():
     """购买粪便"""
-    data = request.get_json()
+    data = action_params()
     quantity = data.get('quantity', 1)
     
     user_data = load_user_data()
@@ -497,9 +1148,10 @@ def buy_fertilizer():
     })
 
 @app.route('/plant_seed', methods=['POST'])
+@batch_action
 def plant_seed():
     """播种"""
-    data = request.get_json()
+    data = action_params()
     seed_id = data.get('seed_id')
     slot_index = data.get('slot_index')
     
@@ -553,9 +1205,10 @@ def plant_seed():
     })
 
 @app.route('/water_crop', methods=['POST'])
+@batch_action
 def water_crop():
     """浇水"""
-    data = request.get_json()
+    data = action_params()
     crop_id = data.get('crop_id')
     
     user_data = load_user_data()
@@ -618,9 +1271,10 @@ def water_crop():
     })
 
 @app.route('/fertilize_crop', methods=['POST'])
+@batch_action
 def fertilize_crop():
     """施肥"""
-    data = request.get_json()
+    data = action_params()
     crop_id = data.get('crop_id')
     
     user_data = load_user_data()
@@ -654,9 +1308,6 @@ def fertilize_crop():
     # 更新作物状态
     for c in user_data['farm']['planted_crops']:
         if c['id'] == crop_id:
-            # 为现有作物添加fertilizer_count字段（如果没有的话）
-            if 'fertilizer_count' not in c:
-                c['fertilizer_count'] = 0
             c['fertilizer_count'] += 1
             c['last_fertilized'] = current_date
             
@@ -681,9 +1332,10 @@ def fertilize_crop():
     })
 
 @app.route('/harvest_crop', methods=['POST'])
+@batch_action
 def harvest_crop():
     """收获作物"""
-    data = request.get_json()
+    data = action_params()
     crop_id = data.get('crop_id')
     
     user_data = load_user_data()
@@ -731,9 +1383,10 @@ def harvest_crop():
     })
 
 @app.route('/shovel_crop', methods=['POST'])
+@batch_action
 def shovel_crop():
     """铁铲铲除作物"""
-    data = request.get_json()
+    data = action_params()
     crop_id = data.get('crop_id')
     
     user_data = load_user_data()
@@ -767,9 +1420,10 @@ def shovel_crop():
     })
 
 @app.route('/remove_dead_crop', methods=['POST'])
+@batch_action
 def remove_dead_crop():
     """移除死亡作物"""
-    data = request.get_json()
+    data = action_params()
     crop_id = data.get('crop_id')
     
     user_data = load_user_data()
@@ -795,6 +1449,7 @@ def remove_dead_crop():
     })
 
 @app.route('/farm_poop', methods=['POST'])
+@batch_action
 def farm_poop():
     """农场打卡获取粪便"""
     user_data = load_user_data()
@@ -1026,7 +1681,7 @@ def process_questionnaire():
             'timestamp': int(datetime.now().timestamp()),
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        user_data['transactions'].insert(0, transaction)
+        record_transaction(transaction)
     
     # 保存更新后的用户数据
     save_user_data(user_data)
@@ -1108,6 +1763,7 @@ def check_in_page():
                          user_coupons=user_data['coupons'])
 
 @app.route('/check_in', methods=['POST'])
+@batch_action
 def check_in():
     """处理签到请求"""
     user_data = load_user_data()
@@ -1152,7 +1808,7 @@ def check_in():
         'timestamp': int(datetime.now().timestamp()),
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
-    user_data['transactions'].insert(0, transaction)
+    record_transaction(transaction)
     
     # 检查连续签到奖励
     bonus_reward = False
@@ -1200,9 +1856,10 @@ def check_in():
     })
 
 @app.route('/make_up_check_in', methods=['POST'])
+@batch_action
 def make_up_check_in():
     """补签功能"""
-    data = request.get_json()
+    data = action_params()
     target_date = data.get('date')
     
     user_data = load_user_data()
@@ -1241,7 +1898,7 @@ def make_up_check_in():
         'timestamp': int(datetime.now().timestamp()),
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
-    user_data['transactions'].insert(0, transaction)
+    record_transaction(transaction)
     
     # 更新背包中的补签卡数量
     for item in user_data.get('inventory', []):
@@ -1288,6 +1945,7 @@ def guess_game():
                          extra_chances=extra_chances)
 
 @app.route('/start_guess_game', methods=['POST'])
+@batch_action
 def start_guess_game():
     """开始新的猜数字游戏"""
     user_data = load_user_data()
@@ -1322,9 +1980,10 @@ def start_guess_game():
     })
 
 @app.route('/make_guess', methods=['POST'])
+@batch_action
 def make_guess():
     """处理用户猜测"""
-    data = request.get_json()
+    data = action_params()
     game_id = data.get('game_id')
     guess = data.get('guess')
     
@@ -1395,7 +2054,7 @@ def make_guess():
             'timestamp': int(datetime.now().timestamp()),
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        user_data['transactions'].insert(0, transaction)
+        record_transaction(transaction)
         
         save_user_data(user_data)
         
@@ -1453,6 +2112,7 @@ def make_guess():
     })
 
 @app.route('/buy_game_chance', methods=['POST'])
+@batch_action
 def buy_game_chance():
     """购买游戏机会"""
     user_data = load_user_data()
@@ -1468,8 +2128,6 @@ def buy_game_chance():
     
     # 增加额外游戏机会
     user_data = load_user_data()
-    if 'extra_game_chances' not in user_data:
-        user_data['extra_game_chances'] = 0
     user_data['extra_game_chances'] += 1
     save_user_data(user_data)
     
@@ -1526,43 +2184,17 @@ def add_dish():
     
     if file and allowed_file(file.filename):
         try:
-            # 生成唯一文件名
-            timestamp = int(datetime.now().timestamp())
-            random_str = str(uuid.uuid4())[:8]
-            file_ext = secure_filename(file.filename).rsplit('.', 1)[1].lower()
-            filename = f"dish_{timestamp}_{random_str}.{file_ext}"
-            
-            # 保存文件
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
-            # 处理图片
-            img = Image.open(file.stream)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'RGBA':
-                    background.paste(img, mask=img.split()[-1])
-                else:
-                    background.paste(img)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 保存处理后的图片
-            img.save(filepath, 'JPEG', quality=95)
-            
-            # 添加到菜品列表
-            dishes = load_dishes()
-            new_dish = {
-                'name': dish_name,
-                'price': dish_price,
-                'image_path': f'images/{filename}'
-            }
-            dishes.append(new_dish)
-            save_dishes(dishes)
-            
-            flash(f'菜品 "{dish_name}" 添加成功！价格：{dish_price}宝宝币', 'success')
+            # 先保存原始文件并登记菜品，图片在后台处理
+            new_dish = new_processing_dish(dish_name, dish_price, file)
+            with locked_dishes():
+                dishes = load_dishes()
+                dishes.append(new_dish)
+                save_dishes(dishes)
+            if new_dish['status'] == 'processing':
+                start_dish_image_processing(new_dish)
+                flash(f'菜品 "{dish_name}" 添加成功！价格：{dish_price}宝宝币（图片处理中）', 'success')
+            else:
+                flash(f'菜品 "{dish_name}" 添加成功！价格：{dish_price}宝宝币', 'success')
             
         except Exception as e:
             flash(f'添加菜品失败: {str(e)}', 'error')
@@ -1593,8 +2225,7 @@ def batch_add_dishes():
     success_count = 0
     error_count = 0
     error_messages = []
-    
-    dishes = load_dishes()
+    new_dishes = []
     
     for i, (dish_name, dish_price, file) in enumerate(zip(dish_names, dish_prices, dish_images)):
         dish_name = dish_name.strip()
@@ -1625,48 +2256,23 @@ def batch_add_dishes():
             continue
         
         try:
-            # 生成唯一文件名
-            timestamp = int(datetime.now().timestamp())
-            random_str = str(uuid.uuid4())[:8]
-            file_ext = secure_filename(file.filename).rsplit('.', 1)[1].lower()
-            filename = f"dish_{timestamp}_{random_str}_{i}.{file_ext}"
-            
-            # 保存文件
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
-            # 处理图片
-            img = Image.open(file.stream)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'RGBA':
-                    background.paste(img, mask=img.split()[-1])
-                else:
-                    background.paste(img)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 保存处理后的图片
-            img.save(filepath, 'JPEG', quality=95)
-            
-            # 添加到菜品列表
-            new_dish = {
-                'name': dish_name,
-                'price': dish_price,
-                'image_path': f'images/{filename}'
-            }
-            dishes.append(new_dish)
+            # 先保存原始文件，图片在后台处理
+            new_dishes.append(new_processing_dish(dish_name, dish_price, file))
             success_count += 1
             
         except Exception as e:
             error_count += 1
             error_messages.append(f'第 {i+1} 道菜品 "{dish_name}" 处理失败: {str(e)}')
     
-    # 保存所有成功添加的菜品
-    if success_count > 0:
-        save_dishes(dishes)
+    # 一次性保存所有成功添加的菜品，再提交图片处理
+    if new_dishes:
+        with locked_dishes():
+            dishes = load_dishes()
+            dishes.extend(new_dishes)
+            save_dishes(dishes)
+        for new_dish in new_dishes:
+            if new_dish['status'] == 'processing':
+                start_dish_image_processing(new_dish)
     
     # 显示结果消息
     if success_count > 0:
@@ -1679,21 +2285,168 @@ def batch_add_dishes():
     
     return redirect(url_for('chef'))
 
+def parse_dish_price(value):
+    """解析菜品价格，无效或为负数时使用默认价格 52"""
+    try:
+        price = int(value)
+    except (TypeError, ValueError):
+        return 52
+    return price if price >= 0 else 52
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """创建分块上传会话
+
+    请求体：{"filename": ..., "size": 字节数, "dish_name": ..., "dish_price": ...}
+    之后用 PUT /uploads/<upload_id>（Content-Range: bytes 起始-结束/总大小）依次上传分块，
+    中断后 GET /uploads/<upload_id> 查询已收到的字节数继续上传，
+    全部完成后 POST /uploads/finalize 创建菜品。
+    """
+    data = request.get_json(silent=True) or {}
+    filename = str(data.get('filename', ''))
+    dish_name = str(data.get('dish_name', '')).strip()
+    size = data.get('size')
+    if not dish_name:
+        return jsonify({'success': False, 'message': '请输入菜品名称'}), 400
+    if not allowed_file(filename):
+        return jsonify({'success': False, 'message': '不支持的图片格式，请选择 PNG、JPG、JPEG、GIF 或 BMP 格式'}), 400
+    if not isinstance(size, int) or size <= 0 or size > app.config['UPLOAD_MAX_FILE_SIZE']:
+        return jsonify({'success': False, 'message': f'文件大小无效（最大 {app.config["UPLOAD_MAX_FILE_SIZE"] // 1048576} MB）'}), 400
+    upload_sessions.expire()
+    upload = upload_sessions.create(filename, size, dish_name=dish_name,
+                                    dish_price=parse_dish_price(data.get('dish_price', 52)))
+    return jsonify({'success': True, 'upload_id': upload['id'], 'received': 0,
+                    'chunk_size': app.config['UPLOAD_CHUNK_SIZE']})
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """查询上传进度"""
+    upload = upload_sessions.get(upload_id)
+    if upload is None:
+        return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+    return jsonify({'success': True, 'upload_id': upload_id, 'received': upload['received'],
+                    'size': upload['size'], 'complete': upload['received'] == upload['size']})
+
+def parse_upload_chunk(length, content_range, offset=None):
+    """检查分块请求头，返回 (偏移量, 错误)
+
+    错误为 (HTTP 状态码, 提示信息)；偏移量为 None 时从已收到的位置继续。
+    WSGI 视图和 ASGI 模式下的异步处理函数（asgi.py）共用。
+    """
+    if not length:
+        return None, (400, '分块不能为空')
+    if length > app.config['UPLOAD_CHUNK_SIZE']:
+        return None, (413, f'分块不能超过 {app.config["UPLOAD_CHUNK_SIZE"]} 字节')
+    if content_range:
+        # bytes 起始-结束/总大小
+        try:
+            offset = int(content_range.split()[1].split('-')[0])
+        except (IndexError, ValueError):
+            return None, (400, 'Content-Range 格式错误')
+    return offset, None
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """上传一个分块，请求体直接写入磁盘"""
+    length = request.content_length
+    offset, error = parse_upload_chunk(length, request.headers.get('Content-Range'),
+                                       request.args.get('offset', type=int))
+    if error:
+        return jsonify({'success': False, 'message': error[1]}), error[0]
+    try:
+        if offset is None:
+            upload = upload_sessions.get(upload_id)
+            offset = upload['received'] if upload else 0
+        received = upload_sessions.write_chunk(upload_id, offset, request.stream, length)
+    except KeyError:
+        return jsonify({'success': False, 'message': '上传会话不存在或已过期'}), 404
+    except OffsetMismatch as e:
+        return jsonify({'success': False, 'message': str(e), 'received': e.received}), 409
+    except UploadError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'received': received})
+
+@app.route('/uploads/finalize', methods=['POST'])
+def finalize_uploads():
+    """完成上传：为每个完整的文件创建菜品（一次写入 dishes.json）并交给后台处理图片
+
+    请求体：{"upload_ids": [...]}，返回每个上传对应的菜品或错误信息。
+    """
+    upload_ids = (request.get_json(silent=True) or {}).get('upload_ids') or []
+    results = []
+    new_dishes = []
+    for upload_id in upload_ids:
+        try:
+            data_path, upload = upload_sessions.complete(str(upload_id))
+        except KeyError:
+            results.append({'upload_id': upload_id, 'success': False, 'message': '上传会话不存在或已过期'})
+            continue
+        except UploadError as e:
+            results.append({'upload_id': upload_id, 'success': False, 'message': str(e)})
+            continue
+        dish_id = new_dish_id()
+        file_ext = upload['filename'].rsplit('.', 1)[1].lower()
+        raw_path = os.path.join(IMAGE_UPLOAD_DIR, f'{dish_id}.{file_ext}')
+        try:
+            os.replace(data_path, raw_path)
+        except FileNotFoundError:
+            # 同一个上传已被另一个请求完成
+            results.append({'upload_id': upload_id, 'success': False, 'message': '上传已完成'})
+            continue
+        upload_sessions.discard(upload_id)
+        info = upload['info']
+        dish = register_dish_upload(dish_id, info['dish_name'], info['dish_price'], raw_path, file_digest(raw_path))
+        new_dishes.append(dish)
+        results.append({'upload_id': upload_id, 'success': True, 'dish_id': dish_id, 'status': dish['status']})
+    if new_dishes:
+        with locked_dishes():
+            dishes = load_dishes()
+            dishes.extend(new_dishes)
+            save_dishes(dishes)
+        for dish in new_dishes:
+            if dish['status'] == 'processing':
+                start_dish_image_processing(dish)
+    added = len(new_dishes)
+    return jsonify({'success': added == len(upload_ids), 'message': f'成功添加 {added} 道菜品',
+                    'results': results})
+
 @app.route('/delete_dish', methods=['POST'])
 def delete_dish():
     """删除菜品"""
     dish_index = request.form.get('dish_index', type=int)
     
-    dishes = load_dishes()
-    if 0 <= dish_index < len(dishes):
-        deleted_dish = dishes.pop(dish_index)
-        save_dishes(dishes)
+    with locked_dishes():
+        dishes = load_dishes()
+        deleted_dish = dishes.pop(dish_index) if dish_index is not None and 0 <= dish_index < len(dishes) else None
+        if deleted_dish is not None:
+            save_dishes(dishes)
+            # 处理中的图片由 finish_dish_image_processing 在完成后回收
+            if deleted_dish.get('status') != 'processing':
+                release_dish_image(dishes, deleted_dish['image_path'].split('/')[-1])
+    if deleted_dish is not None:
         flash(f'菜品 "{deleted_dish["name"]}" 已删除', 'success')
     else:
         flash('删除失败：菜品不存在', 'error')
     
     return redirect(url_for('chef'))
 
+@app.route('/dish_status')
+def dish_status():
+    """查询菜品图片处理进度（ids 为逗号分隔的菜品 ID，省略时返回全部菜品）"""
+    ids = request.args.get('ids')
+    wanted = set(ids.split(',')) if ids else None
+    dishes = [{
+        'id': dish.get('id'),
+        'name': dish['name'],
+        'status': dish.get('status', 'ready'),
+        'image_path': dish['image_path'],
+        'error': dish.get('error')
+    } for dish in load_dishes() if wanted is None or dish.get('id') in wanted]
+    progress = {'processing': 0, 'ready': 0, 'failed': 0}
+    for dish in dishes:
+        progress[dish['status']] += 1
+    return jsonify({'success': True, 'dishes': dishes, 'progress': progress})
+
 @app.route('/place_order', methods=['POST'])
 def place_order():
     """客户下单"""
@@ -1863,6 +2616,10 @@ def place_order():
     
     try:
         save_order(order)
+        # 用户数据提交失败时撤销订单文件；提交成功后立即落盘（不等延迟写入）并通知厨师端
+        get_user_data_session().on_rollback(lambda: delete_order(order_id))
+        get_user_data_session().on_commit(user_store.flush)
+        get_user_data_session().on_commit(lambda: event_broker.publish('order_created', order))
         response_data = {
             'success': True, 
             'message': f'订单提交成功！', 
@@ -1870,7 +2627,7 @@ def place_order():
             'original_cost': original_cost,
             'final_cost': final_cost,
             'total_cost': final_cost,  # 兼容前端
-            'new_balance': user_data['balance'] - final_cost
+            'new_balance': user_data['balance']
         }
         
         if discount_applied > 0:
@@ -1879,15 +2636,8 @@ def place_order():
         
         return jsonify(response_data)
     except Exception as e:
-        # 如果订单保存失败，退还宝宝币和优惠券
-        add_transaction(final_cost, f'订单失败退款-{order_id}', 'income')
-        if used_coupon:
-            for c in user_data['coupons']:
-                if c['id'] == coupon_id:
-                    c['used'] = False
-                    c.pop('used_date', None)
-                    break
-            save_user_data(user_data)
+        # 如果订单保存失败，撤销本次请求中的扣款和优惠券使用
+        get_user_data_session().rollback()
         return jsonify({'success': False, 'message': f'订单提交失败: {str(e)}'})
 
 @app.route('/complete_order', methods=['POST'])
@@ -1896,12 +2646,28 @@ def complete_order():
     order_id = request.form.get('order_id')
     
     if delete_order(order_id):
+        event_broker.publish('order_completed', {'id': order_id})
         flash(f'订单 {order_id} 已完成并删除', 'success')
     else:
         flash('删除订单失败', 'error')
     
     return redirect(url_for('chef'))
 
+def data_versions():
+    """订单索引和用户数据 core 部分（余额）的版本号，SSE 连接据此发现其他 worker 的修改"""
+    return [order_store.version, user_store.part_version(CORE_PART)]
+
+@app.route('/events')
+def events():
+    """服务端推送事件流（order_created / order_completed / balance_changed，
+    以及其他 worker 进程修改了订单或余额时的 sync）"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    response = Response(event_broker.stream(last_event_id, watch=data_versions),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 关闭 nginx 缓冲
+    return response
+
 @app.route('/generate_customer_link', methods=['POST'])
 def generate_customer_link():
     """生成客户端链接"""
@@ -1917,9 +2683,26 @@ def generate_customer_link():
 
 @app.route('/get_orders')
 def get_orders():
-    """获取所有订单（用于实时更新）"""
-    orders = load_orders()
-    return jsonify(orders)
+    """获取订单（用于实时更新）
+
+    支持 If-None-Match：订单没有变化时返回 304。
+    带 since=<version> 参数时只返回该版本之后新增、修改或删除的订单。
+    完整列表和各个 since 的增量结果是不同的表示，ETag 中带上 since，不会用一个表示的 ETag 换到另一个表示的 304。
+    """
+    since = request.args.get('since', type=int)
+    etag = f'orders-{order_store.version}' if since is None else f'orders-{order_store.version}-since-{since}'
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    if since is None:
+        response = jsonify(load_orders())
+    else:
+        response = jsonify(order_store.changes_since(since))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 # 碎片合成配置
 FRAGMENT_RECIPES = {
@@ -2141,9 +2924,6 @@ def perform_draw(draw_type, num_draws=1):
 
 def add_item_to_inventory(user_data, item):
     """添加物品到背包"""
-    if not 'inventory' in user_data:
-        user_data['inventory'] = []
-    
     # 检查是否已存在相同物品
     existing_item = None
     for inv_item in user_data['inventory']:
@@ -2182,9 +2962,10 @@ def lottery_page():
                          has_switch_fragments=has_switch_fragments)
 
 @app.route('/lottery_draw', methods=['POST'])
+@batch_action
 def lottery_draw():
     """处理抽奖请求"""
-    data = request.get_json()
+    data = action_params()
     draw_type = data.get('type')  # normal, premium, ultimate
     is_ten_draw = data.get('ten_draw', False)
     
@@ -2222,7 +3003,7 @@ def lottery_draw():
         'timestamp': int(datetime.now().timestamp()),
         'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
-    user_data['transactions'].insert(0, transaction)
+    record_transaction(transaction)
     
     # 执行抽奖
     num_draws = 10 if is_ten_draw else 1
@@ -2248,11 +3029,9 @@ def lottery_draw():
                     'timestamp': int(datetime.now().timestamp()),
                     'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 }
-                user_data['transactions'].insert(0, reward_transaction)
+                record_transaction(reward_transaction)
         
         elif result['type'] == 'make_up_card':
-            if 'make_up_cards' not in user_data:
-                user_data['make_up_cards'] = 0
             user_data['make_up_cards'] += result['value']
             add_item_to_inventory(user_data, {
                 'type': 'consumable',
@@ -2377,9 +3156,10 @@ def delete_inventory_item():
         return jsonify({'success': False, 'message': '删除失败，请重试'})
 
 @app.route('/compose_fragments', methods=['POST'])
+@batch_action
 def compose_fragments():
     """合成碎片"""
-    data = request.get_json()
+    data = action_params()
     fragment_type = data.get('fragment_type')
     
     if fragment_type not in FRAGMENT_RECIPES:
@@ -2534,6 +3314,8 @@ def use_item():
         
         # 保存订单
         save_order(order)
+        get_user_data_session().on_rollback(lambda: delete_order(order['id']))
+        get_user_data_session().on_commit(lambda: event_broker.publish('order_created', order))
         
         # 保存用户数据
         save_user_data(user_data)
@@ -2600,6 +3382,19 @@ def generate_treasure_map_rewards():
     
     return rewards, special_types
 
+def new_treasure_hunt():
+    """新的寻宝日记游戏数据"""
+    map_rewards, special_types = generate_treasure_map_rewards()
+    return {
+        'current_position': 0,  # 当前位置（0-49）
+        'map_rewards': map_rewards,  # 地图奖励
+        'special_types': special_types,  # 特殊格子类型
+        'completed_rounds': 0,  # 完成的圈数
+        'total_earned': 0,  # 总收入
+        'last_reset_date': datetime.now().strftime('%Y-%m-%d'),
+        'completion_rewards_claimed': []  # 已领取的完圈奖励
+    }
+
 def calculate_completion_reward():
     """计算完圈奖励"""
     rand = random.random() * 100
@@ -2659,20 +3454,6 @@ def treasure_hunt():
     """寻宝日记游戏页面"""
     user_data = load_user_data()
     
-    # 初始化寻宝日记游戏数据
-    if 'treasure_hunt' not in user_data:
-        map_rewards, special_types = generate_treasure_map_rewards()
-        user_data['treasure_hunt'] = {
-            'current_position': 0,  # 当前位置（0-49）
-            'map_rewards': map_rewards,  # 地图奖励
-            'special_types': special_types,  # 特殊格子类型
-            'completed_rounds': 0,  # 完成的圈数
-            'total_earned': 0,  # 总收入
-            'last_reset_date': datetime.now().strftime('%Y-%m-%d'),
-            'completion_rewards_claimed': []  # 已领取的完圈奖励
-        }
-        save_user_data(user_data)
-    
     # 检查是否需要重置地图奖励（每天重置一次）
     today = datetime.now().strftime('%Y-%m-%d')
     if user_data['treasure_hunt']['last_reset_date'] != today:
@@ -2689,6 +3470,7 @@ def treasure_hunt():
                          special_types=user_data['treasure_hunt'].get('special_types', ['normal'] * 50))
 
 @app.route('/buy_treasure_dice', methods=['POST'])
+@batch_action
 def buy_treasure_dice():
     """购买寻宝日记游戏骰子"""
     user_data = load_user_data()
@@ -2707,17 +3489,6 @@ def buy_treasure_dice():
     
     # 更新用户数据
     user_data = load_user_data()
-    if 'treasure_hunt' not in user_data:
-        map_rewards, special_types = generate_treasure_map_rewards()
-        user_data['treasure_hunt'] = {
-            'current_position': 0,
-            'map_rewards': map_rewards,
-            'special_types': special_types,
-            'completed_rounds': 0,
-            'total_earned': 0,
-            'last_reset_date': datetime.now().strftime('%Y-%m-%d'),
-            'completion_rewards_claimed': []
-        }
     
     # 计算新位置
     old_position = user_data['treasure_hunt']['current_position']
@@ -2756,7 +3527,7 @@ def buy_treasure_dice():
             'timestamp': int(datetime.now().timestamp()),
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        user_data['transactions'].insert(0, transaction)
+        record_transaction(transaction)
     
     # 如果完成一圈，重新生成地图奖励
     if completed_round:
@@ -2780,13 +3551,11 @@ def buy_treasure_dice():
     })
 
 @app.route('/claim_completion_reward', methods=['POST'])
+@batch_action
 def claim_completion_reward():
     """领取完圈奖励"""
     user_data = load_user_data()
     
-    if 'treasure_hunt' not in user_data:
-        return jsonify({'success': False, 'message': '游戏数据不存在'})
-    
     # 检查是否有可领取的完圈奖励
     completed_rounds = user_data['treasure_hunt']['completed_rounds']
     claimed_rewards = len(user_data['treasure_hunt']['completion_rewards_claimed'])
@@ -2809,7 +3578,7 @@ def claim_completion_reward():
             'timestamp': int(datetime.now().timestamp()),
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        user_data['transactions'].insert(0, transaction)
+        record_transaction(transaction)
         
     elif reward['type'] == 'coupon':
         expires = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
@@ -2856,14 +3625,67 @@ def claim_completion_reward():
         'remaining_rewards': completed_rounds - len(user_data['treasure_hunt']['completion_rewards_claimed'])
     })
 
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """在一个请求中按顺序执行多个游戏和农场操作
+
+    请求体 {"actions": [{"action": "water_crop", "params": {"crop_id": ...}}, ...], "stop_on_error": false}，
+    action 为 BATCH_ACTIONS 中登记的操作名，返回每个操作各自的结果。
+    所有操作共用同一份用户数据，全部执行完后只提交一次（冲突时整批重新执行）；
+    某个操作抛出异常时整批撤销。stop_on_error 为 true 时遇到第一个失败的操作即停止。
+    """
+    data = request.get_json(silent=True) or {}
+    actions = data.get('actions')
+    if not isinstance(actions, list) or not actions:
+        return jsonify({'success': False, 'message': '缺少要执行的操作'}), 400
+    if len(actions) > app.config['BATCH_MAX_ACTIONS']:
+        return jsonify({'success': False, 'message': f'一次最多执行 {app.config["BATCH_MAX_ACTIONS"]} 个操作'}), 400
+    for i, item in enumerate(actions):
+        if not isinstance(item, dict) or item.get('action') not in BATCH_ACTIONS:
+            return jsonify({'success': False, 'message': f'第 {i + 1} 个操作无效'}), 400
+        if not isinstance(item.get('params', {}), dict):
+            return jsonify({'success': False, 'message': f'第 {i + 1} 个操作的参数无效'}), 400
+    
+    results = []
+    try:
+        for item in actions:
+            g.batch_params = item.get('params') or {}
+            result = app.make_response(BATCH_ACTIONS[item['action']]()).get_json()
+            results.append(result)
+            if data.get('stop_on_error') and not result.get('success'):
+                break
+    except Exception as e:
+        get_user_data_session().rollback()
+        return jsonify({
+            'success': False,
+            'message': f'第 {len(results) + 1} 个操作（{actions[len(results)]["action"]}）出错，全部操作已撤销: {str(e)}'
+        }), 500
+    finally:
+        g.pop('batch_params', None)
+    
+    return jsonify({
+        'success': True,
+        'results': results,
+        'new_balance': load_user_data()['balance']
+    })
+
 @app.route('/chef/seeds', methods=['GET'])
 def get_seeds():
-    """获取种子数据"""
+    """获取种子数据（按种子商店中的顺序分页）"""
     try:
-        seeds_data = load_seeds_data()
+        cursor, limit = page_args()
+        offset = max(int(cursor or 0), 0)
+    except ValueError as e:
+        return bad_page_request(e)
+    
+    try:
+        seeds = load_seeds_data()['seeds']
+        seed_ids = list(seeds)[offset:offset + limit]
         return jsonify({
             'success': True,
-            'seeds': seeds_data['seeds']
+            'seeds': {seed_id: seeds[seed_id] for seed_id in seed_ids},
+            'total': len(seeds),
+            'next_cursor': str(offset + limit) if offset + limit < len(seeds) else None
         })
     except Exception as e:
         return jsonify({
@@ -3052,6 +3874,291 @@ def chef_clear_all_coupons():
             'message': f'清空优惠券失败: {str(e)}'
         })
 
+@app.route('/health')
+def health():
+    """存活检查：进程能处理请求即返回 200，不读取任何数据"""
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+@app.route('/ready')
+def ready():
+    """就绪检查：用户数据、订单索引和菜品文件都可以读写时返回 200，否则返回 503"""
+    checks = {}
+    for name, check in (('user_data', lambda: user_store.load_part(CORE_PART)),
+                        ('orders', order_store.index),
+                        ('dishes', read_dishes)):
+        try:
+            check()
+            checks[name] = 'ok'
+        except Exception as e:
+            checks[name] = f'{type(e).__name__}: {e}'
+    for name, path in (('user_data_dir', USER_DATA_DIR), ('orders_dir', ORDERS_DIR),
+                       ('dishes_dir', os.path.dirname(DISHES_FILE))):
+        checks[name] = 'ok' if os.access(path, os.W_OK) else '目录不可写'
+    ok = all(result == 'ok' for result in checks.values())
+    return jsonify({'status': 'ready' if ok else 'unavailable', 'checks': checks}), 200 if ok else 503
+
+def warm_caches():
+    """预先编译全部模板、加载菜单和种子片段、静态资源清单和订单索引
+
+    gunicorn 预加载（preload_app）时在主进程 fork 之前执行，各 worker 写时复制共享这部分内存，
+    第一个请求不必再编译模板和读取数据文件。
+    """
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    with app.test_request_context('/'):
+        customer_menu()
+        fragment_cache.get('farm_seeds', ('seeds',), farm_seeds)
+    asset_manifest.get('css/style.css')
+    order_store.index()
+    mimetypes.init()
+
+# 后台任务（继续处理未完成的菜品图片、定期检查图片）由多个 worker 进程中的一个执行
+BACKGROUND_LOCK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'background.lock')
+_background = {'pid': None, 'lock': None}
+
+def start_background_jobs():
+    """在当前进程中启动后台任务（每个进程只尝试一次）
+
+    拿到 background.lock 的进程执行并一直持有锁，其他进程跳过；
+    执行后台任务的 worker 退出（例如被 max_requests 回收）后，由新启动的 worker 接替。
+    """
+    if _background['pid'] == os.getpid():
+        return
+    _background['pid'] = os.getpid()
+    lock = open(BACKGROUND_LOCK_FILE, 'a')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return
+    _background['lock'] = lock
+    resume_dish_image_processing()
+    if app.config['IMAGE_GC_INTERVAL'] > 0:
+        start_image_gc_job(app.config['IMAGE_GC_INTERVAL'])
+
+@app.before_request
+def ensure_background_jobs():
+    """没有通过 create_app 或 gunicorn.conf.py 启动时（例如 gunicorn app:app），在第一个请求时启动后台任务"""
+    start_background_jobs()
+
+def create_app(background_jobs=True):
+    """应用工厂：预热缓存并启动后台任务，返回 app
+
+    数据迁移和静态资源构建在导入模块时完成。gunicorn.conf.py 以 background_jobs=False
+    在主进程中预加载，后台任务由 post_fork 钩子在 worker 中启动（线程不能跨 fork 继承）。
+    """
+    warm_caches()
+    if background_jobs:
+        start_background_jobs()
+    return app
+
+run_migrations()
+if is_stale(app.static_folder, ASSETS_DIST_DIR):
+    build_assets(app.static_folder, ASSETS_DIST_DIR)
+
+@app.cli.group('userdata')
+def userdata_cli():
+    """用户数据存储后端的导入/导出工具"""
+
+def json_store_for(json_file):
+    """默认的 user_data.json 对应当前使用的拆分存储（user_data/ 目录和账本），其他文件按交易记录内嵌的单文件格式读写"""
+    if os.path.abspath(json_file) == USER_DATA_FILE:
+        return JsonPartsUserStore(USER_DATA_DIR, LEDGER_DIR, USER_DATA_FILE)
+    return JsonUserStore(json_file)
+
+@userdata_cli.command('import')
+@click.argument('json_file', default=USER_DATA_FILE)
+@click.option('--db', default=USER_DATA_DB, help='SQLite 数据库路径')
+def userdata_import(json_file, db):
+    """将 JSON 格式的用户数据导入 SQLite 数据库"""
+    count = copy_user_data(json_store_for(json_file), SqliteUserStore(db))
+    click.echo(f'已将 {json_file} 导入 {db}（{count} 条交易记录）')
+
+@userdata_cli.command('export')
+@click.argument('json_file', default=USER_DATA_FILE)
+@click.option('--db', default=USER_DATA_DB, help='SQLite 数据库路径')
+def userdata_export(json_file, db):
+    """将 SQLite 数据库中的用户数据导出为 JSON 格式"""
+    count = copy_user_data(SqliteUserStore(db), json_store_for(json_file))
+    click.echo(f'已将 {db} 导出到 {json_file}（{count} 条交易记录）')
+
+@app.cli.group('images')
+def images_cli():
+    """菜品图片维护工具"""
+
+@images_cli.command('backfill')
+@click.option('--force', is_flag=True, help='重新生成已有的缩略图和占位图')
+def images_backfill(force):
+    """为 web/static 中已有的菜品图片生成各尺寸的 JPEG / WebP 缩略图、占位图和主色调"""
+    futures = {}
+    for dish in load_dishes():
+        if dish.get('status', 'ready') != 'ready':
+            continue
+        image_path = os.path.join(app.config['UPLOAD_FOLDER'], dish['image_path'].split('/')[-1])
+        if not os.path.exists(image_path):
+            continue
+        if force or not dish.get('variants'):
+            futures[dish['id']] = image_pool.submit(make_variants, image_path, IMAGE_VARIANTS_DIR)
+        elif not dish.get('placeholder'):
+            # 已有缩略图，只补占位图
+            futures[dish['id']] = image_pool.submit(image_placeholder, image_path)
+    results = {}
+    for dish_id, future in futures.items():
+        try:
+            results[dish_id] = future.result()
+        except Exception as e:
+            click.echo(f'菜品 {dish_id} 生成缩略图失败: {e}')
+    # 全部生成后一次性写回 dishes.json
+    with locked_dishes():
+        dishes = read_dishes()
+        for dish in dishes:
+            if dish.get('id') in results:
+                apply_image_result(dish, results[dish['id']])
+        save_dishes(dishes)
+    click.echo(f'已为 {len(results)} 道菜品生成缩略图和占位图')
+
+@images_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='只检查，不删除文件也不重新生成缩略图')
+@click.option('--grace', default=None, type=int, help='不删除最近多少秒内修改过的文件（默认 IMAGE_GC_GRACE）')
+def images_gc(dry_run, grace):
+    """删除未被引用的菜品图片，报告图片丢失的菜品，并补齐缺失的缩略图和占位图"""
+    try:
+        report = scan_dish_images(grace=grace, dry_run=dry_run)
+    except (OSError, ValueError, UnsafeCollection) as e:
+        raise click.ClickException(f'无法确定仍在使用的图片，已中止: {e}')
+    removed_action, rebuilt_action = ('将删除', '需要重新生成') if dry_run else ('已删除', '已重新生成')
+    for name in report['removed']:
+        click.echo(f'{removed_action} {name}')
+    for dish in report['missing']:
+        click.echo(f'菜品 "{dish["name"]}"（{dish.get("id")}）的图片 {dish["image_path"]} 不存在', err=True)
+    for dish_id, error in report['failed'].items():
+        click.echo(f'菜品 {dish_id} 生成缩略图失败: {error}', err=True)
+    click.echo(f'{removed_action} {len(report["removed"])} 个文件，{len(report["missing"])} 道菜品图片丢失，'
+               f'{rebuilt_action} {len(report["rebuilt"])} 道菜品的缩略图')
+
+@app.cli.group('assets')
+def assets_cli():
+    """静态资源打包工具"""
+
+@assets_cli.command('build')
+def assets_build():
+    """把 static/css、static/js 打包为带内容哈希的文件并生成 .gz / .br 预压缩文件"""
+    manifest = build_assets(app.static_folder, ASSETS_DIST_DIR)
+    for source, filename in manifest.items():
+        click.echo(f'{source} -> dist/{filename}')
+
+@app.cli.group('dishes')
+def dishes_cli():
+    """菜品批量维护工具"""
+
+def read_dish_rows(source, images_dir, default_price):
+    """读取待导入的菜品，返回 [(行号, 名称, 价格文本, 图片路径)]
+
+    source 为 CSV 文件（列：name, price, image，image 相对于 images_dir）时逐行读取；
+    为目录时目录中每张图片是一道菜，文件名（去扩展名）作为菜品名称，价格为默认价格。
+    """
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if allowed_file(name))
+        return [(i + 1, name.rsplit('.', 1)[0], str(default_price), os.path.join(source, name))
+                for i, name in enumerate(names)]
+    images_dir = images_dir or os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+        # 第 1 行是表头，数据从第 2 行开始
+        return [(i + 2, (row.get('name') or '').strip(), (row.get('price') or '').strip() or str(default_price),
+                 os.path.join(images_dir, (row.get('image') or '').strip()))
+                for i, row in enumerate(csv.DictReader(f))]
+
+@dishes_cli.command('import')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--images', 'images_dir', type=click.Path(exists=True, file_okay=False), help='CSV 中图片路径的根目录（默认为 CSV 所在目录）')
+@click.option('--default-price', default=52, show_default=True, help='未填写价格时使用的价格')
+@click.option('--workers', default=os.cpu_count(), show_default=True, help='图片处理进程数')
+def dishes_import(source, images_dir, default_price, workers):
+    """从 CSV 文件或图片目录批量导入菜品
+
+    图片在进程池中并行转换，全部完成后一次性写入 dishes.json；名称为空、价格无效、
+    图片缺失或格式不支持、与已有菜品重名的行会被跳过并列出原因。
+    """
+    started = time.time()
+    existing_names = {dish['name'] for dish in load_dishes()}
+    errors = []
+    rows = []
+    for line, name, price, image_path in read_dish_rows(source, images_dir, default_price):
+        if not name:
+            errors.append(f'第 {line} 行：菜品名称不能为空')
+            continue
+        if name in existing_names:
+            errors.append(f'第 {line} 行：菜品 "{name}" 已存在')
+            continue
+        try:
+            price = int(price)
+            if price < 0:
+                raise ValueError(price)
+        except ValueError:
+            errors.append(f'第 {line} 行：菜品 "{name}" 的价格 "{price}" 无效')
+            continue
+        if not allowed_file(image_path):
+            errors.append(f'第 {line} 行：菜品 "{name}" 的图片格式不支持')
+            continue
+        if not os.path.isfile(image_path):
+            errors.append(f'第 {line} 行：菜品 "{name}" 的图片 {image_path} 不存在')
+            continue
+        existing_names.add(name)
+        rows.append((line, name, price, image_path))
+
+    # 按内容哈希去重：相同的图片只转换一次，已处理过的图片直接复用
+    pool = ImageWorkerPool(max_workers=workers, max_pending=max(1, workers) * 4)
+    futures = {}
+    filenames = []
+    input_bytes = 0
+    for line, name, price, image_path in rows:
+        filename = f'{file_digest(image_path)}.jpg'
+        filenames.append(filename)
+        dest_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if filename not in futures and not os.path.exists(dest_path):
+            input_bytes += os.path.getsize(image_path)
+            futures[filename] = pool.submit(convert_image, image_path, dest_path, IMAGE_VARIANTS_DIR)
+    converted = {}
+    for filename, future in futures.items():
+        try:
+            converted[filename] = future.result()
+        except Exception as e:
+            converted[filename] = e
+    pool.shutdown()
+
+    new_dishes = []
+    for (line, name, price, image_path), filename in zip(rows, filenames):
+        result = converted.get(filename)
+        if isinstance(result, Exception):
+            errors.append(f'第 {line} 行：菜品 "{name}" 的图片处理失败: {result}')
+            continue
+        if result is None:
+            # 图片之前已经处理过
+            result = converted[filename] = stored_image_result(filename)
+        dish = {
+            'id': new_dish_id(),
+            'name': name,
+            'price': price,
+            'image_path': f'images/{filename}',
+            'status': 'ready'
+        }
+        apply_image_result(dish, result)
+        new_dishes.append(dish)
+    if new_dishes:
+        with locked_dishes():
+            dishes = load_dishes()
+            dishes.extend(new_dishes)
+            save_dishes(dishes)
+
+    for message in errors:
+        click.echo(message, err=True)
+    elapsed = time.time() - started
+    output_bytes = sum(result.get('bytes', 0) for result in converted.values() if not isinstance(result, Exception))
+    click.echo(f'已导入 {len(new_dishes)} 道菜品，跳过 {len(errors)} 行，用时 {elapsed:.1f} 秒'
+               f'（{len(new_dishes) / max(elapsed, 1e-6):.1f} 道/秒）')
+    click.echo(f'转换 {len(futures)} 张图片：{input_bytes / 1048576:.1f} MB → {output_bytes / 1048576:.1f} MB，'
+               f'{len(futures) / max(elapsed, 1e-6):.1f} 张/秒（{workers} 个进程）')
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
+    create_app().run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
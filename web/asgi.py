@@ -0,0 +1,306 @@
+"""ASGI 入口（可选）
+
+    pip install uvicorn
+    cd web
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+请求分两类处理：
+- routes 中登记的异步处理函数直接在事件循环上执行，等待网络和磁盘时不占用线程：
+  GET /events（SSE，每个连接只是一个协程）和 PUT /uploads/<id>（分块上传，边接收边写盘）；
+- 其余请求交给 Flask 应用，在线程池中执行（线程数 ASGI_THREADS，默认 32），
+  因此一个慢请求只占用一个线程，而不是整个 worker。
+
+异步处理函数通过 aio 模块访问文件和存储，阻塞调用都放到线程池执行。
+"""
+import io
+import os
+import sys
+import json
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+from urllib.parse import parse_qsl
+
+from app import app, create_app, data_versions, event_broker, upload_sessions, user_store, parse_upload_chunk
+from aio import AsyncStore, stream_events
+from uploads import OffsetMismatch, UploadError
+
+app.config['ASGI_THREADS'] = int(os.environ.get('ASGI_THREADS', 32))
+
+# 请求体超过此大小时转存到临时文件
+SPOOL_SIZE = 1024 * 1024
+# 不超过此大小的响应在线程中一次读完，超过的（以及没有 Content-Length 的流式响应）逐块发送
+BUFFER_SIZE = 1024 * 1024
+# 异步上传时每攒够这么多字节写一次盘
+UPLOAD_WRITE_SIZE = 256 * 1024
+
+uploads = AsyncStore(upload_sessions)
+
+
+class AsyncRequest:
+    """异步处理函数收到的请求"""
+
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self._receive = receive
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = Headers([(name.decode('latin-1'), value.decode('latin-1'))
+                                for name, value in scope['headers']])
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+
+    @property
+    def content_length(self):
+        return self.headers.get('Content-Length', type=int)
+
+    async def iter_body(self):
+        """逐块读取请求体，客户端断开时结束"""
+        while True:
+            message = await self._receive()
+            if message['type'] == 'http.disconnect':
+                return
+            if message.get('body'):
+                yield message['body']
+            if not message.get('more_body'):
+                return
+
+
+class AsyncResponse:
+    """异步处理函数返回的响应，body 为 bytes / str 或异步生成器（流式响应）"""
+
+    def __init__(self, body=b'', status=200, headers=None, mimetype='text/plain'):
+        self.body = body
+        self.status = status
+        self.headers = Headers(headers or {})
+        self.headers.setdefault('Content-Type', f'{mimetype}; charset=utf-8')
+
+    async def __call__(self, send, receive):
+        streaming = not isinstance(self.body, (bytes, str))
+        if not streaming:
+            body = self.body.encode('utf-8') if isinstance(self.body, str) else self.body
+            self.headers['Content-Length'] = str(len(body))
+        await send({'type': 'http.response.start', 'status': self.status,
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                for name, value in self.headers.items()]})
+        if not streaming:
+            await send({'type': 'http.response.body', 'body': body})
+            return
+        # 流式响应：客户端断开时取消生成器（SSE 订阅随之注销）
+        stream = asyncio.ensure_future(self._send_stream(send))
+        disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+        await asyncio.wait((stream, disconnect), return_when=asyncio.FIRST_COMPLETED)
+        for task in (stream, disconnect):
+            task.cancel()
+        await asyncio.gather(stream, disconnect, return_exceptions=True)
+
+    async def _send_stream(self, send):
+        async for chunk in self.body:
+            await send({'type': 'http.response.body',
+                        'body': chunk.encode('utf-8') if isinstance(chunk, str) else chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def json_response(data, status=200):
+    return AsyncResponse(json.dumps(data), status, mimetype='application/json')
+
+
+class AsyncRoutes:
+    """异步处理函数的路由表（规则语法与 Flask 相同）"""
+
+    def __init__(self):
+        self.url_map = Map()
+        self.handlers = {}
+
+    def route(self, rule, methods=('GET',)):
+        def decorator(handler):
+            self.url_map.add(Rule(rule, methods=list(methods), endpoint=handler.__name__))
+            self.handlers[handler.__name__] = handler
+            return handler
+        return decorator
+
+    def match(self, method, path):
+        """返回 (处理函数, 路径参数)，没有匹配时返回 (None, None)，交给 Flask 处理"""
+        try:
+            endpoint, values = self.url_map.bind('localhost').match(path, method)
+        except HTTPException:
+            return None, None
+        return self.handlers[endpoint], values
+
+
+routes = AsyncRoutes()
+
+
+@routes.route('/events')
+async def events(request):
+    """服务端推送事件流（与 app.events 相同，但连接只占用一个协程）"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    return AsyncResponse(stream_events(event_broker, last_event_id, watch=data_versions),
+                         mimetype='text/event-stream',
+                         headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@routes.route('/uploads/<upload_id>', methods=('PUT',))
+async def upload_chunk(request, upload_id):
+    """上传一个分块（与 app.upload_chunk 相同，但边接收边写盘，慢速上传期间不占用线程）"""
+    length = request.content_length
+    offset, error = parse_upload_chunk(length, request.headers.get('Content-Range'),
+                                       request.args.get('offset', type=int))
+    if error:
+        return json_response({'success': False, 'message': error[1]}, error[0])
+    upload = await uploads.get(upload_id)
+    if upload is None:
+        return json_response({'success': False, 'message': '上传会话不存在或已过期'}, 404)
+    if offset is None:
+        offset = upload['received']
+    if offset + length > upload['size']:
+        return json_response({'success': False, 'message': '分块超出了文件大小'}, 400)
+
+    received = offset
+    buffer = bytearray()
+    try:
+        # 先检查偏移量，不一致时不必接收请求体
+        await uploads.write_chunk(upload_id, offset, io.BytesIO(), 0)
+        async for chunk in request.iter_body():
+            buffer += chunk[:offset + length - received - len(buffer)]
+            if len(buffer) >= UPLOAD_WRITE_SIZE:
+                received = await uploads.write_chunk(upload_id, received, io.BytesIO(buffer), len(buffer))
+                buffer.clear()
+        if buffer:
+            received = await uploads.write_chunk(upload_id, received, io.BytesIO(buffer), len(buffer))
+    except KeyError:
+        return json_response({'success': False, 'message': '上传会话不存在或已过期'}, 404)
+    except OffsetMismatch as e:
+        return json_response({'success': False, 'message': str(e), 'received': e.received}, 409)
+    except UploadError as e:
+        return json_response({'success': False, 'message': str(e)}, 400)
+    return json_response({'success': True, 'received': received})
+
+
+def wsgi_environ(scope, body):
+    """按 PEP 3333 从 ASGI scope 构造 WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ):
+    """在线程池中执行 WSGI 应用，返回 (状态, 响应头, 已读出的响应体, 剩余的响应迭代器或 None)"""
+    response = {}
+    written = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = status
+        response['headers'] = headers
+        return written.append
+
+    iterable = wsgi_app(environ, start_response)
+    length = next((value for name, value in response['headers'] if name.lower() == 'content-length'), None)
+    if length is not None and int(length) <= BUFFER_SIZE:
+        try:
+            body = b''.join(written) + b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        return response['status'], response['headers'], body, None
+    return response['status'], response['headers'], b''.join(written), iterable
+
+
+class DishSelectorASGI:
+    """ASGI 应用：异步路由优先，其余请求交给线程池中的 Flask"""
+
+    def __init__(self, wsgi_app, routes):
+        self.wsgi_app = wsgi_app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'不支持的连接类型: {scope["type"]}')
+        handler, values = self.routes.match(scope['method'], scope['path'])
+        if handler is not None:
+            response = await handler(AsyncRequest(scope, receive), **values)
+            await response(send, receive)
+        else:
+            await self.call_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                asyncio.get_running_loop().set_default_executor(
+                    ThreadPoolExecutor(max_workers=app.config['ASGI_THREADS'], thread_name_prefix='wsgi'))
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.to_thread(user_store.flush)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def call_wsgi(self, scope, receive, send):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        async for chunk in AsyncRequest(scope, receive).iter_body():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            status, headers, data, iterable = await asyncio.to_thread(
+                run_wsgi, self.wsgi_app, wsgi_environ(scope, body))
+        finally:
+            body.close()
+        await send({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+        if iterable is None:
+            await send({'type': 'http.response.body', 'body': data})
+            return
+        # 大文件和流式响应：在线程中逐块读取
+        try:
+            if data:
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            iterator = iter(iterable)
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(iterable, 'close'):
+                await asyncio.to_thread(iterable.close)
+
+
+application = DishSelectorASGI(create_app(), routes)
@@ -0,0 +1,97 @@
+"""静态资源打包
+
+static/css 和 static/js 下的源文件在构建时复制为带内容哈希的文件名
+（static/dist/<名称>.<哈希>.<扩展名>），同时生成 .gz 和 .br（安装了 brotli 时）预压缩文件，
+源文件路径到打包文件名的映射写入 static/dist/manifest.json。
+打包文件的内容永远不变，可以按 immutable 长期缓存；源文件修改后重新构建即得到新的文件名。
+"""
+import os
+import json
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只生成 .gz
+    brotli = None
+
+SOURCE_DIRS = ('css', 'js')
+HASH_LENGTH = 12
+# 预压缩文件的扩展名，按优先顺序排列
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def source_files(static_dir):
+    """全部源文件（相对 static 目录的路径）"""
+    for directory in SOURCE_DIRS:
+        root = os.path.join(static_dir, directory)
+        if not os.path.isdir(root):
+            continue
+        for name in sorted(os.listdir(root)):
+            if name.endswith('.' + directory):
+                yield f'{directory}/{name}'
+
+
+def build_assets(static_dir, dist_dir):
+    """构建全部打包文件并写入 manifest.json，返回 manifest"""
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    for source in source_files(static_dir):
+        with open(os.path.join(static_dir, source), 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(os.path.basename(source))
+        filename = f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+        path = os.path.join(dist_dir, filename)
+        if not os.path.exists(path):
+            _write(path, data)
+            _write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write(path + '.br', brotli.compress(data, quality=11))
+        manifest[source] = filename
+    _write(os.path.join(dist_dir, 'manifest.json'), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def is_stale(static_dir, dist_dir):
+    """manifest 不存在或有源文件比它新"""
+    try:
+        built = os.path.getmtime(os.path.join(dist_dir, 'manifest.json'))
+    except OSError:
+        return True
+    return any(os.path.getmtime(os.path.join(static_dir, source)) > built for source in source_files(static_dir))
+
+
+def precompressed(path, accept_encodings):
+    """按客户端支持的编码选择预压缩文件，返回 (文件路径, Content-Encoding 或 None)"""
+    for encoding, suffix in ENCODINGS:
+        if encoding in accept_encodings and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+class AssetManifest:
+    """读取 manifest.json，文件变化后自动重新加载"""
+
+    def __init__(self, dist_dir):
+        self.path = os.path.join(dist_dir, 'manifest.json')
+        self._mtime = None
+        self._manifest = {}
+
+    def get(self, source):
+        """源文件对应的打包文件名，没有构建过时返回 None"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._manifest = json.load(f)
+            self._mtime = mtime
+        return self._manifest.get(source)
@@ -0,0 +1,191 @@
+"""并发吞吐量基准测试
+
+    cd web
+    # 对比 gunicorn 同步 worker 和 ASGI 模式（需要 pip install uvicorn）
+    python benchmark.py --servers sync asgi --path /chef/api/orders --concurrency 32 --sse 20
+    # 对比 gunicorn 默认设置和生产环境配置（gunicorn.conf.py）
+    python benchmark.py --servers sync tuned --path /customer
+    # 测试已经在运行的服务
+    python benchmark.py --url http://127.0.0.1:5000 --path /get_orders
+
+每个服务依次启动、预热，然后用 concurrency 个线程（各自一个 keep-alive 连接）在 duration 秒内持续请求 path，
+统计每秒请求数和延迟分位数，以及从启动到能处理请求的时间和服务进程（主进程和所有 worker）的内存占用（PSS，
+共享的内存页按共享进程数平摊，因此能体现预加载的效果；只在 Linux 上统计）。--sse N 在测量期间额外保持 N 个空闲的 /events 连接，
+模拟同时打开的厨师端和客户端页面：同步 worker 会被这些长连接占满，ASGI 模式下它们只占用协程。
+"""
+import os
+import sys
+import time
+import shlex
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit
+
+# 可以对比的服务启动命令，{port} 为空闲端口
+# gunicorn 会自动读取当前目录下的 gunicorn.conf.py，-c /dev/null 表示使用 gunicorn 的默认设置
+SERVERS = {
+    'sync': 'gunicorn -c /dev/null --bind 127.0.0.1:{port} app:app',
+    'threads': 'gunicorn -c /dev/null --bind 127.0.0.1:{port} --workers 2 --threads 8 app:app',
+    'tuned': 'gunicorn -c gunicorn.conf.py --bind 127.0.0.1:{port}',
+    'asgi': 'uvicorn asgi:application --host 127.0.0.1 --port {port} --no-access-log',
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, timeout=30):
+    parts = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def memory_mb(pid):
+    """进程及其所有子进程的 PSS 之和（MB），无法统计时返回 None"""
+    children = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat') as f:
+                        ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                except OSError:
+                    continue
+                children.setdefault(ppid, []).append(int(entry))
+        total = 0
+        pending = [pid]
+        while pending:
+            current = pending.pop()
+            pending.extend(children.get(current, []))
+            with open(f'/proc/{current}/smaps_rollup') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('Pss:'))
+        return total / 1024
+    except (OSError, StopIteration):
+        return None
+
+
+def open_sse(url, count):
+    """打开 count 个 /events 连接并保持（只发送请求，不读取事件）"""
+    parts = urlsplit(url)
+    sockets = []
+    for _ in range(count):
+        s = socket.create_connection((parts.hostname, parts.port))
+        s.sendall(f'GET /events HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: text/event-stream\r\n\r\n'.encode())
+        sockets.append(s)
+    return sockets
+
+
+def run_load(url, path, concurrency, duration, timeout=10):
+    """持续请求 duration 秒，返回 (请求数, 失败数, 延迟列表)"""
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        local = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                    continue
+                local.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], latencies
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def benchmark(name, url, args, pid=None):
+    started = time.perf_counter()
+    if not wait_ready(url):
+        print(f'{name:<10} 服务未就绪', file=sys.stderr)
+        return
+    startup = time.perf_counter() - started
+    run_load(url, args.path, args.concurrency, 1)  # 预热
+    sse = open_sse(url, args.sse) if args.sse else []
+    try:
+        count, errors, latencies = run_load(url, args.path, args.concurrency, args.duration)
+    finally:
+        for s in sse:
+            s.close()
+    memory = memory_mb(pid) if pid else None
+    print(f'{name:<10} {count / args.duration:>10.1f} {percentile(latencies, 0.5) * 1000:>9.1f} '
+          f'{percentile(latencies, 0.99) * 1000:>9.1f} {errors:>7} '
+          f'{startup if pid else float("nan"):>8.1f} {memory if memory is not None else float("nan"):>9.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='并发吞吐量基准测试')
+    parser.add_argument('--url', help='测试已经在运行的服务（不启动 --servers）')
+    parser.add_argument('--servers', nargs='+', default=['sync', 'asgi'],
+                        help=f'依次启动并测试的服务：{", ".join(SERVERS)}，或自定义命令（含 {{port}}）')
+    parser.add_argument('--path', default='/chef/api/orders')
+    parser.add_argument('--concurrency', '-c', type=int, default=32)
+    parser.add_argument('--duration', '-d', type=float, default=10)
+    parser.add_argument('--sse', type=int, default=0, help='测量期间保持的空闲 SSE 连接数')
+    args = parser.parse_args()
+
+    print(f'{args.path}  并发 {args.concurrency}  SSE 连接 {args.sse}  {args.duration:g} 秒')
+    print(f'{"服务":<10} {"请求/秒":>10} {"p50(ms)":>9} {"p99(ms)":>9} {"失败":>7} {"启动(s)":>8} {"内存(MB)":>9}')
+    if args.url:
+        benchmark('url', args.url, args)
+        return
+    for name in args.servers:
+        port = free_port()
+        command = SERVERS.get(name, name).format(port=port)
+        try:
+            # gunicorn.conf.py 按预计的 SSE 连接数配置线程数
+            server = subprocess.Popen(shlex.split(command), cwd=os.path.dirname(os.path.abspath(__file__)),
+                                      env=dict(os.environ, GUNICORN_SSE_CONNECTIONS=str(args.sse)),
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError as e:
+            print(f'{name:<10} 无法启动: {e}', file=sys.stderr)
+            continue
+        try:
+            benchmark(name, f'http://127.0.0.1:{port}', args, server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""响应压缩（WSGI 中间件）
+
+按 Accept-Encoding 选择 brotli（安装了 brotli 时）或 gzip 压缩文本类响应（HTML、JSON、JS、CSS 等）。
+小于 min_size 的响应、图片等已经压缩过的内容、SSE 流、Range 请求和已经带 Content-Encoding 的响应
+（例如预压缩的 .gz / .br 静态文件）原样返回。
+
+压缩级别按响应大小封顶：超过 large_size 的响应使用最快的级别，避免单个请求占用过多 CPU。
+压缩后的 ETag 加上编码后缀，客户端带回的 If-None-Match 会先去掉后缀再交给应用，304 照常工作。
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时只使用 gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml', 'text/javascript',
+}
+# 超过此大小的响应只做最快的压缩
+LARGE_SIZE = 256 * 1024
+# 超过此大小的响应不压缩（通常是文件下载）
+MAX_SIZE = 16 * 1024 * 1024
+
+
+def is_compressible(content_type):
+    mimetype = content_type.split(';', 1)[0].strip().lower()
+    if mimetype == 'text/event-stream':
+        return False
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+
+def choose_encoding(accept_encoding):
+    """客户端支持的最佳编码（brotli / gzip），都不支持时返回 None"""
+    accepted = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0 or (accepted.get('*', 0) > 0 and 'gzip' not in accepted):
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompressionMiddleware:
+    """压缩文本类响应的 WSGI 中间件"""
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=4, large_size=LARGE_SIZE):
+        self.app = app
+        self.min_size = min_size
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+        self.fast_levels = {'gzip': 1, 'br': 1}
+        self.large_size = large_size
+
+    def __call__(self, environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if environ.get('REQUEST_METHOD') == 'HEAD' or 'HTTP_RANGE' in environ:
+            encoding = None
+        suffixed = False
+        if encoding and f'-{encoding}"' in environ.get('HTTP_IF_NONE_MATCH', ''):
+            # 去掉压缩时添加的 ETag 后缀，让应用按原始 ETag 判断是否返回 304
+            environ['HTTP_IF_NONE_MATCH'] = environ['HTTP_IF_NONE_MATCH'].replace(f'-{encoding}"', '"')
+            suffixed = True
+
+        captured = {}
+        written = []
+
+        def capture(status, headers, exc_info=None):
+            # 先记下状态和响应头，看到响应内容类型和长度后再决定是否压缩
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return written.append
+
+        app_iter = self.app(environ, capture)
+        status, headers = captured['status'], captured['headers']
+        header_names = {name.lower(): value for name, value in headers}
+        compressible = (is_compressible(header_names.get('content-type', ''))
+                        and 'content-encoding' not in header_names
+                        and status[:3] not in ('204', '206', '304'))
+        if compressible:
+            headers = _add_vary(headers)
+        elif suffixed and status[:3] == '304':
+            headers = _suffix_etag(headers, encoding)
+        length = header_names.get('content-length')
+        if (not compressible or encoding is None or length is None
+                or not self.min_size <= int(length) <= MAX_SIZE):
+            write = start_response(status, headers, captured['exc_info'])
+            for data in written:
+                write(data)
+            return app_iter
+
+        try:
+            body = b''.join(written) + b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        level = self.fast_levels[encoding] if len(body) > self.large_size else self.levels[encoding]
+        body = compress(body, encoding, level)
+        headers = [(name, value) for name, value in _suffix_etag(headers, encoding)
+                   if name.lower() not in ('content-length', 'accept-ranges')]
+        headers += [('Content-Encoding', encoding), ('Content-Length', str(len(body)))]
+        start_response(status, headers, captured['exc_info'])
+        return [body]
+
+
+def _suffix_etag(headers, encoding):
+    """压缩后的内容与原始内容的 ETag 不能相同：加上编码后缀"""
+    return [(name, f'{value[:-1]}-{encoding}"' if name.lower() == 'etag' and value.endswith('"') else value)
+            for name, value in headers]
+
+
+def _add_vary(headers):
+    """添加 Vary: Accept-Encoding（已有 Vary 时合并）"""
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == 'vary':
+            if 'accept-encoding' not in value.lower():
+                headers = list(headers)
+                headers[i] = (name, f'{value}, Accept-Encoding')
+            return headers
+    return list(headers) + [('Vary', 'Accept-Encoding')]
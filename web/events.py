@@ -0,0 +1,146 @@
+"""服务端推送事件（SSE）
+
+进程内的事件代理：publish 把事件分发给当前进程中所有已连接的页面，
+并在环形缓冲区中保留最近的事件，客户端断线重连时凭 Last-Event-ID 补发错过的事件。
+
+每个 SSE 连接会占用一个线程（或 gevent 协程），因此在 gunicorn 下需要使用
+--threads 或 gevent 类型的 worker；ASGI 模式（asgi.py）下连接只占用一个协程。
+多个 worker 进程之间的事件不会互相转发：stream 可以额外监视一个数据版本（例如订单索引的版本号），
+发现它被其他进程修改时发送 sync 事件，客户端据此重新拉取数据。
+"""
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+
+def format_event(event):
+    """把 (ID, 类型, 数据) 格式化为一条 SSE 消息"""
+    event_id, event_type, data = event
+    payload = json.dumps(data, ensure_ascii=False)
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+
+def format_sync(version):
+    """sync 事件不带 ID，不影响客户端的 Last-Event-ID"""
+    return f'event: sync\ndata: {json.dumps({"version": version})}\n\n'
+
+
+class VersionWatch:
+    """每隔 interval 秒比较一次数据版本，版本变化且不是本进程的事件引起时返回新版本
+
+    只保存版本号，读取版本由调用方完成（异步流中需要放到线程池执行）。
+    """
+
+    def __init__(self, version, interval):
+        self.interval = interval
+        self.version = version
+        self.checked = time.monotonic()
+
+    def due(self):
+        return time.monotonic() - self.checked >= self.interval
+
+    def seen(self, version):
+        """收到本进程的事件后客户端会自己拉取数据，以此时的版本为准"""
+        self.version = version
+        self.checked = time.monotonic()
+
+    def changed(self, version):
+        self.checked = time.monotonic()
+        if version == self.version:
+            return False
+        self.version = version
+        return True
+
+
+class Subscription:
+    """一个已连接客户端的事件队列"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # 客户端消费太慢，断开让它重连后按 Last-Event-ID 补发
+            self.closed = True
+
+    def get(self, timeout):
+        return self.queue.get(timeout=timeout)
+
+
+class EventBroker:
+    """进程内事件代理"""
+
+    def __init__(self, history_size=200, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._last_id = 0
+
+    def publish(self, event_type, data):
+        """发布事件，返回事件 ID"""
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+        return event[0]
+
+    def subscribe(self, last_event_id=None, subscription=None):
+        """订阅事件，给出 last_event_id 时先补发之后的历史事件
+
+        subscription 可以是任何带 put(event) 方法和 closed 属性的对象（例如 aio.AsyncSubscription），
+        默认使用线程队列。
+        """
+        if subscription is None:
+            subscription = Subscription(self.queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event[0] > last_event_id:
+                        subscription.put(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stream(self, last_event_id=None, heartbeat=15, watch=None, watch_interval=5):
+        """生成 SSE 格式的数据流，空闲时定期发送心跳注释
+
+        给出 watch（返回数据版本的函数）时每隔 watch_interval 秒检查一次，版本变化时发送 sync 事件。
+        """
+        subscription = self.subscribe(last_event_id)
+        watcher = VersionWatch(watch(), watch_interval) if watch else None
+        timeout = min(heartbeat, watch_interval) if watch else heartbeat
+        idle = 0
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.closed:
+                try:
+                    event = subscription.get(timeout=timeout)
+                except queue.Empty:
+                    event = None
+                if event is not None:
+                    idle = 0
+                    if watcher:
+                        watcher.seen(watch())
+                    yield format_event(event)
+                elif watcher and watcher.due() and watcher.changed(watch()):
+                    idle = 0
+                    yield format_sync(watcher.version)
+                else:
+                    idle += timeout
+                    if idle >= heartbeat:
+                        idle = 0
+                        yield ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,60 @@
+"""模板片段缓存
+
+页面中很少变化的部分（菜单、订单列表、问卷记录）渲染一次后按片段名缓存，
+缓存项记录它依赖的各个数据源的版本，版本不变时直接返回缓存的字符串，不再加载数据和渲染模板。
+
+数据源版本由两部分组成：
+- register_source 登记的版本函数，通常是数据文件的 (修改时间, 大小, inode) 或索引版本号，
+  其他 worker 写入数据后也能发现变化；
+- 进程内的失效计数，写入数据的函数调用 invalidate(source) 后立即递增，
+  不依赖文件修改时间的精度。
+"""
+import os
+import threading
+
+
+def file_version(path):
+    """数据文件的版本（文件不存在时为 None）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class FragmentCache:
+    """按数据源版本失效的片段缓存"""
+
+    def __init__(self):
+        self._sources = {}      # {数据源: 版本函数}
+        self._generations = {}  # {数据源: 失效计数}
+        self._entries = {}      # {片段名: (依赖的数据源, 版本, 内容)}
+        self._lock = threading.Lock()
+
+    def register_source(self, name, version):
+        self._sources[name] = version
+        self._generations.setdefault(name, 0)
+
+    def _versions(self, sources):
+        return tuple((self._generations[name], self._sources[name]()) for name in sources)
+
+    def get(self, name, sources, render):
+        """返回片段 name 的缓存内容，依赖的数据源有变化时调用 render() 重新生成
+
+        版本在渲染之前读取：渲染期间数据被修改时，下一次请求会发现版本不同并重新渲染。
+        """
+        versions = self._versions(sources)
+        entry = self._entries.get(name)
+        if entry is not None and entry[1] == versions:
+            return entry[2]
+        value = render()
+        with self._lock:
+            self._entries[name] = (tuple(sources), versions, value)
+        return value
+
+    def invalidate(self, source):
+        """数据源已被修改：丢弃依赖它的片段"""
+        with self._lock:
+            self._generations[source] = self._generations.get(source, 0) + 1
+            for name in [name for name, entry in self._entries.items() if source in entry[0]]:
+                del self._entries[name]
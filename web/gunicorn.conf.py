@@ -0,0 +1,60 @@
+"""gunicorn 生产环境配置
+
+    cd web
+    gunicorn -c gunicorn.conf.py
+
+- preload_app：主进程导入应用、执行数据迁移并预热缓存（模板、菜单、种子、静态资源清单、订单索引），
+  worker 由 fork 得到，写时复制共享这部分内存，每个 worker 不必再各自加载；
+- gthread worker：每个 worker 多个线程，SSE 长连接和慢请求只占用一个线程；
+- worker 数默认等于 CPU 核数（线程已经提供了并发，同步 worker 的 2 × 核数 + 1 在这里只会增加进程切换和内存）；
+  每个 /events 连接在整个页面打开期间占用一个线程，因此线程数按预计同时打开的页面数（GUNICORN_SSE_CONNECTIONS，
+  默认 20）平摊到各 worker，再加上处理普通请求的 GUNICORN_REQUEST_THREADS（默认 4）个线程；
+- 多个 worker 时每个 worker 处理 max_requests 个请求后回收重启（带随机抖动，避免同时重启），限制内存增长；
+  只有一个 worker 时回收会断开全部连接，新 worker 启动前也没有进程处理请求，因此默认不回收；
+- 后台任务（菜品图片处理、图片检查）在 worker 中启动，由其中一个 worker 执行（见 app.start_background_jobs）。
+
+所有设置都可以用环境变量或命令行参数覆盖（命令行优先），例如 gunicorn -c gunicorn.conf.py --workers 2。
+"""
+import gc
+import os
+import math
+import multiprocessing
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+wsgi_app = 'app:create_app(background_jobs=False)'
+preload_app = True
+
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+if os.environ.get('USER_DATA_WRITE_BEHIND', '0') == '1':
+    # 延迟写入模式下待写入的数据在进程内存中，只能使用单进程
+    workers = 1
+sse_connections = int(os.environ.get('GUNICORN_SSE_CONNECTIONS', 20))
+request_threads = int(os.environ.get('GUNICORN_REQUEST_THREADS', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', request_threads + math.ceil(sse_connections / workers)))
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000 if workers > 1 else 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+
+def when_ready(server):
+    server.log.info(f'应用已预加载，启动 {server.cfg.workers} 个 worker × {server.cfg.threads} 线程')
+
+
+def pre_fork(server, worker):
+    # 预加载的对象移出垃圾回收的跟踪范围，worker 中的垃圾回收不会触碰（进而复制）这些共享内存页
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import start_background_jobs
+    start_background_jobs()
+
+
+def worker_exit(server, worker):
+    # worker 被回收或关闭时写入尚未写入的用户数据（延迟写入模式）
+    from app import user_store
+    user_store.flush()
@@ -0,0 +1,361 @@
+"""菜品图片处理
+
+上传的原始文件先原样保存到 uploads/ 目录，菜品立即以 processing 状态写入 dishes.json；
+解码、去除透明通道、重新编码为 JPEG 交给进程池在后台完成，
+请求耗时不再取决于图片大小，也不受 GIL 限制。
+
+处理时同时生成几种宽度（VARIANT_WIDTHS）的 JPEG 和 WebP 缩略图，保存在 variants 目录，
+文件名为 <原文件名去扩展名>_w<宽度>.<jpg|webp>，页面通过 srcset 按显示尺寸选择。
+
+图片按内容寻址：文件名是上传内容的 SHA-256 前缀（<hash>.jpg），相同的图片只保存一份，
+由 dishes.json 中引用它的菜品数量决定是否可以删除（见 collect_garbage）。
+
+解码时 JPEG 只按需要的比例解码（draft），长边缩小到 MAX_DIMENSION 以内；按 EXIF 方向旋转后
+丢弃 EXIF 等元数据，再用二分查找选出满足误差和大小要求的最低 JPEG 质量，以渐进式 JPEG 保存。
+
+同时生成几百字节的模糊占位图（data URI）和主色调，页面在原图加载完成前先显示它们。
+"""
+import io
+import base64
+import os
+import re
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps, ImageStat
+
+try:
+    from PIL import ImageCms
+except ImportError:  # Pillow 未编译 littlecms 时不做色彩空间转换
+    ImageCms = None
+
+
+# 缩略图宽度和格式
+VARIANT_WIDTHS = (160, 320, 640)
+VARIANT_FORMATS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+# 内容哈希文件名（以及它的缩略图）；旧版本上传的 dish_<时间戳>_<随机串> 文件名也由垃圾回收管理
+HASH_LENGTH = 20
+HASHED_NAME = re.compile(r'^[0-9a-f]{%d}(_w\d+)?\.[a-z]+$' % HASH_LENGTH)
+LEGACY_NAME = re.compile(r'^dish_\d+_[0-9a-f]+(_\d+)?(_w\d+)?\.[a-z]+$')
+
+# 保存的图片长边上限（像素）
+MAX_DIMENSION = 1600
+# JPEG 质量搜索范围；误差为灰度图逐像素差的均方根（0-255），大小为单张图片的字节上限
+JPEG_MIN_QUALITY = 50
+JPEG_MAX_QUALITY = 90
+JPEG_MAX_ERROR = 2.5
+JPEG_MAX_BYTES = 300 * 1024
+
+# 占位图宽度（像素）
+PLACEHOLDER_WIDTH = 16
+
+
+def save_stream(stream, path, chunk_size=1 << 16):
+    """把上传流写入文件，同时计算内容哈希，返回哈希前缀"""
+    digest = hashlib.sha256()
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def file_digest(path, chunk_size=1 << 16):
+    """文件内容的哈希前缀"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def is_hashed_image(filename):
+    """文件名是否为内容哈希（内容永远不变，可以长期缓存）"""
+    return bool(HASHED_NAME.match(filename))
+
+
+def is_managed_image(filename):
+    """是否为菜品图片（可被垃圾回收的文件）"""
+    return bool(HASHED_NAME.match(filename) or LEGACY_NAME.match(filename))
+
+
+def existing_variants(filename, variants_dir):
+    """已经生成的缩略图，返回 {格式: [宽度, ...]}"""
+    return {fmt: [w for w in VARIANT_WIDTHS
+                  if os.path.exists(os.path.join(variants_dir, variant_filename(filename, w, fmt)))]
+            for fmt in VARIANT_FORMATS}
+
+
+def remove_image(filename, image_dir, variants_dir):
+    """删除图片及其全部缩略图"""
+    paths = [os.path.join(image_dir, filename)]
+    paths += [os.path.join(variants_dir, variant_filename(filename, w, fmt))
+              for w in VARIANT_WIDTHS for fmt in VARIANT_FORMATS]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class UnsafeCollection(Exception):
+    """没有任何被引用的图片而图片目录不为空：很可能是菜品列表读取有误，拒绝删除"""
+
+
+def collect_garbage(referenced, image_dir, variants_dir, min_age=0, dry_run=False):
+    """删除没有被任何菜品引用的图片和缩略图，返回删除的文件名列表
+
+    referenced 是仍被引用的图片文件名集合，只处理符合菜品图片命名规则的文件。
+    修改时间在 min_age 秒以内的文件不删除（可能是尚未写入 dishes.json 的新图片）；
+    dry_run 时只返回将被删除的文件名。referenced 为空而目录中有图片时抛出 UnsafeCollection。
+    """
+    if not referenced and os.path.isdir(image_dir):
+        with os.scandir(image_dir) as entries:
+            if any(is_managed_image(entry.name) for entry in entries):
+                raise UnsafeCollection('没有菜品引用任何图片，但图片目录不为空，已取消删除')
+    referenced_stems = {name.rsplit('.', 1)[0] for name in referenced}
+    deadline = time.time() - min_age
+    removed = []
+    for directory, is_variant in ((image_dir, False), (variants_dir, True)):
+        if not os.path.isdir(directory):
+            continue
+        # 逐项扫描目录，不一次性读出全部文件名
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not is_managed_image(entry.name):
+                    continue
+                if is_variant:
+                    keep = entry.name.rsplit('_w', 1)[0] in referenced_stems
+                else:
+                    keep = entry.name in referenced
+                if keep or (min_age and entry.stat().st_mtime > deadline):
+                    continue
+                if not dry_run:
+                    os.remove(entry.path)
+                removed.append(entry.name)
+    return removed
+
+
+def variant_filename(filename, width, fmt):
+    """缩略图文件名"""
+    stem = filename.rsplit('.', 1)[0]
+    return f'{stem}_w{width}.{VARIANT_FORMATS[fmt]}'
+
+
+def to_rgb(img):
+    """去除透明通道（铺白底）并转换为 RGB"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'RGBA':
+            background.paste(img, mask=img.split()[-1])
+        else:
+            background.paste(img)
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def _replace(path, write):
+    """写入唯一命名的临时文件后原子替换 path；同一内容的图片可能被几个任务同时处理"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save(img, path, fmt, **options):
+    _replace(path, lambda f: img.save(f, fmt, **options))
+
+
+def _write(data, path):
+    _replace(path, lambda f: f.write(data))
+
+
+def to_srgb(img):
+    """带 ICC 配置文件的图片转换到 sRGB（配置文件随元数据一起丢弃）"""
+    icc_profile = img.info.get('icc_profile')
+    if not icc_profile or ImageCms is None or img.mode not in ('RGB', 'RGBA', 'CMYK'):
+        return img
+    try:
+        source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        output_mode = 'RGBA' if img.mode == 'RGBA' else 'RGB'
+        return ImageCms.profileToProfile(img, source, ImageCms.createProfile('sRGB'), outputMode=output_mode)
+    except (ImageCms.PyCMSError, OSError):
+        return img
+
+
+def open_image(path, max_dimension=MAX_DIMENSION):
+    """以尽量低的成本解码图片：长边缩小到 max_dimension 以内，按 EXIF 方向旋转，转换为 sRGB RGB"""
+    img = Image.open(path)
+    # JPEG 直接按 1/2、1/4、1/8 比例解码，其他格式由 thumbnail 先用 reduce 整数倍缩小再重采样
+    img.draft('RGB', (max_dimension, max_dimension))
+    img.thumbnail((max_dimension, max_dimension), Image.LANCZOS, reducing_gap=2.0)
+    img = ImageOps.exif_transpose(img)
+    img = to_rgb(to_srgb(img))
+    # 不保留 EXIF、XMP、ICC 等元数据
+    img.info = {}
+    return img
+
+
+def make_placeholder(img):
+    """生成模糊占位图和主色调，返回 {'placeholder': data URI, 'color': '#rrggbb'}"""
+    small = img.copy()
+    small.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH), Image.BILINEAR)
+    small = small.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    # 同样尺寸下 WebP 只有 JPEG 的几分之一（不支持时显示主色调）
+    small.save(buffer, 'WEBP', quality=40)
+    # 主色调：缩小后量化为几种颜色，取像素最多的一种
+    palette_img = img.resize((64, 64), Image.BILINEAR).quantize(5)
+    count, index = max(palette_img.getcolors())
+    r, g, b = palette_img.getpalette()[index * 3:index * 3 + 3]
+    return {'placeholder': 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii'),
+            'color': f'#{r:02x}{g:02x}{b:02x}'}
+
+
+def image_placeholder(image_path):
+    """为已有图片生成占位图和主色调（用于复用图片和回填）"""
+    return make_placeholder(open_image(image_path, max_dimension=PLACEHOLDER_WIDTH * 8))
+
+
+def _jpeg_bytes(img, quality):
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _jpeg_error(reference, data):
+    decoded = Image.open(io.BytesIO(data)).convert('L')
+    return ImageStat.Stat(ImageChops.difference(reference, decoded)).rms[0]
+
+
+def encode_jpeg(img, max_error=JPEG_MAX_ERROR, max_bytes=JPEG_MAX_BYTES,
+                min_quality=JPEG_MIN_QUALITY, max_quality=JPEG_MAX_QUALITY):
+    """找出误差不超过 max_error 的最低质量，超过 max_bytes 时继续降低质量，返回 (数据, 质量)"""
+    reference = img.convert('L')
+    cache = {}
+
+    def encode(quality):
+        if quality not in cache:
+            cache[quality] = _jpeg_bytes(img, quality)
+        return cache[quality]
+
+    # 误差随质量单调下降：二分查找满足误差要求的最低质量
+    low, high = min_quality, max_quality
+    while low < high:
+        middle = (low + high) // 2
+        if _jpeg_error(reference, encode(middle)) <= max_error:
+            high = middle
+        else:
+            low = middle + 1
+    quality = low
+    if len(encode(quality)) > max_bytes:
+        # 大小随质量单调上升：二分查找不超过大小上限的最高质量
+        low, high = min_quality, quality
+        while low < high:
+            middle = (low + high + 1) // 2
+            if len(encode(middle)) <= max_bytes:
+                low = middle
+            else:
+                high = middle - 1
+        quality = low
+    return encode(quality), quality
+
+
+def save_variants(img, filename, variants_dir):
+    """生成不超过原图宽度的各尺寸缩略图，返回 {格式: [宽度, ...]}
+
+    文件名由内容哈希决定，已经存在的缩略图不再重新生成。
+    """
+    os.makedirs(variants_dir, exist_ok=True)
+    widths = sorted((w for w in VARIANT_WIDTHS if w < img.width), reverse=True)
+    variants = {fmt: [] for fmt in VARIANT_FORMATS}
+    source = img
+    for width in widths:
+        # 从上一个（更大的）尺寸缩小，避免每次都从原图重采样
+        source = source.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        for fmt, options in (('jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+                             ('webp', {'quality': 80, 'method': 4})):
+            path = os.path.join(variants_dir, variant_filename(filename, width, fmt))
+            if not os.path.exists(path):
+                _save(source, path, fmt.upper(), **options)
+        for fmt in VARIANT_FORMATS:
+            variants[fmt].insert(0, width)
+    return variants
+
+
+def convert_image(src_path, dest_path, variants_dir):
+    """把原始上传转换为 JPEG 并生成缩略图（在工作进程中执行）
+
+    返回 {'variants': ..., 'placeholder': ..., 'color': ..., 'quality': JPEG 质量, 'bytes': 文件大小}。
+    """
+    filename = os.path.basename(dest_path)
+    if os.path.exists(dest_path):
+        # 相同内容的图片已经处理完成（重复上传或由其他进程处理），只补齐缩略图
+        return make_variants(dest_path, variants_dir)
+    img = open_image(src_path)
+    data, quality = encode_jpeg(img)
+    _write(data, dest_path)
+    return {'variants': save_variants(img, filename, variants_dir), **make_placeholder(img),
+            'quality': quality, 'bytes': len(data)}
+
+
+def make_variants(image_path, variants_dir):
+    """为已有图片生成缩略图和占位图（用于回填），返回 {'variants': ..., 'placeholder': ..., 'color': ...}"""
+    img = open_image(image_path)
+    return {'variants': save_variants(img, os.path.basename(image_path), variants_dir), **make_placeholder(img)}
+
+
+class ImageWorkerPool:
+    """有界的图片处理进程池
+
+    同时提交（排队 + 处理中）的任务最多 max_pending 个，超出时 submit 阻塞等待。
+    进程池在第一次提交时才创建，gunicorn fork 出的每个 worker 使用各自的进程池。
+    """
+
+    def __init__(self, max_workers=None, max_pending=32):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, func, *args, callback=None):
+        """提交任务，完成后在后台线程中调用 callback(future)"""
+        self._slots.acquire()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        def done(f):
+            self._slots.release()
+            if callback is not None:
+                callback(f)
+
+        future.add_done_callback(done)
+        return future
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
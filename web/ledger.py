@@ -0,0 +1,186 @@
+"""交易记录账本
+
+交易记录从用户数据中拆出，按追加顺序写入分段的 JSONL 文件：
+- segment_000000.jsonl, segment_000001.jsonl ... 每段固定条数，只追加不改写
+- checkpoint.json 记录最后的序号、累计收入/支出和余额快照
+
+写入一条记录只需追加一行并更新检查点，与历史长度无关；追加前检查最后一段的末尾，
+写入分段后、更新检查点前崩溃留下的记录会补进检查点，写了一半的行被截掉，序号不会重复；
+读取最近记录走内存中的尾部缓存，翻页按序号游标只读取相关分段。
+"""
+import os
+import json
+import threading
+from collections import deque
+
+
+def _seq(line):
+    """分段中一行记录的序号，行不完整或无法解析时返回 None"""
+    try:
+        return json.loads(line)['seq']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class JsonlLedger:
+    """分段 JSONL 账本"""
+
+    def __init__(self, directory, segment_size=1000, cache_size=50):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.cache_size = cache_size
+        self.checkpoint_file = os.path.join(directory, 'checkpoint.json')
+        self._lock = threading.Lock()
+        self._tail = deque(maxlen=cache_size)
+        self._tail_seq = None
+
+    def _segment_path(self, index):
+        return os.path.join(self.directory, f'segment_{index:06d}.jsonl')
+
+    def _segment_index(self, seq):
+        return (seq - 1) // self.segment_size
+
+    def checkpoint(self):
+        """读取检查点：最后序号、累计金额、累计收入/支出、余额快照"""
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'seq': 0, 'running_total': 0, 'total_income': 0, 'total_expense': 0, 'balance': None}
+
+    def _write_checkpoint(self, checkpoint):
+        tmp_path = self.checkpoint_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def _recover(self, checkpoint):
+        """把已写入分段但不在检查点中的记录补进检查点，截掉末尾不完整的行"""
+        index = self._segment_index(checkpoint['seq'] + 1)
+        while True:
+            path = self._segment_path(index)
+            try:
+                f = open(path, 'rb+')
+            except FileNotFoundError:
+                return
+            with f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - 4096))
+                tail = f.read()
+                lines = tail.splitlines()
+                if not tail or (tail.endswith(b'\n') and _seq(lines[-1]) == checkpoint['seq']):
+                    # 正常情况：分段为空或最后一行就是检查点记录的序号
+                    return
+                f.seek(0)
+                valid = 0
+                for line in f:
+                    seq = _seq(line) if line.endswith(b'\n') else None
+                    if seq is None:
+                        break
+                    valid += len(line)
+                    if seq == checkpoint['seq'] + 1:
+                        amount = json.loads(line).get('amount', 0)
+                        checkpoint['seq'] = seq
+                        checkpoint['running_total'] += amount
+                        if amount > 0:
+                            checkpoint['total_income'] += amount
+                        else:
+                            checkpoint['total_expense'] -= amount
+                if valid < size:
+                    print(f"账本分段 {path} 末尾有不完整的记录，已截断")
+                    f.truncate(valid)
+            index += 1
+
+    def append(self, entries, balance=None):
+        """按时间顺序追加交易记录，返回带序号的记录"""
+        if not entries:
+            return []
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            checkpoint = self.checkpoint()
+            self._recover(checkpoint)
+            seq = checkpoint['seq']
+            written = []
+            lines_by_segment = {}
+            for entry in entries:
+                seq += 1
+                record = dict(entry, seq=seq)
+                written.append(record)
+                lines_by_segment.setdefault(self._segment_index(seq), []).append(
+                    json.dumps(record, ensure_ascii=False) + '\n')
+                amount = record.get('amount', 0)
+                checkpoint['running_total'] += amount
+                if amount > 0:
+                    checkpoint['total_income'] += amount
+                else:
+                    checkpoint['total_expense'] -= amount
+            for index, lines in lines_by_segment.items():
+                with open(self._segment_path(index), 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+            checkpoint['seq'] = seq
+            if balance is not None:
+                checkpoint['balance'] = balance
+            self._write_checkpoint(checkpoint)
+
+            if self._tail_seq == seq - len(written):
+                self._tail.extend(written)
+                self._tail_seq = seq
+            return written
+
+    def _read_segment(self, index):
+        try:
+            with open(self._segment_path(index), 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _fill_tail(self, last_seq):
+        entries, _ = self.page(limit=self.cache_size)
+        self._tail = deque(reversed(entries), maxlen=self.cache_size)
+        self._tail_seq = last_seq
+
+    def latest(self, n=10):
+        """最近 n 条记录（最新的在前）"""
+        last_seq = self.checkpoint()['seq']
+        if n > self.cache_size:
+            return self.page(limit=n)[0]
+        with self._lock:
+            if self._tail_seq != last_seq:
+                self._fill_tail(last_seq)
+            return list(reversed(self._tail))[:n]
+
+    def page(self, before=None, limit=20):
+        """按序号游标翻页（最新的在前），返回 (记录列表, 下一页游标)"""
+        last_seq = self.checkpoint()['seq']
+        start = last_seq if before is None else min(int(before) - 1, last_seq)
+        entries = []
+        index = self._segment_index(start) if start > 0 else -1
+        while index >= 0 and len(entries) < limit:
+            segment = [e for e in self._read_segment(index) if e['seq'] <= start]
+            entries.extend(reversed(segment[-(limit - len(entries)):]))
+            index -= 1
+        next_cursor = entries[-1]['seq'] if entries and entries[-1]['seq'] > 1 else None
+        return entries, next_cursor
+
+    def export(self):
+        """导出全部记录（最新的在前，不含序号）"""
+        last_seq = self.checkpoint()['seq']
+        entries = []
+        if last_seq == 0:
+            return entries
+        for index in range(self._segment_index(last_seq), -1, -1):
+            for entry in reversed(self._read_segment(index)):
+                entry.pop('seq', None)
+                entries.append(entry)
+        return entries
+
+    def reset(self, entries):
+        """清空账本并写入给定记录（最新的在前）"""
+        with self._lock:
+            if os.path.isdir(self.directory):
+                for filename in os.listdir(self.directory):
+                    if filename.startswith('segment_') or filename == 'checkpoint.json':
+                        os.remove(os.path.join(self.directory, filename))
+            self._tail.clear()
+            self._tail_seq = None
+        self.append(list(reversed(entries)))
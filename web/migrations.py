@@ -0,0 +1,68 @@
+"""数据文件的版本化迁移
+
+每类数据（菜品、种子、用户数据）带一个 schema_version 字段，迁移函数按版本号登记在
+各自的 MigrationRegistry 中。启动时把数据从它的 schema_version 依次迁移到最新版本并写回，
+之后的读取只需反序列化，不再在每次加载时补齐字段。
+
+新增迁移只需登记一个更大的版本号，迁移函数就地修改传入的文档，必须可以重复执行。
+"""
+import os
+import json
+
+
+class MigrationRegistry:
+    """一类数据的有序迁移表"""
+
+    def __init__(self, name):
+        self.name = name
+        self._migrations = {}
+
+    def migration(self, version):
+        """登记迁移函数的装饰器"""
+        def decorator(func):
+            if version in self._migrations:
+                raise ValueError(f'{self.name} 的迁移版本 {version} 重复登记')
+            self._migrations[version] = func
+            return func
+        return decorator
+
+    @property
+    def latest(self):
+        """最新的 schema_version"""
+        return max(self._migrations, default=0)
+
+    def is_current(self, document):
+        return document.get('schema_version', 0) >= self.latest
+
+    def apply(self, document):
+        """就地把文档迁移到最新版本，返回执行过的迁移版本列表"""
+        applied = []
+        for version in sorted(self._migrations):
+            if version > document.get('schema_version', 0):
+                self._migrations[version](document)
+                document['schema_version'] = version
+                applied.append(version)
+        return applied
+
+
+def migrate_json_file(path, registry, initial):
+    """迁移一个 JSON 数据文件，有变化时原子地写回，返回执行过的迁移版本列表
+
+    initial(raw) 把不带 schema_version 的旧格式内容（文件不存在时为 None）转换为文档。
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        raw = None
+    if isinstance(raw, dict) and 'schema_version' in raw:
+        document = raw
+    else:
+        document = initial(raw)
+    applied = registry.apply(document)
+    if applied:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    return applied
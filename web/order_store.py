@@ -0,0 +1,264 @@
+"""订单存储
+
+每个订单仍保存为 orders/order_<id>.json，另外维护一个紧凑的索引文件 orders/index.json：
+    {"version": 12, "orders": {"<id>": {"timestamp": ..., "status": ..., "version": ...}},
+     "removed": {"<id>": 11}, "pruned_version": 0}
+
+save_order / delete_order 在文件锁内从磁盘重新读取索引后增量更新，每次修改递增 version。
+读取时只在索引文件变化（inode、大小或修改时间不同）后重新解析索引，并且只重新读取版本号变化的订单文件，
+轮询的开销与变化的订单数量成正比，而不是与订单总数成正比。
+changes_since(version) 返回某个版本之后新增/修改/删除的订单，用于增量同步；
+page() 按时间倒序分页，只读取本页的订单文件。
+"""
+import os
+import json
+import time
+import fcntl
+import threading
+from contextlib import contextmanager
+
+# 保留的已删除订单记录数量
+MAX_REMOVED = 1000
+
+
+class OrderStore:
+    """带索引的订单存储"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_file = os.path.join(directory, 'index.json')
+        self.lock_file = os.path.join(directory, 'index.lock')
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._index = None
+        self._index_key = None
+        self._sorted_ids = None
+        self._orders = {}  # {order_id: (version, order)}
+
+    def _order_path(self, order_id):
+        return os.path.join(self.directory, f'order_{order_id}.json')
+
+    @contextmanager
+    def _locked(self):
+        """进程内和进程间互斥地修改索引（可重入）"""
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _rebuild_index(self):
+        """扫描订单目录重建索引（首次使用或索引损坏时）
+
+        版本号从当前毫秒时间戳开始，总是大于重建前发出过的版本号；pruned_version 设为重建后的版本，
+        持有重建前版本号的客户端下次同步时会拿到完整列表。
+        """
+        base = int(time.time() * 1000)
+        index = {'version': base, 'orders': {}, 'removed': {}, 'pruned_version': base}
+        if os.path.exists(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.startswith('order_') and filename.endswith('.json'):
+                    try:
+                        with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                            order = json.load(f)
+                    except Exception:
+                        continue
+                    index['version'] += 1
+                    index['orders'][order['id']] = {
+                        'timestamp': order.get('timestamp', 0),
+                        'status': order.get('status', 'pending'),
+                        'version': index['version']
+                    }
+        index['pruned_version'] = index['version']
+        self._write_index(index)
+        return index
+
+    def _write_index(self, index):
+        tmp_path = self.index_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.index_file)
+        self._set_index(index, self._file_key())
+
+    def _file_key(self):
+        """索引文件的 (inode, 大小, 修改时间)：每次写入都替换为新文件，inode 必然变化，
+        不依赖修改时间的精度"""
+        stat = os.stat(self.index_file)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _set_index(self, index, key):
+        self._index = index
+        self._index_key = key
+        self._sorted_ids = None
+
+    def index(self, fresh=False):
+        """读取索引（未变化时直接使用内存中的副本）
+
+        fresh 为 True 时总是从磁盘重新读取：修改索引前在文件锁内调用，
+        避免在其他进程的写入之上写回过期的副本。
+        """
+        with self._lock:
+            try:
+                key = self._file_key()
+            except FileNotFoundError:
+                with self._locked():
+                    if not os.path.exists(self.index_file):
+                        return self._rebuild_index()
+                key = self._file_key()
+            if fresh or key != self._index_key:
+                try:
+                    with open(self.index_file, 'r', encoding='utf-8') as f:
+                        self._set_index(json.load(f), key)
+                except ValueError:
+                    with self._locked():
+                        return self._rebuild_index()
+            return self._index
+
+    @property
+    def version(self):
+        return self.index()['version']
+
+    def save(self, order):
+        """保存订单并更新索引"""
+        with self._locked():
+            index = self.index(fresh=True)
+            path = self._order_path(order['id'])
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(order, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+
+            index['version'] += 1
+            index['orders'][order['id']] = {
+                'timestamp': order.get('timestamp', 0),
+                'status': order.get('status', 'pending'),
+                'version': index['version']
+            }
+            index['removed'].pop(order['id'], None)
+            self._write_index(index)
+            self._orders[order['id']] = (index['version'], order)
+
+    def delete(self, order_id):
+        """删除订单，订单不存在时返回 False"""
+        with self._locked():
+            index = self.index(fresh=True)
+            path = self._order_path(order_id)
+            if not os.path.exists(path):
+                return False
+            os.remove(path)
+
+            index['version'] += 1
+            index['orders'].pop(order_id, None)
+            index['removed'][order_id] = index['version']
+            if len(index['removed']) > MAX_REMOVED:
+                oldest = sorted(index['removed'], key=index['removed'].get)
+                for removed_id in oldest[:len(index['removed']) - MAX_REMOVED]:
+                    index['pruned_version'] = max(index.get('pruned_version', 0), index['removed'].pop(removed_id))
+            self._write_index(index)
+            self._orders.pop(order_id, None)
+            return True
+
+    def get(self, order_id):
+        """按索引中的版本读取订单（带缓存）"""
+        with self._lock:
+            return self._get(self.index(), order_id)
+
+    def _get(self, index, order_id):
+        entry = index['orders'].get(order_id)
+        if entry is None:
+            return None
+        cached = self._orders.get(order_id)
+        if cached and cached[0] == entry['version']:
+            return cached[1]
+        try:
+            with open(self._order_path(order_id), 'r', encoding='utf-8') as f:
+                order = json.load(f)
+        except Exception:
+            return None
+        self._orders[order_id] = (entry['version'], order)
+        return order
+
+    def _sorted(self, index):
+        """按 (时间, ID) 倒序排列的订单 ID（索引变化后重新排序）"""
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(index['orders'], key=lambda i: (index['orders'][i]['timestamp'], i), reverse=True)
+            # 清理已不在索引中的缓存
+            for order_id in list(self._orders):
+                if order_id not in index['orders']:
+                    del self._orders[order_id]
+        return self._sorted_ids
+
+    def list(self, status=None):
+        """按时间倒序列出订单，可按状态过滤"""
+        with self._lock:
+            index = self.index()
+            orders = []
+            for order_id in self._sorted(index):
+                if status is not None and index['orders'][order_id]['status'] != status:
+                    continue
+                order = self._get(index, order_id)
+                if order is not None:
+                    orders.append(order)
+            return orders
+
+    def page(self, before=None, limit=20, status=None, start=None, end=None):
+        """按时间倒序分页，返回 (订单列表, 下一页游标)
+
+        游标是上一页最后一个订单的 (时间戳, ID)；start / end 为时间戳范围（包含 start，不包含 end）。
+        只按索引筛选，订单文件只读取本页的部分。
+        """
+        with self._lock:
+            index = self.index()
+            orders = []
+            last = None
+            for order_id in self._sorted(index):
+                entry = index['orders'][order_id]
+                key = (entry['timestamp'], order_id)
+                if before is not None and key >= before:
+                    continue
+                if start is not None and entry['timestamp'] < start:
+                    break
+                if (end is not None and entry['timestamp'] >= end) or (status is not None and entry['status'] != status):
+                    continue
+                if len(orders) == limit:
+                    return orders, last
+                order = self._get(index, order_id)
+                if order is not None:
+                    orders.append(order)
+                    last = key
+            return orders, None
+
+    @property
+    def count(self):
+        return len(self.index()['orders'])
+
+    def changes_since(self, version):
+        """返回 version 之后的变化
+
+        结果为 {'version', 'total', 'full', 'orders', 'removed'}：full 为 True 时 orders 是完整列表
+        （客户端版本为 0、早于已清理的删除记录或索引重建前的版本、或者比当前版本还新），
+        否则只包含变化的订单和被删除的订单 ID。
+        """
+        with self._lock:
+            index = self.index()
+            if version <= 0 or version < index.get('pruned_version', 0) or version > index['version']:
+                return {'version': index['version'], 'total': len(index['orders']), 'full': True,
+                        'orders': self.list(), 'removed': []}
+            changed = [order_id for order_id, entry in index['orders'].items() if entry['version'] > version]
+            changed.sort(key=lambda i: index['orders'][i]['timestamp'], reverse=True)
+            orders = [order for order in (self._get(index, order_id) for order_id in changed) if order is not None]
+            removed = [order_id for order_id, removed_version in index['removed'].items() if removed_version > version]
+            return {'version': index['version'], 'total': len(index['orders']), 'full': False,
+                    'orders': orders, 'removed': removed}
@@ -0,0 +1,49 @@
+// 返回上一页功能
+function goBack() {
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        window.location.href = "/customer";
+    }
+}
+
+function checkIn() {
+    fetch('/check_in', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // 显示奖励信息
+            document.getElementById('rewardAmount').textContent = data.reward;
+            document.getElementById('consecutiveMessage').textContent = 
+                `连续签到 ${data.consecutive_days} 天`;
+            
+            // 显示额外奖励（如果有）
+            if (data.bonus_reward) {
+                document.getElementById('bonusMessage').textContent = data.bonus_message;
+                document.getElementById('bonusReward').style.display = 'block';
+            } else {
+                document.getElementById('bonusReward').style.display = 'none';
+            }
+            
+            // 显示模态框
+            const modal = new bootstrap.Modal(document.getElementById('checkInModal'));
+            modal.show();
+            
+            // 3秒后刷新页面
+            setTimeout(() => {
+                location.reload();
+            }, 3000);
+        } else {
+            alert(data.message || '签到失败，请稍后重试');
+        }
+    })
+    .catch(error => {
+        console.error('签到失败:', error);
+        alert('签到失败，请检查网络连接');
+    });
+}
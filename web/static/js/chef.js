@@ -0,0 +1,997 @@
+let dishItemIndex = 1; // 从1开始，因为已经有一个初始项目
+
+// 图片预览功能
+function previewImage(input) {
+    const preview = document.getElementById('imagePreview');
+    const previewImg = document.getElementById('previewImg');
+    
+    if (input.files && input.files[0]) {
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            previewImg.src = e.target.result;
+            preview.style.display = 'block';
+        };
+        reader.readAsDataURL(input.files[0]);
+    } else {
+        preview.style.display = 'none';
+    }
+}
+
+// 批量添加图片预览功能
+function previewBatchImage(input, index) {
+    const preview = document.getElementById(`batchPreview_${index}`);
+    const previewImg = preview.querySelector('img');
+    
+    if (input.files && input.files[0]) {
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            previewImg.src = e.target.result;
+            preview.style.display = 'block';
+        };
+        reader.readAsDataURL(input.files[0]);
+    } else {
+        preview.style.display = 'none';
+    }
+}
+
+// 添加新的菜品项
+function addDishItem() {
+    const dishItems = document.getElementById('dishItems');
+    const newIndex = dishItemIndex++;
+    
+    const newDishItem = document.createElement('div');
+    newDishItem.className = 'dish-item border rounded p-3 mb-3';
+    newDishItem.setAttribute('data-index', newIndex);
+    
+    newDishItem.innerHTML = `
+        <div class="d-flex justify-content-between align-items-center mb-2">
+            <h6 class="mb-0">
+                <i class="fas fa-utensils me-1"></i>菜品 #${newIndex + 1}
+            </h6>
+            <button type="button" class="btn btn-outline-danger btn-sm" onclick="removeDishItem(${newIndex})">
+                <i class="fas fa-times"></i>
+            </button>
+        </div>
+        
+        <div class="row">
+            <div class="col-md-4">
+                <label class="form-label">
+                    菜品名称 <span class="text-danger">*</span>
+                </label>
+                <input type="text" class="form-control" name="dish_names[]" required 
+                       placeholder="请输入菜品名称">
+            </div>
+            <div class="col-md-3">
+                <label class="form-label">
+                    价格 (宝宝币)
+                </label>
+                <input type="number" class="form-control" name="dish_prices[]" 
+                       value="52" min="0" placeholder="52">
+            </div>
+            <div class="col-md-5">
+                <label class="form-label">
+                    菜品图片 <span class="text-danger">*</span>
+                </label>
+                <input type="file" class="form-control" name="dish_images[]" 
+                       accept="image/*" required onchange="previewBatchImage(this, ${newIndex})">
+            </div>
+        </div>
+        
+        <div class="row mt-2">
+            <div class="col-12">
+                <div class="image-preview" id="batchPreview_${newIndex}" style="display: none;">
+                    <img src="" alt="预览图" class="img-fluid rounded border" style="max-height: 150px;">
+                </div>
+            </div>
+        </div>
+    `;
+    
+    dishItems.appendChild(newDishItem);
+    
+    // 显示第一个项目的删除按钮
+    updateRemoveButtons();
+}
+
+// 删除菜品项
+function removeDishItem(index) {
+    const dishItem = document.querySelector(`[data-index="${index}"]`);
+    if (dishItem) {
+        dishItem.remove();
+        updateRemoveButtons();
+        updateDishNumbers();
+    }
+}
+
+// 更新删除按钮显示状态
+function updateRemoveButtons() {
+    const dishItems = document.querySelectorAll('.dish-item');
+    dishItems.forEach((item, index) => {
+        const removeBtn = item.querySelector('.btn-outline-danger');
+        if (dishItems.length > 1) {
+            removeBtn.style.display = 'inline-block';
+        } else {
+            removeBtn.style.display = 'none';
+        }
+    });
+}
+
+// 更新菜品编号
+function updateDishNumbers() {
+    const dishItems = document.querySelectorAll('.dish-item');
+    dishItems.forEach((item, index) => {
+        const title = item.querySelector('h6');
+        title.innerHTML = `<i class="fas fa-utensils me-1"></i>菜品 #${index + 1}`;
+    });
+}
+
+// 重置批量添加表单
+function resetBatchForm() {
+    const dishItems = document.getElementById('dishItems');
+    // 清空所有项目
+    dishItems.innerHTML = '';
+    
+    // 重新添加初始项目
+    dishItemIndex = 1;
+    const initialItem = document.createElement('div');
+    initialItem.className = 'dish-item border rounded p-3 mb-3';
+    initialItem.setAttribute('data-index', '0');
+    
+    initialItem.innerHTML = `
+        <div class="d-flex justify-content-between align-items-center mb-2">
+            <h6 class="mb-0">
+                <i class="fas fa-utensils me-1"></i>菜品 #1
+            </h6>
+            <button type="button" class="btn btn-outline-danger btn-sm" onclick="removeDishItem(0)" style="display: none;">
+                <i class="fas fa-times"></i>
+            </button>
+        </div>
+        
+        <div class="row">
+            <div class="col-md-4">
+                <label class="form-label">
+                    菜品名称 <span class="text-danger">*</span>
+                </label>
+                <input type="text" class="form-control" name="dish_names[]" required 
+                       placeholder="请输入菜品名称">
+            </div>
+            <div class="col-md-3">
+                <label class="form-label">
+                    价格 (宝宝币)
+                </label>
+                <input type="number" class="form-control" name="dish_prices[]" 
+                       value="52" min="0" placeholder="52">
+            </div>
+            <div class="col-md-5">
+                <label class="form-label">
+                    菜品图片 <span class="text-danger">*</span>
+                </label>
+                <input type="file" class="form-control" name="dish_images[]" 
+                       accept="image/*" required onchange="previewBatchImage(this, 0)">
+            </div>
+        </div>
+        
+        <div class="row mt-2">
+            <div class="col-12">
+                <div class="image-preview" id="batchPreview_0" style="display: none;">
+                    <img src="" alt="预览图" class="img-fluid rounded border" style="max-height: 150px;">
+                </div>
+            </div>
+        </div>
+    `;
+    
+    dishItems.appendChild(initialItem);
+}
+
+// 监听批量添加模态框关闭事件
+document.getElementById('batchAddDishModal').addEventListener('hidden.bs.modal', function () {
+    resetBatchForm();
+});
+
+// 批量添加：图片分块上传（断线后从服务端已收到的位置继续），全部上传完成后一次性创建菜品
+const UPLOAD_RETRIES = 5;
+
+async function uploadFileInChunks(file, dishName, dishPrice, onProgress) {
+    let response = await fetch('/uploads', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({filename: file.name, size: file.size, dish_name: dishName, dish_price: dishPrice})
+    });
+    let data = await response.json();
+    if (!data.success) throw new Error(data.message);
+    const uploadId = data.upload_id;
+    const chunkSize = data.chunk_size;
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+        const end = Math.min(offset + chunkSize, file.size);
+        try {
+            response = await fetch(`/uploads/${uploadId}`, {
+                method: 'PUT',
+                headers: {'Content-Range': `bytes ${offset}-${end - 1}/${file.size}`},
+                body: file.slice(offset, end)
+            });
+            data = await response.json();
+            if (!data.success && response.status !== 409) {
+                const error = new Error(data.message);
+                error.permanent = true;
+                throw error;
+            }
+            // 409 表示偏移量与服务端不一致，从服务端已收到的位置继续
+            offset = data.received;
+            failures = 0;
+        } catch (error) {
+            if (error.permanent || ++failures > UPLOAD_RETRIES) throw error;
+            await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+            const status = await fetch(`/uploads/${uploadId}`).then(r => r.json()).catch(() => null);
+            if (status && status.success) offset = status.received;
+        }
+        onProgress(offset / file.size);
+    }
+    return uploadId;
+}
+
+document.getElementById('batchAddForm').addEventListener('submit', async function (event) {
+    if (!window.fetch || !Blob.prototype.slice) return;  // 不支持时按原方式整体提交
+    event.preventDefault();
+    const submitBtn = this.querySelector('button[type="submit"]');
+    const originalText = submitBtn.innerHTML;
+    submitBtn.disabled = true;
+    const items = Array.from(document.querySelectorAll('#dishItems .dish-item'));
+    const uploadIds = [];
+    const errors = [];
+    for (const [i, item] of items.entries()) {
+        const name = item.querySelector('input[name="dish_names[]"]').value.trim();
+        const price = item.querySelector('input[name="dish_prices[]"]').value;
+        const file = item.querySelector('input[name="dish_images[]"]').files[0];
+        try {
+            uploadIds.push(await uploadFileInChunks(file, name, price, progress => {
+                submitBtn.innerHTML = `<i class="fas fa-spinner fa-spin me-1"></i>上传中 ${i + 1}/${items.length}（${Math.round(progress * 100)}%）`;
+            }));
+        } catch (error) {
+            errors.push(`菜品 "${name}" 上传失败: ${error.message}`);
+        }
+    }
+    if (uploadIds.length) {
+        try {
+            const result = await fetch('/uploads/finalize', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({upload_ids: uploadIds})
+            }).then(r => r.json());
+            result.results.filter(r => !r.success).forEach(r => errors.push(r.message));
+        } catch (error) {
+            errors.push(`保存菜品失败: ${error.message}`);
+        }
+    }
+    submitBtn.disabled = false;
+    submitBtn.innerHTML = originalText;
+    if (errors.length) alert(errors.join('\n'));
+    location.reload();
+});
+
+// 生成客户链接
+function generateCustomerLink() {
+    fetch('/generate_customer_link', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            document.getElementById('customerLink').value = data.customer_url;
+            const modal = new bootstrap.Modal(document.getElementById('customerLinkModal'));
+            modal.show();
+        } else {
+            alert('生成链接失败');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('生成链接失败');
+    });
+}
+
+// 复制链接
+function copyLink() {
+    const linkInput = document.getElementById('customerLink');
+    linkInput.select();
+    linkInput.setSelectionRange(0, 99999);
+    document.execCommand('copy');
+    
+    // 显示复制成功提示
+    const button = event.target.closest('button');
+    const originalText = button.innerHTML;
+    button.innerHTML = '<i class="fas fa-check me-1"></i>已复制';
+    button.classList.remove('btn-outline-secondary');
+    button.classList.add('btn-success');
+    
+    setTimeout(() => {
+        button.innerHTML = originalText;
+        button.classList.remove('btn-success');
+        button.classList.add('btn-outline-secondary');
+    }, 2000);
+}
+
+// 请求分页接口的一页（cursor 为空时请求第一页）
+function fetchPage(url, cursor) {
+    return fetch(cursor ? `${url}?cursor=${encodeURIComponent(cursor)}` : url)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            return data;
+        });
+}
+
+// 追加一页内容或替换为第一页，并根据下一页游标显示或隐藏“加载更多”按钮
+function showPage(containerId, moreButtonId, html, nextCursor, append) {
+    const container = document.getElementById(containerId);
+    if (append) {
+        container.insertAdjacentHTML('beforeend', html);
+    } else {
+        container.innerHTML = html;
+    }
+    document.getElementById(moreButtonId).style.display = nextCursor ? '' : 'none';
+}
+
+// 菜品面板
+let dishesCursor = null;
+
+function loadDishes(more) {
+    fetchPage('/chef/api/dishes', more ? dishesCursor : null)
+    .then(data => {
+        dishesCursor = data.next_cursor;
+        showPage('dishesContainer', 'dishesMore', data.html, dishesCursor, more);
+        document.getElementById('dishCount').textContent = data.total;
+        document.getElementById('dishesEmpty').style.display = data.total ? 'none' : '';
+        watchDishProcessing();
+    })
+    .catch(error => console.error('加载菜品失败:', error));
+}
+
+// 问卷面板（第一次打开问卷窗口时加载）
+let questionnaireCursor = null;
+let questionnaireLoaded = false;
+
+function loadQuestionnaire(more) {
+    fetchPage('/chef/api/questionnaire', more ? questionnaireCursor : null)
+    .then(data => {
+        questionnaireLoaded = true;
+        questionnaireCursor = data.next_cursor;
+        showPage('questionnaireContainer', 'questionnaireMore', data.html, questionnaireCursor, more);
+        const empty = !more && data.responses.length === 0;
+        document.getElementById('questionnaireEmpty').style.display = empty ? '' : 'none';
+    })
+    .catch(error => console.error('加载问卷记录失败:', error));
+}
+
+document.getElementById('questionnaireModal').addEventListener('show.bs.modal', function () {
+    if (!questionnaireLoaded) {
+        loadQuestionnaire(false);
+    }
+});
+
+// 余额面板
+function showBalance(balance) {
+    document.querySelectorAll('.chef-balance').forEach(element => {
+        element.textContent = balance;
+    });
+}
+
+function loadBalance() {
+    fetch('/chef/api/balance')
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showBalance(data.balance);
+        }
+    })
+    .catch(error => console.error('加载余额失败:', error));
+}
+
+// 订单面板：先分页加载，之后增量同步第一页加载时版本之后的变化
+let ordersVersion = null;
+let ordersEtag = null;
+let ordersById = {};
+let ordersCursor = null;
+
+function showOrders(total) {
+    const orders = Object.values(ordersById).sort((a, b) => (b.timestamp || 0) - (a.timestamp || 0));
+    updateOrdersDisplay(orders);
+    document.getElementById('orderCount').textContent = total;
+}
+
+function loadOrders(more) {
+    fetchPage('/chef/api/orders', more ? ordersCursor : null)
+    .then(data => {
+        if (!more) {
+            ordersById = {};
+            ordersVersion = data.version;
+            ordersEtag = null;
+        }
+        data.orders.forEach(order => {
+            ordersById[order.id] = order;
+        });
+        ordersCursor = data.next_cursor;
+        document.getElementById('ordersMore').style.display = ordersCursor ? '' : 'none';
+        showOrders(data.total);
+    })
+    .catch(error => console.error('加载订单失败:', error));
+}
+
+// 刷新订单（只拉取上次同步之后的变化，没有变化时服务端返回304）
+function refreshOrders() {
+    if (ordersVersion === null) {
+        return;
+    }
+    const headers = ordersEtag ? {'If-None-Match': ordersEtag} : {};
+    fetch(`/get_orders?since=${ordersVersion}`, {headers: headers, cache: 'no-store'})
+    .then(response => {
+        if (response.status === 304) {
+            return null;
+        }
+        ordersEtag = response.headers.get('ETag');
+        return response.json();
+    })
+    .then(data => {
+        if (!data) {
+            return;
+        }
+        if (data.full) {
+            // 本地版本太旧，重新加载第一页
+            loadOrders(false);
+            return;
+        }
+        data.orders.forEach(order => {
+            ordersById[order.id] = order;
+        });
+        data.removed.forEach(orderId => {
+            delete ordersById[orderId];
+        });
+        ordersVersion = data.version;
+        showOrders(data.total);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+    });
+}
+
+// 重置问卷
+function resetQuestionnaire() {
+    if (confirm('确定要重置今日的问卷状态吗？这将允许用户重新填写问卷。')) {
+        fetch('/reset_questionnaire', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                alert('问卷状态已重置，用户现在可以重新填写问卷。');
+            } else {
+                alert('重置失败：' + (data.message || '未知错误'));
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('重置失败，请重试。');
+        });
+    }
+}
+
+// 更新订单显示
+function updateOrdersDisplay(orders) {
+    const container = document.getElementById('ordersContainer');
+    
+    if (orders.length === 0) {
+        container.innerHTML = `
+            <div class="empty-orders text-center py-5">
+                <i class="fas fa-clipboard text-muted" style="font-size: 3rem;"></i>
+                <h5 class="mt-3 text-muted">暂无订单</h5>
+                <p class="text-muted">等待客户下单...</p>
+            </div>
+        `;
+        return;
+    }
+    
+    let html = '';
+    orders.forEach(order => {
+        let orderContent = '';
+        let orderType = '';
+        
+        if (order.source === 'inventory' && order.items) {
+            // 背包物品订单
+            orderType = '使用物品详情:';
+            orderContent = '<ul class="list-unstyled mb-0">';
+            order.items.forEach(item => {
+                orderContent += `
+                    <li class="mb-1">
+                        <span class="badge bg-info text-white me-2">${item.quantity}</span>
+                        <strong>${item.name}</strong>
+                        ${item.description ? `<br><small class="text-muted">${item.description}</small>` : ''}
+                        <span class="badge bg-success ms-2">来源: 背包物品</span>
+                    </li>
+                `;
+            });
+            orderContent += '</ul>';
+            orderContent += `
+                <div class="mt-2">
+                    <small class="text-muted">
+                        支付方式: ${order.payment_method || '免费'}
+                    </small>
+                </div>
+            `;
+        } else if (order.dishes && order.dishes.length > 0) {
+            // 普通点餐订单
+            orderType = '点餐详情:';
+            const dishCounts = {};
+            order.dishes.forEach(dish => {
+                dishCounts[dish] = (dishCounts[dish] || 0) + 1;
+            });
+            
+            orderContent = '<ul class="list-unstyled mb-0">';
+            Object.entries(dishCounts).forEach(([dish, count]) => {
+                orderContent += `
+                    <li class="mb-1">
+                        <span class="badge bg-light text-dark me-2">${count}</span>
+                        ${dish}
+                    </li>
+                `;
+            });
+            orderContent += '</ul>';
+            orderContent += `
+                <div class="mt-2">
+                    <small class="text-muted">
+                        总计: ${order.dishes.length} 道菜
+                        ${order.coupon_used ? ` | 使用优惠券: ${order.coupon_used}` : ''}
+                    </small>
+                </div>
+            `;
+        } else {
+            // 异常订单
+            orderType = '订单详情:';
+            orderContent = `
+                <div class="alert alert-warning">
+                    <i class="fas fa-exclamation-triangle me-1"></i>
+                    订单数据异常，请检查订单详情
+                </div>
+            `;
+        }
+        
+        html += `
+            <div class="order-item mb-3">
+                <div class="card border-start border-warning border-3">
+                    <div class="card-body">
+                        <div class="d-flex justify-content-between align-items-start mb-2">
+                            <div>
+                                <h6 class="card-title mb-1">
+                                    <i class="fas fa-user me-1"></i>
+                                    ${order.customer_name}
+                                </h6>
+                                <small class="text-muted">
+                                    <i class="fas fa-clock me-1"></i>
+                                    ${order.created_time}
+                                </small>
+                            </div>
+                            <span class="badge bg-warning text-dark">订单 #${order.id}</span>
+                        </div>
+                        
+                        <div class="order-dishes mb-3">
+                            <h6 class="mb-2">
+                                <i class="fas fa-list me-1"></i>${orderType}
+                            </h6>
+                            ${orderContent}
+                        </div>
+                        
+                        <form method="POST" action="/complete_order" class="d-inline">
+                            <input type="hidden" name="order_id" value="${order.id}">
+                            <button type="submit" class="btn btn-success btn-sm w-100" 
+                                    onclick="return confirm('确认已完成订单 #${order.id} 吗？')">
+                                <i class="fas fa-check me-1"></i>
+                                完成订单
+                            </button>
+                        </form>
+                    </div>
+                </div>
+            </div>
+        `;
+    });
+    
+    container.innerHTML = html;
+}
+
+// 订阅服务端推送：有新订单、订单完成或余额变化时立即更新
+// 浏览器不支持 EventSource 时退回到每30秒轮询
+function subscribeEvents() {
+    if (!window.EventSource) {
+        setInterval(refreshOrders, 30000);
+        return;
+    }
+    const source = new EventSource('/events');
+    source.addEventListener('order_created', refreshOrders);
+    source.addEventListener('order_completed', refreshOrders);
+    source.addEventListener('balance_changed', event => {
+        showBalance(JSON.parse(event.data).balance);
+    });
+    // 订单在其他 worker 进程中被修改（这些进程的事件不会推送到本连接）
+    source.addEventListener('sync', () => {
+        refreshOrders();
+        loadBalance();
+    });
+    // 重连成功后补一次增量同步，避免错过断线期间的变化
+    source.addEventListener('open', refreshOrders);
+}
+subscribeEvents();
+
+// 有菜品图片在后台处理时轮询处理进度，全部完成后刷新菜品列表
+let dishProcessingTimer = null;
+
+function watchDishProcessing() {
+    if (dishProcessingTimer) {
+        return;
+    }
+    const ids = $('[data-processing-dish]').map(function() {
+        return $(this).data('processing-dish');
+    }).get().filter(id => id);
+    if (ids.length === 0) {
+        return;
+    }
+    dishProcessingTimer = setInterval(function() {
+        fetch('/dish_status?ids=' + encodeURIComponent(ids.join(',')))
+            .then(response => response.json())
+            .then(data => {
+                if (data.success && data.progress.processing === 0) {
+                    clearInterval(dishProcessingTimer);
+                    dishProcessingTimer = null;
+                    loadDishes(false);
+                }
+            })
+            .catch(error => console.error('查询图片处理进度失败:', error));
+    }, 2000);
+}
+
+// 页面框架渲染后各面板分别加载自己的数据
+$(document).ready(function() {
+    loadBalance();
+    loadOrders(false);
+    loadDishes(false);
+});
+
+// 种子商店管理相关函数
+function showAddSeedForm() {
+    document.getElementById('addSeedForm').style.display = 'block';
+}
+
+function hideAddSeedForm() {
+    document.getElementById('addSeedForm').style.display = 'none';
+    // 清空表单
+    document.getElementById('seedId').value = '';
+    document.getElementById('seedName').value = '';
+    document.getElementById('seedPrice').value = '10';
+    document.getElementById('waterCount').value = '1';
+    document.getElementById('fertilizerCount').value = '1';
+    document.getElementById('seedDescription').value = '';
+    document.getElementById('seedIcon').value = '🌱';
+    document.getElementById('harvestName').value = '';
+    document.getElementById('harvestDescription').value = '';
+}
+
+let seedsCursor = null;
+
+function loadSeedStore(more) {
+    fetch(more && seedsCursor ? `/chef/seeds?cursor=${encodeURIComponent(seedsCursor)}` : '/chef/seeds')
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            seedsCursor = data.next_cursor;
+            displaySeeds(data.seeds, more);
+            document.getElementById('seedsMore').style.display = seedsCursor ? '' : 'none';
+        } else {
+            alert('加载种子数据失败: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('加载种子数据失败');
+    });
+}
+
+function displaySeeds(seeds, append) {
+    let html = '';
+    
+    Object.values(seeds).forEach(seed => {
+        html += `
+            <div class="col-md-6 mb-3">
+                <div class="card ${seed.available ? '' : 'bg-light'}">
+                    <div class="card-body">
+                        <div class="d-flex justify-content-between align-items-start">
+                            <div>
+                                <h6 class="card-title">
+                                    <span class="me-2">${seed.icon}</span>
+                                    ${seed.name}
+                                    ${seed.available ? '' : '<span class="badge bg-secondary ms-2">已下架</span>'}
+                                </h6>
+                                <p class="card-text small mb-2">${seed.description}</p>
+                                <div class="text-muted small">
+                                    <div>价格: ${seed.price} 宝宝币</div>
+                                    <div>浇水: ${seed.required_water_count} 次 | 施肥: ${seed.required_fertilizer_count} 次</div>
+                                    <div>收获物: ${seed.harvest_item.name}</div>
+                                </div>
+                            </div>
+                            <div class="btn-group-vertical btn-group-sm">
+                                <button class="btn ${seed.available ? 'btn-warning' : 'btn-success'}" 
+                                        onclick="toggleSeedAvailability('${seed.id}', ${!seed.available})">
+                                    <i class="fas ${seed.available ? 'fa-eye-slash' : 'fa-eye'}"></i>
+                                    ${seed.available ? '下架' : '上架'}
+                                </button>
+                                <button class="btn btn-info" onclick="editSeed('${seed.id}')">
+                                    <i class="fas fa-edit"></i> 编辑
+                                </button>
+                                <button class="btn btn-danger" onclick="deleteSeed('${seed.id}')">
+                                    <i class="fas fa-trash"></i> 删除
+                                </button>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        `;
+    });
+    
+    const row = document.getElementById('seedsRow');
+    if (append && row) {
+        row.insertAdjacentHTML('beforeend', html);
+    } else {
+        document.getElementById('seedsList').innerHTML = `<div class="row" id="seedsRow">${html}</div>`;
+    }
+}
+
+function saveSeed() {
+    const seedData = {
+        id: document.getElementById('seedId').value,
+        name: document.getElementById('seedName').value,
+        description: document.getElementById('seedDescription').value,
+        price: parseInt(document.getElementById('seedPrice').value),
+        required_water_count: parseInt(document.getElementById('waterCount').value),
+        required_fertilizer_count: parseInt(document.getElementById('fertilizerCount').value),
+        icon: document.getElementById('seedIcon').value,
+        harvest_item: {
+            name: document.getElementById('harvestName').value,
+            description: document.getElementById('harvestDescription').value,
+            category: 'fruit'
+        },
+        growth_stages: ['种子', '成熟'],
+        available: true
+    };
+    
+    // 验证必填字段
+    if (!seedData.id || !seedData.name || !seedData.harvest_item.name) {
+        alert('请填写所有必填字段（种子ID、种子名称、果实名称）');
+        return;
+    }
+    
+    fetch('/chef/seeds/add', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(seedData)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('种子添加成功！');
+            hideAddSeedForm();
+            loadSeedStore();
+        } else {
+            alert('添加失败: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('添加失败');
+    });
+}
+
+function toggleSeedAvailability(seedId, available) {
+    fetch('/chef/seeds/toggle', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            seed_id: seedId,
+            available: available
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            loadSeedStore();
+        } else {
+            alert('操作失败: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('操作失败');
+    });
+}
+
+function editSeed(seedId) {
+    // 这里可以实现编辑功能，暂时用简单的提示
+    alert('编辑功能开发中，请先删除后重新添加');
+}
+
+function deleteSeed(seedId) {
+    if (!confirm('确定要删除这个种子吗？删除后无法恢复！')) {
+        return;
+    }
+    
+    fetch('/chef/seeds/delete', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            seed_id: seedId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('种子删除成功！');
+            loadSeedStore();
+        } else {
+            alert('删除失败: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('删除失败');
+    });
+}
+
+// 优惠券管理相关函数
+function showAddCouponForm() {
+    document.getElementById('addCouponForm').style.display = 'block';
+    document.getElementById('couponOperationResult').style.display = 'none';
+}
+
+function hideAddCouponForm() {
+    document.getElementById('addCouponForm').style.display = 'none';
+    document.getElementById('couponForm').reset();
+    document.getElementById('discountValueDiv').style.display = 'none';
+}
+
+// 监听优惠券类型变化
+document.addEventListener('DOMContentLoaded', function() {
+    const couponTypeSelect = document.getElementById('couponType');
+    if (couponTypeSelect) {
+        couponTypeSelect.addEventListener('change', function() {
+            const discountValueDiv = document.getElementById('discountValueDiv');
+            if (this.value === 'discount') {
+                discountValueDiv.style.display = 'block';
+            } else {
+                discountValueDiv.style.display = 'none';
+            }
+        });
+    }
+});
+
+function addCoupons() {
+    const type = document.getElementById('couponType').value;
+    const quantity = parseInt(document.getElementById('couponQuantity').value);
+    const expiryDays = parseInt(document.getElementById('expiryDays').value);
+    
+    if (!type || !quantity || !expiryDays) {
+        alert('请填写完整信息');
+        return;
+    }
+    
+    let value = 1.0;
+    if (type === 'discount') {
+        value = parseFloat(document.getElementById('discountValue').value);
+        if (!value) {
+            alert('请选择折扣比例');
+            return;
+        }
+    }
+    
+    const requestData = {
+        type: type,
+        value: value,
+        quantity: quantity,
+        expiry_days: expiryDays
+    };
+    
+    fetch('/chef/add_coupons', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(requestData)
+    })
+    .then(response => response.json())
+    .then(data => {
+        const resultDiv = document.getElementById('couponOperationResult');
+        if (data.success) {
+            resultDiv.innerHTML = `
+                <div class="alert alert-success">
+                    <i class="fas fa-check-circle me-2"></i>
+                    ${data.message}
+                </div>
+            `;
+            hideAddCouponForm();
+        } else {
+            resultDiv.innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-circle me-2"></i>
+                    ${data.message}
+                </div>
+            `;
+        }
+        resultDiv.style.display = 'block';
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        const resultDiv = document.getElementById('couponOperationResult');
+        resultDiv.innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-circle me-2"></i>
+                操作失败，请重试
+            </div>
+        `;
+        resultDiv.style.display = 'block';
+    });
+}
+
+function clearAllCoupons() {
+    if (!confirm('确定要清空所有优惠券吗？此操作无法撤销！')) {
+        return;
+    }
+    
+    fetch('/chef/clear_all_coupons', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({})
+    })
+    .then(response => response.json())
+    .then(data => {
+        const resultDiv = document.getElementById('couponOperationResult');
+        if (data.success) {
+            resultDiv.innerHTML = `
+                <div class="alert alert-success">
+                    <i class="fas fa-check-circle me-2"></i>
+                    ${data.message}
+                </div>
+            `;
+        } else {
+            resultDiv.innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-circle me-2"></i>
+                    ${data.message}
+                </div>
+            `;
+        }
+        resultDiv.style.display = 'block';
+        hideAddCouponForm();
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        const resultDiv = document.getElementById('couponOperationResult');
+        resultDiv.innerHTML = `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-circle me-2"></i>
+                操作失败，请重试
+            </div>
+        `;
+        resultDiv.style.display = 'block';
+    });
+}
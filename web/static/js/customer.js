@@ -0,0 +1,543 @@
+// 购物车数据
+let cart = [];
+let selectedCoupon = null;
+
+// 添加到购物车
+function addToCart(dishName, dishIndex, price) {
+    cart.push({
+        name: dishName,
+        price: price
+    });
+    updateCartDisplay();
+    
+    // 添加视觉反馈
+    const dishCard = document.querySelector(`[data-dish-index="${dishIndex}"]`);
+    dishCard.classList.add('dish-added');
+    setTimeout(() => {
+        dishCard.classList.remove('dish-added');
+    }, 1000);
+    
+    // 显示提示
+    showToast(`已将 "${dishName}" (${price}宝宝币) 加入购物车`, 'success');
+}
+
+// 计算总费用
+function getTotalCost() {
+    return cart.reduce((total, item) => total + item.price, 0);
+}
+
+// 从购物车移除
+function removeFromCart(index) {
+    const removedItem = cart[index];
+    cart.splice(index, 1);
+    updateCartDisplay();
+    showToast(`已从购物车移除 "${removedItem.name}"`, 'info');
+}
+
+// 更新购物车显示
+function updateCartDisplay() {
+    const cartItemsContainer = document.getElementById('cartItems');
+    const cartSummary = document.getElementById('cartSummary');
+    const cartCount = document.getElementById('cartCount');
+    const checkoutBtn = document.getElementById('checkoutBtn');
+    
+    cartCount.textContent = cart.length;
+    
+    if (cart.length === 0) {
+        cartItemsContainer.innerHTML = `
+            <div class="empty-cart text-center py-4">
+                <i class="fas fa-shopping-cart text-muted" style="font-size: 2rem;"></i>
+                <p class="mt-2 text-muted">购物车为空<br>选择您喜欢的菜品吧！</p>
+            </div>
+        `;
+        cartSummary.style.display = 'none';
+        checkoutBtn.disabled = true;
+        return;
+    }
+    
+    // 统计菜品数量
+    const dishCounts = {};
+    cart.forEach(item => {
+        if (dishCounts[item.name]) {
+            dishCounts[item.name].count++;
+            dishCounts[item.name].totalPrice += item.price;
+        } else {
+            dishCounts[item.name] = {
+                count: 1,
+                price: item.price,
+                totalPrice: item.price
+            };
+        }
+    });
+    
+    let html = '';
+    cart.forEach((item, index) => {
+        html += `
+            <div class="cart-item d-flex justify-content-between align-items-center mb-2 p-2 bg-light rounded">
+                <span class="flex-grow-1">${index + 1}. ${item.name}</span>
+                <span class="text-warning me-2">${item.price}币</span>
+                <button class="btn btn-outline-danger btn-sm" onclick="removeFromCart(${index})">
+                    <i class="fas fa-times"></i>
+                </button>
+            </div>
+        `;
+    });
+    
+    cartItemsContainer.innerHTML = html;
+    
+    const totalCost = getTotalCost();
+    
+    // 更新统计信息
+    document.getElementById('totalItems').textContent = cart.length;
+    document.getElementById('uniqueItems').textContent = Object.keys(dishCounts).length;
+    
+    // 添加总费用显示
+    if (!document.getElementById('totalCost')) {
+        cartSummary.innerHTML += `
+            <div class="d-flex justify-content-between">
+                <span>总费用：</span>
+                <span id="totalCost" class="text-warning fw-bold">${totalCost} 宝宝币</span>
+            </div>
+        `;
+    } else {
+        document.getElementById('totalCost').textContent = `${totalCost} 宝宝币`;
+    }
+    
+    cartSummary.style.display = 'block';
+    checkoutBtn.disabled = false; // 始终允许用户点击下单按钮
+    
+    // 更新按钮显示文本，但不禁用
+    if (totalCost > currentBalance) {
+        checkoutBtn.innerHTML = `
+            <i class="fas fa-exclamation-triangle me-2"></i>确认下单 (余额不足)
+        `;
+        checkoutBtn.classList.remove('btn-success');
+        checkoutBtn.classList.add('btn-warning'); // 使用警告色而不是危险色
+    } else {
+        checkoutBtn.innerHTML = `
+            <i class="fas fa-check me-2"></i>确认下单
+        `;
+        checkoutBtn.classList.remove('btn-warning');
+        checkoutBtn.classList.add('btn-success');
+    }
+}
+
+// 清空购物车
+function clearCart() {
+    if (cart.length === 0) {
+        showToast('购物车已经是空的', 'info');
+        return;
+    }
+    
+    if (confirm('确定要清空购物车吗？')) {
+        cart = [];
+        updateCartDisplay();
+        showToast('购物车已清空', 'info');
+    }
+}
+
+// 随机推荐
+function randomRecommend() {
+    if (dishesData.length === 0) {
+        showToast('暂无菜品可推荐', 'warning');
+        return;
+    }
+    
+    const randomDish = dishesData[Math.floor(Math.random() * dishesData.length)];
+    const dishIndex = dishesData.indexOf(randomDish);
+    
+    // 滚动到推荐的菜品
+    const dishCard = document.querySelector(`[data-dish-index="${dishIndex}"]`);
+    if (dishCard) {
+        dishCard.scrollIntoView({ behavior: 'smooth', block: 'center' });
+        
+        // 高亮推荐的菜品
+        dishCard.classList.add('dish-recommended');
+        setTimeout(() => {
+            dishCard.classList.remove('dish-recommended');
+        }, 3000);
+    }
+    
+    showToast(`为您推荐: ${randomDish.name}`, 'info');
+}
+
+// 更新订单模态框
+function updateOrderModal() {
+    const orderSummary = document.getElementById('orderSummary');
+    
+    if (cart.length === 0) {
+        orderSummary.innerHTML = '<p class="text-muted">购物车为空</p>';
+        updateCouponSection();
+        return;
+    }
+    
+    // 统计菜品数量
+    const dishCounts = {};
+    cart.forEach(item => {
+        if (dishCounts[item.name]) {
+            dishCounts[item.name].count++;
+            dishCounts[item.name].totalPrice += item.price;
+        } else {
+            dishCounts[item.name] = {
+                count: 1,
+                price: item.price,
+                totalPrice: item.price
+            };
+        }
+    });
+    
+    let html = '<ul class="list-unstyled mb-0">';
+    Object.entries(dishCounts).forEach(([dishName, data]) => {
+        html += `
+            <li class="d-flex justify-content-between align-items-center mb-1">
+                <span>${dishName}</span>
+                <span>
+                    <span class="badge bg-primary me-2">${data.count}</span>
+                    <span class="text-warning">${data.totalPrice}宝宝币</span>
+                </span>
+            </li>
+        `;
+    });
+    html += '</ul>';
+    
+    const originalCost = getTotalCost();
+    const {finalCost, discount} = calculateFinalCost(originalCost);
+    
+    html += `
+        <div class="mt-3 pt-2 border-top">
+            <div class="d-flex justify-content-between">
+                <strong>总计: ${cart.length} 道菜</strong>
+                <strong class="text-warning">${originalCost} 宝宝币</strong>
+            </div>`;
+    
+    if (selectedCoupon) {
+        html += `
+            <div class="d-flex justify-content-between text-success">
+                <span>优惠券折扣:</span>
+                <span>-${originalCost - finalCost} 宝宝币</span>
+            </div>
+            <div class="d-flex justify-content-between text-success">
+                <strong>实付金额:</strong>
+                <strong>${finalCost} 宝宝币</strong>
+            </div>`;
+    }
+    
+    html += `
+            <div class="d-flex justify-content-between text-muted">
+                <span>当前余额:</span>
+                <span>${currentBalance} 宝宝币</span>
+            </div>
+            <div class="d-flex justify-content-between">
+                <span>支付后余额:</span>
+                <span class="${finalCost > currentBalance ? 'text-danger' : 'text-success'}">${currentBalance - finalCost} 宝宝币</span>
+            </div>
+        </div>
+    `;
+    
+    orderSummary.innerHTML = html;
+    updateCouponSection();
+}
+
+// 优惠券相关功能
+function updateCouponSection() {
+    const couponList = document.getElementById('couponList');
+    
+    // 过滤可用的优惠券
+    const availableCoupons = userCoupons.filter(coupon => 
+        !coupon.used && new Date(coupon.expires) > new Date()
+    );
+    
+    if (availableCoupons.length === 0) {
+        couponList.innerHTML = `
+            <div class="text-center text-muted">
+                <i class="fas fa-ticket-alt me-2"></i>暂无可用优惠券
+                <p class="mb-0 mt-1 small">通过每日签到获得优惠券</p>
+            </div>
+        `;
+        return;
+    }
+    
+    let html = '';
+    availableCoupons.forEach(coupon => {
+        const isSelected = selectedCoupon && selectedCoupon.id === coupon.id;
+        html += `
+            <div class="coupon-item ${isSelected ? 'selected' : ''}" onclick="selectCoupon('${coupon.id}')">
+                <div class="d-flex justify-content-between align-items-center">
+                    <div class="flex-grow-1">
+                        <div class="d-flex align-items-center">
+                            <div class="coupon-icon me-2">
+                                ${coupon.type === 'discount' ? '<i class="fas fa-percentage"></i>' : '<i class="fas fa-gift"></i>'}
+                            </div>
+                            <div>
+                                <strong>${coupon.description}</strong>
+                                <br><small class="text-muted">有效期至: ${coupon.expires}</small>
+                            </div>
+                        </div>
+                    </div>
+                    <div class="coupon-value">
+                        ${coupon.type === 'discount' ? Math.round(coupon.value * 100) + '折' : '免单'}
+                    </div>
+                    <div class="coupon-radio">
+                        <i class="fas fa-${isSelected ? 'check-circle text-success' : 'circle text-muted'}"></i>
+                    </div>
+                </div>
+            </div>
+        `;
+    });
+    
+    // 添加"不使用优惠券"选项
+    const noSelectSelected = !selectedCoupon;
+    html += `
+        <div class="coupon-item ${noSelectSelected ? 'selected' : ''}" onclick="selectCoupon(null)">
+            <div class="d-flex justify-content-between align-items-center">
+                <div class="flex-grow-1">
+                    <strong>不使用优惠券</strong>
+                </div>
+                <div class="coupon-radio">
+                    <i class="fas fa-${noSelectSelected ? 'check-circle text-success' : 'circle text-muted'}"></i>
+                </div>
+            </div>
+        </div>
+    `;
+    
+    couponList.innerHTML = html;
+}
+
+function selectCoupon(couponId) {
+    if (couponId === null) {
+        selectedCoupon = null;
+    } else {
+        selectedCoupon = userCoupons.find(c => c.id === couponId);
+    }
+    updateOrderModal(); // 重新更新订单摘要
+}
+
+function calculateFinalCost(originalCost) {
+    if (!selectedCoupon) {
+        return {finalCost: originalCost, discount: 0};
+    }
+    
+    if (selectedCoupon.type === 'free') {
+        return {finalCost: 0, discount: originalCost};
+    } else if (selectedCoupon.type === 'discount') {
+        const finalCost = Math.ceil(originalCost * selectedCoupon.value);
+        const discount = originalCost - finalCost;
+        return {finalCost, discount};
+    }
+    
+    return {finalCost: originalCost, discount: 0};
+}
+
+// 提交订单
+function submitOrder() {
+    if (cart.length === 0) {
+        showToast('购物车为空，无法下单', 'warning');
+        return;
+    }
+    
+    const originalCost = getTotalCost();
+    const {finalCost, discount} = calculateFinalCost(originalCost);
+    
+    if (finalCost > currentBalance) {
+        showToast(`余额不足！需要 ${finalCost} 宝宝币，但您只有 ${currentBalance} 宝宝币`, 'error');
+        return;
+    }
+    
+    const customerName = document.getElementById('customerName').value.trim() || '匿名客户';
+    const customerId = currentCustomerId;
+    
+    const orderData = {
+        customer_name: customerName,
+        customer_id: customerId,
+        selected_dishes: cart.map(item => item.name),
+        original_cost: originalCost,
+        final_cost: finalCost,
+        discount: discount,
+        coupon_id: selectedCoupon ? selectedCoupon.id : null
+    };
+    
+    fetch('/place_order', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(orderData)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // 更新本地余额
+            currentBalance = data.new_balance;
+            document.getElementById('userBalance').textContent = currentBalance;
+            
+            // 如果使用了优惠券，标记为已使用
+            if (selectedCoupon) {
+                const couponIndex = userCoupons.findIndex(c => c.id === selectedCoupon.id);
+                if (couponIndex !== -1) {
+                    userCoupons[couponIndex].used = true;
+                }
+                selectedCoupon = null; // 重置选择的优惠券
+            }
+            
+            // 关闭下单模态框
+            const orderModal = bootstrap.Modal.getInstance(document.getElementById('orderModal'));
+            orderModal.hide();
+            
+            // 显示成功信息
+            let successMessage = `<strong>订单号: #${data.order_id}</strong><br>`;
+            if (data.discount_applied && data.discount_applied > 0) {
+                successMessage += `<small class="text-success">使用优惠券节省: ${data.discount_applied} 宝宝币</small><br>`;
+                successMessage += `<small class="text-muted">实付: ${data.final_cost} 宝宝币，余额: ${currentBalance} 宝宝币</small>`;
+            } else {
+                successMessage += `<small class="text-muted">消费: ${data.total_cost} 宝宝币，余额: ${currentBalance} 宝宝币</small>`;
+            }
+            
+            document.getElementById('orderIdDisplay').innerHTML = successMessage;
+            
+            const successModal = new bootstrap.Modal(document.getElementById('successModal'));
+            successModal.show();
+            
+            // 清空购物车
+            cart = [];
+            updateCartDisplay();
+            
+        } else {
+            showToast(data.message || '下单失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('下单失败，请重试', 'error');
+    });
+}
+
+// 显示提示消息
+function showToast(message, type = 'info') {
+    const toastContainer = document.getElementById('toastContainer') || createToastContainer();
+    
+    const toastId = 'toast_' + Date.now();
+    const toastHtml = `
+        <div id="${toastId}" class="toast align-items-center text-white bg-${type === 'error' ? 'danger' : type === 'success' ? 'success' : 'info'} border-0" role="alert">
+            <div class="d-flex">
+                <div class="toast-body">
+                    <i class="fas fa-${type === 'error' ? 'exclamation-circle' : type === 'success' ? 'check-circle' : 'info-circle'} me-2"></i>
+                    ${message}
+                </div>
+                <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast"></button>
+            </div>
+        </div>
+    `;
+    
+    toastContainer.insertAdjacentHTML('beforeend', toastHtml);
+    
+    const toastElement = document.getElementById(toastId);
+    const toast = new bootstrap.Toast(toastElement);
+    toast.show();
+    
+    // 自动删除DOM元素
+    toastElement.addEventListener('hidden.bs.toast', () => {
+        toastElement.remove();
+    });
+}
+
+// 创建Toast容器
+function createToastContainer() {
+    const container = document.createElement('div');
+    container.id = 'toastContainer';
+    container.className = 'toast-container position-fixed top-0 end-0 p-3';
+    container.style.zIndex = '9999';
+    document.body.appendChild(container);
+    return container;
+}
+
+// 计算交易统计（累计收支由服务端账本检查点提供）
+function calculateTransactionStats() {
+    const totalIncome = ledgerTotals.income;
+    const totalExpense = ledgerTotals.expense;
+    
+    // 更新模态框中的统计信息
+    const totalIncomeElement = document.getElementById('totalIncome');
+    const totalExpenseElement = document.getElementById('totalExpense');
+    
+    if (totalIncomeElement) {
+        totalIncomeElement.textContent = totalIncome + ' 币';
+    }
+    if (totalExpenseElement) {
+        totalExpenseElement.textContent = totalExpense + ' 币';
+    }
+}
+
+// 加载更早的交易记录
+function loadMoreTransactions() {
+    const button = document.getElementById('loadMoreTransactions');
+    fetch(`/transactions?before=${button.dataset.cursor}&limit=20`)
+    .then(response => response.json())
+    .then(data => {
+        const list = document.getElementById('transactionList');
+        data.transactions.forEach(transaction => {
+            const positive = transaction.amount > 0;
+            list.insertAdjacentHTML('beforeend', `
+                <div class="list-group-item">
+                    <div class="d-flex justify-content-between align-items-center">
+                        <div class="flex-grow-1">
+                            <div class="d-flex align-items-center">
+                                <i class="fas fa-${positive ? 'plus' : 'minus'}-circle text-${positive ? 'success' : 'danger'} me-2"></i>
+                                <div>
+                                    <h6 class="mb-1">${transaction.description}</h6>
+                                    <small class="text-muted">
+                                        <i class="fas fa-clock me-1"></i>${transaction.date}
+                                    </small>
+                                </div>
+                            </div>
+                        </div>
+                        <div class="transaction-amount text-end">
+                            <span class="badge bg-${positive ? 'success' : 'danger'} fs-6">${positive ? '+' : ''}${transaction.amount} 币</span>
+                        </div>
+                    </div>
+                </div>
+            `);
+        });
+        if (data.next_cursor) {
+            button.dataset.cursor = data.next_cursor;
+        } else {
+            button.remove();
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+    });
+}
+
+// 订阅余额变化推送（其他页面或厨师端修改余额时同步显示）
+if (window.EventSource) {
+    const balanceEvents = new EventSource('/events');
+    balanceEvents.addEventListener('balance_changed', event => {
+        const data = JSON.parse(event.data);
+        currentBalance = data.balance;
+        document.getElementById('userBalance').textContent = currentBalance;
+    });
+    // 余额在其他 worker 进程中被修改（这些进程的事件不会推送到本连接）
+    balanceEvents.addEventListener('sync', () => {
+        fetch('/chef/api/balance')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                currentBalance = data.balance;
+                document.getElementById('userBalance').textContent = currentBalance;
+            }
+        })
+        .catch(error => console.error('加载余额失败:', error));
+    });
+}
+
+// 页面加载完成后的初始化
+$(document).ready(function() {
+    updateCartDisplay();
+    calculateTransactionStats();
+    
+    // 当打开订单模态框时更新订单详情
+    document.getElementById('orderModal').addEventListener('show.bs.modal', updateOrderModal);
+    
+    // 当打开交易模态框时更新统计
+    document.getElementById('transactionModal').addEventListener('show.bs.modal', calculateTransactionStats);
+});
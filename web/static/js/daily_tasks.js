@@ -0,0 +1,9 @@
+function goBack() {
+    // 检查是否有历史记录可以返回
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        // 如果没有历史记录，返回到客户端主页
+        window.location.href = '/customer';
+    }
+}
@@ -0,0 +1,460 @@
+let selectedSlot = null;
+
+// 初始化页面，检查每日操作状态
+document.addEventListener('DOMContentLoaded', function() {
+    checkDailyOperationStatus();
+});
+
+function checkDailyOperationStatus() {
+    const today = new Date().toISOString().split('T')[0]; // 获取今天的日期 YYYY-MM-DD
+    
+    farmData.planted_crops.forEach(crop => {
+        if (crop.status === 'growing') {
+            // 检查浇水状态
+            const waterStatusEl = document.getElementById(`water-status-${crop.id}`);
+            const waterBtnEl = document.getElementById(`water-btn-${crop.id}`);
+            
+            if (crop.last_watered === today) {
+                if (waterStatusEl) waterStatusEl.textContent = '今日已浇';
+                if (waterBtnEl) {
+                    waterBtnEl.disabled = true;
+                    waterBtnEl.classList.add('disabled');
+                    waterBtnEl.title = '今日已浇水';
+                }
+            } else {
+                if (waterStatusEl) waterStatusEl.textContent = '可浇水';
+            }
+            
+            // 检查施肥状态
+            const fertilizerStatusEl = document.getElementById(`fertilizer-status-${crop.id}`);
+            const fertilizerBtnEl = document.getElementById(`fertilizer-btn-${crop.id}`);
+            
+            if (crop.last_fertilized === today) {
+                if (fertilizerStatusEl) fertilizerStatusEl.textContent = '今日已施';
+                if (fertilizerBtnEl) {
+                    fertilizerBtnEl.disabled = true;
+                    fertilizerBtnEl.classList.add('disabled');
+                    fertilizerBtnEl.title = '今日已施肥';
+                }
+            } else {
+                if (fertilizerStatusEl) fertilizerStatusEl.textContent = '可施肥';
+            }
+        }
+    });
+}
+
+function buySeed(seedId, seedName, price) {
+    if (currentBalance < price) {
+        showToast(`宝宝币不足！需要${price}个宝宝币购买${seedName}`, 'error');
+        return;
+    }
+    
+    if (!confirm(`确定要花费${price}个宝宝币购买${seedName}吗？`)) {
+        return;
+    }
+    
+    fetch('/buy_seed', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            seed_id: seedId,
+            quantity: 1
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            currentBalance = data.new_balance;
+            document.getElementById('userBalance').textContent = currentBalance;
+            showToast(data.message, 'success');
+            
+            // 更新种子库存显示
+            updateSeedInventory(data.seeds_inventory);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('购买失败，请重试', 'error');
+    });
+}
+
+function handleSlotClick(slotIndex) {
+    const slot = document.querySelector(`[data-slot="${slotIndex}"]`);
+    
+    // 检查该位置是否已经有作物
+    const hasCrop = slot.querySelector('.crop-info') !== null;
+    
+    if (hasCrop) {
+        return; // 已占用的位置不处理
+    }
+    
+    selectedSlot = slotIndex;
+    showPlantModal();
+}
+
+function showPlantModal() {
+    // 显示播种模态框
+    const modalBody = document.getElementById('plantModalBody');
+    
+    let modalContent = '<div class="row">';
+    
+    // 检查是否有可用的种子
+    let hasSeeds = false;
+    for (let seedId in seedsInventory) {
+        if (seedsInventory[seedId] > 0) {
+            hasSeeds = true;
+            const seed = seedsData[seedId];
+            modalContent += `
+                <div class="col-md-6 mb-3">
+                    <div class="card">
+                        <div class="card-body text-center">
+                            <div class="h1">${seed.icon}</div>
+                            <h6 class="card-title">${seed.name}</h6>
+                            <p class="text-muted small">${seed.description}</p>
+                            <div class="badge bg-info mb-2">库存: ${seedsInventory[seedId]}个</div>
+                            <br>
+                            <button class="btn btn-success btn-sm" onclick="plantSeed('${seedId}', '${seed.name}')">
+                                <i class="fas fa-seedling me-1"></i>种植
+                            </button>
+                        </div>
+                    </div>
+                </div>
+            `;
+        }
+    }
+    
+    if (!hasSeeds) {
+        modalContent = '<div class="text-center"><p class="text-muted">暂无可用种子，请先到商店购买种子</p></div>';
+    }
+    
+    modalContent += '</div>';
+    modalBody.innerHTML = modalContent;
+    
+    // 显示模态框
+    const modal = new bootstrap.Modal(document.getElementById('plantModal'));
+    modal.show();
+}
+
+function plantSeed(seedId, seedName) {
+    if (selectedSlot === null) {
+        showToast('请先选择种植位置', 'error');
+        return;
+    }
+    
+    fetch('/plant_seed', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            seed_id: seedId,
+            slot_index: selectedSlot
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast(data.message, 'success');
+            
+            // 更新种子库存
+            if (data.seeds_inventory) {
+                seedsInventory = data.seeds_inventory;
+            }
+            
+            // 关闭模态框
+            const modal = bootstrap.Modal.getInstance(document.getElementById('plantModal'));
+            if (modal) {
+                modal.hide();
+            }
+            
+            // 重置选中的位置
+            selectedSlot = null;
+            
+            // 刷新页面显示最新状态
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('播种失败，请重试', 'error');
+    });
+}
+
+function waterCrop(cropId) {
+    if (currentBalance < 52) {
+        showToast('宝宝币不足！浇水需要52个宝宝币', 'error');
+        return;
+    }
+    
+    if (!confirm('确定要花费52个宝宝币浇水吗？')) {
+        return;
+    }
+    
+    fetch('/water_crop', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            crop_id: cropId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            currentBalance = data.new_balance;
+            document.getElementById('userBalance').textContent = currentBalance;
+            showToast(data.message, 'success');
+            
+            // 刷新页面显示最新状态
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('浇水失败，请重试', 'error');
+    });
+}
+
+// 一次请求完成全部浇水和收获（/api/batch）
+function tendAllCrops() {
+    const today = new Date().toISOString().split('T')[0];
+    const toWater = farmData.planted_crops.filter(crop => crop.status === 'growing' && crop.last_watered !== today);
+    const toHarvest = farmData.planted_crops.filter(crop => crop.status === 'mature' || toWater.includes(crop));
+    if (toWater.length === 0 && toHarvest.length === 0) {
+        showToast('没有需要照料的作物', 'info');
+        return;
+    }
+    if (toWater.length > 0 && !confirm(`确定要花费${toWater.length * 52}个宝宝币给${toWater.length}株作物浇水吗？`)) {
+        return;
+    }
+    
+    const actions = toWater.map(crop => ({action: 'water_crop', params: {crop_id: crop.id}}))
+        .concat(toHarvest.map(crop => ({action: 'harvest_crop', params: {crop_id: crop.id}})));
+    fetch('/api/batch', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({actions: actions})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            showToast(data.message, 'error');
+            return;
+        }
+        const watered = data.results.slice(0, toWater.length).filter(result => result.success).length;
+        const harvested = data.results.slice(toWater.length).filter(result => result.success).length;
+        currentBalance = data.new_balance;
+        document.getElementById('userBalance').textContent = currentBalance;
+        showToast(`浇水 ${watered} 株，收获 ${harvested} 株`, 'success');
+        
+        // 刷新页面显示最新状态
+        setTimeout(() => location.reload(), 1000);
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('照料失败，请重试', 'error');
+    });
+}
+
+function harvestCrop(cropId) {
+    fetch('/harvest_crop', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            crop_id: cropId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast(data.message, 'success');
+            
+            // 刷新页面显示最新状态
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('收获失败，请重试', 'error');
+    });
+}
+
+function removeDeadCrop(cropId) {
+    if (!confirm('确定要清理这个死亡的作物吗？')) {
+        return;
+    }
+    
+    fetch('/remove_dead_crop', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            crop_id: cropId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast(data.message, 'success');
+            
+            // 刷新页面显示最新状态
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('清理失败，请重试', 'error');
+    });
+}
+
+function updateSeedInventory(seedsInventory) {
+    // 更新种子库存显示
+    const inventoryDiv = document.getElementById('seedInventory');
+    if (Object.keys(seedsInventory).length === 0) {
+        inventoryDiv.innerHTML = '<p class="text-muted">暂无种子库存，去商店购买一些种子吧！</p>';
+    } else {
+        // 这里可以动态更新库存，暂时选择刷新页面
+        setTimeout(() => location.reload(), 1500);
+    }
+}
+
+function buyFertilizer() {
+    const price = 88;
+    if (currentBalance < price) {
+        showToast(`宝宝币不足！需要${price}个宝宝币购买粪便`, 'error');
+        return;
+    }
+    
+    if (!confirm(`确定要花费${price}个宝宝币购买1个粪便吗？`)) {
+        return;
+    }
+    
+    fetch('/buy_fertilizer', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            quantity: 1
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            currentBalance = data.new_balance;
+            document.getElementById('userBalance').textContent = currentBalance;
+            document.getElementById('fertilizerCount').textContent = data.fertilizer;
+            showToast(data.message, 'success');
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('购买失败，请重试', 'error');
+    });
+}
+
+function shovelCrop(cropId) {
+    if (!confirm('确定要铲除这个作物吗？铲除后无法恢复！')) {
+        return;
+    }
+    
+    fetch('/shovel_crop', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            crop_id: cropId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast(data.message, 'success');
+            // 刷新页面显示最新状态
+            setTimeout(() => location.reload(), 1000);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('铲除失败，请重试', 'error');
+    });
+}
+
+function fertilizeCrop(cropId) {
+    fetch('/fertilize_crop', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            crop_id: cropId
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            document.getElementById('fertilizerCount').textContent = data.fertilizer;
+            showToast(data.message, 'success');
+            // 刷新页面来更新作物状态
+            setTimeout(() => location.reload(), 1500);
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('施肥失败，请重试', 'error');
+    });
+}
+
+function farmPoop() {
+    fetch('/farm_poop', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            document.getElementById('fertilizerCount').textContent = data.fertilizer;
+            document.getElementById('dailyPoopCount').textContent = data.daily_poop_count;
+            showToast(data.message, 'success');
+        } else {
+            showToast(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('农场打卡失败，请重试', 'error');
+    });
+}
+
+function showToast(message, type = 'info') {
+    // 简单的提示实现
+    alert(message);
+}
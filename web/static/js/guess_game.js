@@ -0,0 +1,314 @@
+let currentGame = null;
+
+function startNewGame() {
+    if (gamesRemaining <= 0) {
+        showToast('今日游戏次数已用完，明天再来吧！', 'warning');
+        return;
+    }
+    
+    fetch('/start_guess_game', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            currentGame = {
+                gameId: data.game_id,
+                targetNumber: data.target_number,
+                attemptsLeft: 7,
+                currentReward: 520
+            };
+            
+            document.getElementById('gameStart').style.display = 'none';
+            document.getElementById('gamePlay').style.display = 'block';
+            document.getElementById('guessInput').focus();
+            updateGameDisplay();
+        } else {
+            showToast(data.message || '开始游戏失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('开始游戏失败，请重试', 'error');
+    });
+}
+
+function makeGuess() {
+    const guessInput = document.getElementById('guessInput');
+    const guess = parseInt(guessInput.value);
+    
+    if (!guess || guess < 1 || guess > 52) {
+        showToast('请输入1-52之间的数字', 'warning');
+        guessInput.focus();
+        return;
+    }
+    
+    if (!currentGame) {
+        showToast('请先开始游戏', 'warning');
+        return;
+    }
+    
+    fetch('/make_guess', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            game_id: currentGame.gameId,
+            guess: guess
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // 使用后端返回的attempts_used更新前端状态
+            currentGame.attemptsLeft = 7 - data.attempts_used;
+            
+            // 添加猜测历史
+            addGuessToHistory(guess, data.result, data.hint);
+            
+            if (data.result === 'correct') {
+                // 猜中了
+                currentBalance = data.new_balance;
+                document.getElementById('userBalance').textContent = currentBalance;
+                showGameResult(true, data.reward, guess, data.attempts_used);
+                resetGame();
+            } else if (data.attempts_used >= 7) {
+                // 用完了所有机会
+                showGameResult(false, 0, data.correct_number, data.attempts_used);
+                resetGame();
+            } else {
+                // 继续游戏
+                updateGameDisplay();
+                updateHint(data.hint);
+                guessInput.value = '';
+                guessInput.focus();
+            }
+        } else {
+            showToast(data.message || '猜测失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('猜测失败，请重试', 'error');
+    });
+}
+
+function updateGameDisplay() {
+    document.getElementById('attemptsLeft').textContent = currentGame.attemptsLeft;
+    
+    // 计算当前奖励 - 新的7次机会奖励规则
+    const rewardMap = {7: 520, 6: 100, 5: 52, 4: 52, 3: 52, 2: 25, 1: 25};
+    currentGame.currentReward = rewardMap[currentGame.attemptsLeft] || 25;
+    document.getElementById('currentReward').textContent = currentGame.currentReward;
+}
+
+function updateHint(hint) {
+    const hintsDiv = document.getElementById('gameHints');
+    let alertClass = 'alert-info';
+    let icon = 'fas fa-lightbulb';
+    
+    if (hint.includes('太大')) {
+        alertClass = 'alert-danger';
+        icon = 'fas fa-arrow-down';
+    } else if (hint.includes('太小')) {
+        alertClass = 'alert-primary';
+        icon = 'fas fa-arrow-up';
+    }
+    
+    hintsDiv.innerHTML = `
+        <div class="alert ${alertClass}">
+            <i class="${icon} me-2"></i>
+            ${hint}
+        </div>
+    `;
+}
+
+function addGuessToHistory(guess, result, hint) {
+    const historyDiv = document.getElementById('guessHistory');
+    const historyItem = document.createElement('div');
+    
+    let resultClass = '';
+    let resultText = '';
+    
+    if (result === 'correct') {
+        resultClass = 'guess-correct';
+        resultText = '正确！';
+    } else if (hint.includes('太大')) {
+        resultClass = 'guess-too-high';
+        resultText = '太大了';
+    } else if (hint.includes('太小')) {
+        resultClass = 'guess-too-low';
+        resultText = '太小了';
+    }
+    
+    historyItem.className = `guess-history-item ${resultClass}`;
+    historyItem.innerHTML = `
+        <span class="guess-number">${guess}</span>
+        <span class="guess-result">${resultText}</span>
+    `;
+    
+    historyDiv.appendChild(historyItem);
+}
+
+function showGameResult(won, reward, number, attempts) {
+    const modal = new bootstrap.Modal(document.getElementById('gameResultModal'));
+    const header = document.getElementById('resultHeader');
+    const title = document.getElementById('resultTitle');
+    const body = document.getElementById('resultBody');
+    
+    if (won) {
+        header.className = 'modal-header bg-success text-white';
+        title.innerHTML = '<i class="fas fa-trophy me-2"></i>恭喜您！猜中了！';
+        body.innerHTML = `
+            <div class="success-animation mb-3">
+                <i class="fas fa-trophy text-warning" style="font-size: 3rem;"></i>
+            </div>
+            <h4>正确答案是 ${number}</h4>
+            <p>您用了 ${attempts} 次就猜中了！</p>
+            <div class="alert alert-success">
+                <i class="fas fa-coins me-2"></i>
+                获得奖励：<strong>${reward} 宝宝币</strong>
+            </div>
+        `;
+    } else {
+        header.className = 'modal-header bg-danger text-white';
+        title.innerHTML = '<i class="fas fa-times-circle me-2"></i>很遗憾，没有猜中';
+        body.innerHTML = `
+            <div class="fail-animation mb-3">
+                <i class="fas fa-sad-tear text-muted" style="font-size: 3rem;"></i>
+            </div>
+            <h4>正确答案是 ${number}</h4>
+            <p>不要灰心，下次一定能猜中！</p>
+            <div class="alert alert-info">
+                <i class="fas fa-info-circle me-2"></i>
+                今天还有 ${9 - gamesPlayed} 次游戏机会
+            </div>
+        `;
+    }
+    
+    modal.show();
+}
+
+function closeGameResult() {
+    const modal = bootstrap.Modal.getInstance(document.getElementById('gameResultModal'));
+    modal.hide();
+    
+    // 更新游戏次数
+    gamesPlayed++;
+    gamesRemaining--;
+    document.getElementById('gamesPlayed').textContent = gamesPlayed;
+    document.getElementById('gamesRemaining').textContent = gamesRemaining;
+    
+    if (gamesRemaining <= 0) {
+        // 刷新页面显示游戏次数用完
+        location.reload();
+    }
+}
+
+function resetGame() {
+    currentGame = null;
+    document.getElementById('gameStart').style.display = 'block';
+    document.getElementById('gamePlay').style.display = 'none';
+    document.getElementById('guessInput').value = '';
+    document.getElementById('guessHistory').innerHTML = '';
+    
+    // 重置提示
+    document.getElementById('gameHints').innerHTML = `
+        <div class="alert alert-info">
+            <i class="fas fa-lightbulb me-2"></i>
+            想一个1到52之间的数字...
+        </div>
+    `;
+}
+
+function handleKeyPress(event) {
+    if (event.key === 'Enter') {
+        makeGuess();
+    }
+}
+
+function showToast(message, type = 'info') {
+    // 简单的提示实现，可以根据需要替换为更复杂的toast组件
+    alert(message);
+}
+
+// 计算到明天的剩余时间
+function updateTimeToReset() {
+    const now = new Date();
+    const tomorrow = new Date(now);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+    tomorrow.setHours(0, 0, 0, 0);
+    
+    const timeLeft = tomorrow - now;
+    const hours = Math.floor(timeLeft / (1000 * 60 * 60));
+    const minutes = Math.floor((timeLeft % (1000 * 60 * 60)) / (1000 * 60));
+    
+    const timeElement = document.getElementById('timeToReset');
+    if (timeElement) {
+        timeElement.textContent = `${hours}小时${minutes}分钟`;
+    }
+}
+
+// 每分钟更新一次倒计时
+if (gamesRemaining <= 0) {
+    updateTimeToReset();
+    setInterval(updateTimeToReset, 60000);
+}
+
+// 购买游戏机会功能
+    // 返回上一页功能
+    function goBack() {
+        if (window.history.length > 1) {
+            window.history.back();
+        } else {
+            window.location.href = "/customer";
+        }
+    }
+
+    // 购买游戏次数
+    function buyGameChance() {
+    if (currentBalance < 52) {
+        showToast('宝宝币不足！需要52个宝宝币购买一次游戏机会。', 'error');
+        return;
+    }
+    
+    if (!confirm('确定要花费52个宝宝币购买一次游戏机会吗？')) {
+        return;
+    }
+    
+    fetch('/buy_game_chance', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            currentBalance = data.new_balance;
+            document.getElementById('userBalance').textContent = currentBalance;
+            
+            // 更新剩余游戏次数显示
+            gamesRemaining++;
+            document.getElementById('gamesRemaining').textContent = gamesRemaining;
+            
+            showToast('购买成功！获得1次额外游戏机会。', 'success');
+            
+            // 刷新页面以显示游戏界面
+            setTimeout(() => {
+                location.reload();
+            }, 1500);
+        } else {
+            showToast(data.message || '购买失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('购买失败，请重试', 'error');
+    });
+}
@@ -0,0 +1,11 @@
+// 添加卡片悬停效果
+$(document).ready(function() {
+    $('.hover-card').hover(
+        function() {
+            $(this).addClass('shadow-lg').css('transform', 'translateY(-5px)');
+        },
+        function() {
+            $(this).removeClass('shadow-lg').css('transform', 'translateY(0)');
+        }
+    );
+});
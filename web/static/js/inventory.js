@@ -0,0 +1,297 @@
+function goBack() {
+    // 检查是否有历史记录可以返回
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        // 如果没有历史记录，返回到主页
+        window.location.href = '/customer';
+    }
+}
+
+function filterItems(category) {
+    const items = document.querySelectorAll('.item-card');
+    const tabs = document.querySelectorAll('.nav-link');
+    const fragmentSection = document.getElementById('fragmentComposingSection');
+    
+    // 更新标签状态
+    tabs.forEach(tab => {
+        tab.classList.remove('active');
+        if (tab.dataset.category === category) {
+            tab.classList.add('active');
+        }
+    });
+    
+    // 过滤物品
+    items.forEach(item => {
+        if (category === 'all' || item.dataset.category === category) {
+            item.style.display = 'block';
+        } else {
+            item.style.display = 'none';
+        }
+    });
+    
+    // 如果选择碎片分类，显示合成区域
+    if (category === 'fragment_item' || category === 'all') {
+        fragmentSection.style.display = 'block';
+        loadComposableFragments();
+    } else {
+        fragmentSection.style.display = 'none';
+    }
+}
+
+function loadComposableFragments() {
+    fetch('/get_composable_fragments')
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const container = document.getElementById('composableFragments');
+                container.innerHTML = '';
+                
+                if (data.composable_fragments.length === 0) {
+                    container.innerHTML = '<p class="text-center mb-0">暂无可合成的碎片</p>';
+                    return;
+                }
+                
+                data.composable_fragments.forEach(fragment => {
+                    const canCompose = fragment.can_compose;
+                    const progressWidth = Math.min((fragment.current_count / fragment.needed_count) * 100, 100);
+                    
+                    const fragmentHtml = `
+                        <div class="compose-item">
+                            <div class="row align-items-center">
+                                <div class="col-md-3">
+                                    <h6 class="mb-1">${fragment.fragment_type === 'switch' ? '🎮 神秘游戏设备' : fragment.result_item.name}</h6>
+                                    <small class="text-light">${fragment.fragment_type === 'switch' ? '神秘的游戏设备，12个碎片可合成完整设备' : fragment.result_item.description}</small>
+                                </div>
+                                <div class="col-md-4">
+                                    <div class="progress mb-2" style="height: 8px;">
+                                        <div class="progress-bar ${canCompose ? 'bg-success' : 'bg-warning'}" 
+                                             style="width: ${progressWidth}%"></div>
+                                    </div>
+                                    <small>${fragment.current_count} / ${fragment.needed_count} 碎片</small>
+                                </div>
+                                <div class="col-md-3">
+                                    ${canCompose ? 
+                                        `<span class="badge bg-success">可合成 ${fragment.how_many_can_compose} 个</span>` :
+                                        `<span class="badge bg-secondary">碎片不足</span>`
+                                    }
+                                </div>
+                                <div class="col-md-2">
+                                    <button class="btn btn-light btn-sm ${!canCompose ? 'disabled' : ''}" 
+                                            onclick="composeFragment('${fragment.fragment_type}')"
+                                            ${!canCompose ? 'disabled' : ''}>
+                                        <i class="fas fa-magic me-1"></i>合成
+                                    </button>
+                                </div>
+                            </div>
+                        </div>
+                    `;
+                    container.insertAdjacentHTML('beforeend', fragmentHtml);
+                });
+            }
+        })
+        .catch(error => {
+            console.error('Error loading composable fragments:', error);
+        });
+}
+
+function showComposeOptions(fragmentType) {
+    composeFragment(fragmentType);
+}
+
+function composeFragment(fragmentType) {
+    if (confirm(`确定要合成 ${fragmentType} 吗？`)) {
+        fetch('/compose_fragments', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                fragment_type: fragmentType
+            })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                showToast(data.message, 'success');
+                // 刷新页面以更新物品
+                setTimeout(() => {
+                    location.reload();
+                }, 1500);
+            } else {
+                showToast(data.message || '合成失败', 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showToast('合成失败，请重试', 'error');
+        });
+    }
+}
+
+function usePhysicalItem(itemIndex, itemName) {
+    if (confirm(`确定要为 ${itemName} 创建订单吗？`)) {
+        fetch('/use_item', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                item_index: itemIndex
+            })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                showToast(data.message, 'success');
+                // 刷新页面以更新物品数量
+                setTimeout(() => {
+                    location.reload();
+                }, 1500);
+            } else {
+                if (data.action === 'compose') {
+                    showToast(data.message, 'info');
+                    // 如果是碎片，切换到碎片分类
+                    filterItems('fragment_item');
+                } else if (data.action === 'redirect') {
+                    showToast(data.message, 'info');
+                    if (data.url) {
+                        setTimeout(() => {
+                            window.location.href = data.url;
+                        }, 2000);
+                    }
+                } else {
+                    showToast(data.message || '使用失败', 'error');
+                }
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showToast('使用失败，请重试', 'error');
+        });
+    }
+}
+
+function showMakeUpModal() {
+    const today = new Date();
+    const maxDate = today.toISOString().split('T')[0];
+    document.getElementById('makeUpDate').max = maxDate;
+    
+    const modal = new bootstrap.Modal(document.getElementById('makeUpModal'));
+    modal.show();
+}
+
+function performMakeUp() {
+    const date = document.getElementById('makeUpDate').value;
+    if (!date) {
+        showToast('请选择补签日期', 'error');
+        return;
+    }
+    
+    fetch('/make_up_check_in', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            date: date
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast(`补签成功！获得${data.reward}个宝宝币`, 'success');
+            document.getElementById('userBalance').textContent = data.new_balance;
+            
+            // 关闭模态框
+            const modal = bootstrap.Modal.getInstance(document.getElementById('makeUpModal'));
+            modal.hide();
+            
+            // 刷新页面以更新补签卡数量
+            setTimeout(() => {
+                location.reload();
+            }, 1500);
+        } else {
+            showToast(data.message || '补签失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('补签失败，请重试', 'error');
+    });
+}
+
+function showToast(message, type = 'info') {
+    const toastHtml = `
+        <div class="toast align-items-center text-white bg-${type === 'error' ? 'danger' : 'success'} border-0" role="alert">
+            <div class="d-flex">
+                <div class="toast-body">${message}</div>
+                <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast"></button>
+            </div>
+        </div>
+    `;
+    
+    let toastContainer = document.getElementById('toastContainer');
+    if (!toastContainer) {
+        toastContainer = document.createElement('div');
+        toastContainer.id = 'toastContainer';
+        toastContainer.className = 'toast-container position-fixed top-0 end-0 p-3';
+        toastContainer.style.zIndex = '9999';
+        document.body.appendChild(toastContainer);
+    }
+    
+    toastContainer.insertAdjacentHTML('beforeend', toastHtml);
+    const toastElement = toastContainer.lastElementChild;
+    const toast = new bootstrap.Toast(toastElement);
+    toast.show();
+    
+    setTimeout(() => {
+        toastElement.remove();
+    }, 3000);
+}
+
+// 删除背包物品
+function deleteInventoryItem(itemIndex, itemName, quantity) {
+    // 确认删除
+    const quantityText = quantity > 1 ? `(数量: ${quantity})` : '';
+    if (!confirm(`确定要删除 "${itemName}" ${quantityText} 吗？\n\n此操作不可恢复！`)) {
+        return;
+    }
+    
+    // 发送删除请求
+    fetch('/delete_inventory_item', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            'item_index': itemIndex
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast(data.message || '物品删除成功', 'success');
+            // 刷新页面以更新物品列表
+            setTimeout(() => {
+                location.reload();
+            }, 1000);
+        } else {
+            showToast(data.message || '删除失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('删除失败，请重试', 'error');
+    });
+}
+
+// 页面加载时初始化
+document.addEventListener('DOMContentLoaded', function() {
+    // 如果当前显示全部或碎片分类，加载碎片合成区域
+    const activeTab = document.querySelector('.nav-link.active');
+    if (activeTab && (activeTab.dataset.category === 'all' || activeTab.dataset.category === 'fragment_item')) {
+        document.getElementById('fragmentComposingSection').style.display = 'block';
+        loadComposableFragments();
+    }
+});
@@ -0,0 +1,234 @@
+// 奖池数据
+const prizePoolData = {
+    normal: [
+        { name: '面包', probability: 1.25, type: 'physical-item', description: '面包（实际物品）' },
+        { name: '德湘厨兑换券碎片', probability: 1.50, type: 'fragment-item', description: '德湘厨兑换券碎片（在背包中10个合成一个实际物品才能使用）' },
+        { name: '金戈戈碎片', probability: 1.50, type: 'fragment-item', description: '金戈戈碎片（在背包中10个合成一个实际物品才能使用）' },
+        { name: '黑咖啡一杯', probability: 1.25, type: 'physical-item', description: '黑咖啡一杯（实际物品）' },
+        { name: '麦辣鸡腿堡碎片', probability: 2.50, type: 'fragment-item', description: '麦辣鸡腿堡碎片（在背包中10个合成一个实际物品才能使用）' },
+        { name: '奥尔良鸡腿堡碎片', probability: 2.50, type: 'fragment-item', description: '奥尔良鸡腿堡碎片（在背包中10个合成一个实际物品才能使用）' },
+        { name: '奶茶一杯', probability: 1.00, type: 'physical-item', description: '奶茶一杯（实际物品）' },
+        { name: '紫菜卷', probability: 1.00, type: 'physical-item', description: '紫菜卷（实际物品）' },
+        { name: '九折优惠券', probability: 7.50, type: 'coupon-item', description: '九折优惠券' },
+        { name: '宝宝币25个', probability: 40.00, type: 'balance-item', description: '获得25个宝宝币' },
+        { name: '扣除20宝宝币', probability: 10.00, type: 'balance-item', description: '扣除20个宝宝币' },
+        { name: '宝宝币10枚', probability: 30.00, type: 'balance-item', description: '获得10个宝宝币' }
+    ],
+    premium: [
+        { name: '按摩15分钟', probability: 11.25, type: 'physical-item', description: '按摩15分钟（实际物品）' },
+        { name: '番茄成品', probability: 1.25, type: 'physical-item', description: '番茄成品（实际物品）' },
+        { name: '扣除50宝宝币', probability: 20.00, type: 'balance-item', description: '扣除50宝宝币' },
+        { name: '芒果，西瓜', probability: 1.25, type: 'physical-item', description: '芒果，西瓜（实际物品）' },
+        { name: '香蕉，火龙果', probability: 1.25, type: 'physical-item', description: '香蕉，火龙果（实际物品）' },
+        { name: '100r衣服兑换券（实际物品）惊喜大礼', probability: 0.5, type: 'physical-item', description: '100r衣服兑换券（实际物品）惊喜大礼' },
+        { name: '按摩30分钟', probability: 1.25, type: 'physical-item', description: '按摩30分钟（实际物品）' },
+        { name: '六折优惠券', probability: 1.25, type: 'coupon-item', description: '六折优惠券' },
+        { name: '免单券', probability: 1.25, type: 'coupon-item', description: '免单券' },
+        { name: '外卖盲盒', probability: 1.25, type: 'physical-item', description: '外卖盲盒（实际物品）' },
+        { name: '200个宝宝币', probability: 52.5, type: 'balance-item', description: '获得200个宝宝币' },
+        { name: '麦辣鸡腿堡2', probability: 1.0, type: 'physical-item', description: '麦辣鸡腿堡2（实际物品可直接使用）' },
+        { name: '奶茶鼠玩偶', probability: 1.0, type: 'fragment-item', description: '奶茶鼠玩偶（在背包中5个合成一个实际物品才能使用）' },
+        { name: '荒野乱斗乱斗金券🤪', probability: 1.25, type: 'fragment-item', description: '荒野乱斗乱斗金券🤪（在背包中5个合成一个实际物品才能使用）' },
+        { name: '星巴克一杯', probability: 1.25, type: 'fragment-item', description: '星巴克一杯（在背包中4个合成一个实际物品才能使用）' },
+        { name: '寿司郎碎片', probability: 1.25, type: 'fragment-item', description: '寿司郎碎片（在背包中9个合成一个实际物品才能使用）' },
+        { name: '水牛奶一箱', probability: 1.25, type: 'fragment-item', description: '水牛奶一箱（在背包中4个合成一个实际物品才能使用）' }
+    ],
+    ultimate: [
+        { name: '寿司郎一顿', probability: 1.5, type: 'physical-item', description: '寿司郎一顿（实际物品）' },
+        { name: '鸡胸肉套餐', probability: 2.5, type: 'physical-item', description: '鸡胸肉套餐（实际物品）' },
+        { name: '100r衣服兑换券', probability: 1.0, type: 'physical-item', description: '100r衣服兑换券（实际物品）' },
+        { name: '520个宝宝币', probability: 50.0, type: 'balance-item', description: '获得520个宝宝币' },
+        { name: '免单券', probability: 2.5, type: 'coupon-item', description: '免单券' },
+        { name: '5200个宝宝币', probability: 2.5, type: 'balance-item', description: '获得5200个宝宝币' },
+        { name: '1314个宝宝币', probability: 15.0, type: 'balance-item', description: '获得1314个宝宝币' },
+        { name: '52个宝宝币', probability: 6.5, type: 'balance-item', description: '获得52个宝宝币' },
+        { name: '补签卡', probability: 1.0, type: 'special-item', description: '获得1张补签卡' },
+        { name: '水牛奶', probability: 3.0, type: 'physical-item', description: '水牛奶（实际物品）' },
+        { name: '宝宝按摩30分钟', probability: 5.0, type: 'physical-item', description: '宝宝按摩30分钟（实际物品）' },
+        { name: '肠粉一顿', probability: 10.0, type: 'physical-item', description: '肠粉一顿（实际物品）' }
+    ],
+    legendary: [
+        { name: '寿司郎一餐', probability: 5.0, type: 'physical-item', description: '寿司郎一餐（实际物品）' },
+        { name: '5200宝宝币', probability: 19.0, type: 'balance-item', description: '获得5200个宝宝币' },
+        { name: '1314宝宝币', probability: 40.0, type: 'balance-item', description: '获得1314个宝宝币' },
+        { name: '13140宝宝币', probability: 2.5, type: 'balance-item', description: '获得13140个宝宝币' },
+        { name: '奶茶鼠玩偶', probability: 3.0, type: 'physical-item', description: '奶茶鼠玩偶（实际物品）' },
+        { name: '新巴克', probability: 20.0, type: 'physical-item', description: '新巴克（实际物品）' },
+        { name: '按摩45分钟', probability: 5.5, type: 'physical-item', description: '按摩45分钟（实际物品）' },
+        { name: '惊喜大礼', probability: 5.0, type: 'special-item', description: '神秘惊喜大礼' }
+    ]
+};
+
+function showPrizePool(poolType) {
+    const modal = new bootstrap.Modal(document.getElementById('prizePoolModal'));
+    const title = document.getElementById('prizePoolTitle');
+    const content = document.getElementById('prizePoolContent');
+    
+    // 设置标题
+    const titles = {
+        'normal': '普通抽奖奖池',
+        'premium': '高级抽奖奖池',
+        'ultimate': '超级抽奖奖池',
+        'legendary': '究极抽奖奖池'
+    };
+    title.textContent = titles[poolType];
+    
+    // 生成奖池内容
+    const prizes = prizePoolData[poolType];
+    let html = '<div class="row">';
+    
+    prizes.forEach(prize => {
+        // 对于惊喜大礼（switch碎片），根据用户状态显示不同内容
+        let displayName = prize.name;
+        let displayDesc = prize.description;
+        
+        if (prize.name === '惊喜大礼' && hasSwitchFragments) {
+            displayName = '🎮 神秘游戏设备碎片';
+            displayDesc = '神秘的游戏设备碎片，收集12个即可合成完整设备';
+        }
+        
+        html += `
+            <div class="col-md-6 col-lg-4 mb-3">
+                <div class="prize-pool-item ${prize.type}">
+                    <div class="prize-description">
+                        <div class="prize-name">${displayName}</div>
+                        <p class="prize-desc">${displayDesc}</p>
+                    </div>
+                    <span class="badge bg-primary">${prize.probability}%</span>
+                </div>
+            </div>
+        `;
+    });
+    
+    html += '</div>';
+    content.innerHTML = html;
+    
+    modal.show();
+}
+
+
+function goBack() {
+    // 检查是否有历史记录可以返回
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        // 如果没有历史记录，返回到客户端主页
+        window.location.href = '/customer';
+    }
+}
+
+function drawCard(type, tenDraw) {
+    const costs = {'normal': 52, 'premium': 520, 'ultimate': 1314, 'legendary': 5200};
+    let maxDraw = 10;
+    if (type === 'premium') maxDraw = 7;
+    if (type === 'ultimate') maxDraw = 5;
+    if (type === 'legendary') maxDraw = 3; // 究极三连抽
+    const drawCount = tenDraw ? maxDraw : 1;
+    const cost = costs[type] * drawCount;
+
+    if (currentBalance < cost) {
+        showToast('宝宝币不足！', 'error');
+        return;
+    }
+
+    // 确认抽奖
+    let drawText = '单次';
+    if (tenDraw) {
+        if (type === 'premium') drawText = '7连';
+        else if (type === 'ultimate') drawText = '5连';
+        else if (type === 'legendary') drawText = '三连';
+        else drawText = '十连';
+    }
+    const confirmMessage = `确定要进行${drawText}抽奖吗？\n费用：${cost}个宝宝币`;
+    if (!confirm(confirmMessage)) {
+        return;
+    }
+
+    fetch('/lottery_draw', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            type: type,
+            ten_draw: tenDraw
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            currentBalance = data.new_balance;
+            document.getElementById('userBalance').textContent = currentBalance;
+            showDrawResults(data.results, tenDraw);
+        } else {
+            showToast(data.message || '抽奖失败', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('抽奖失败，请重试', 'error');
+    });
+}
+
+function showDrawResults(results, tenDraw) {
+    const resultsContainer = document.getElementById('drawResults');
+    resultsContainer.innerHTML = '';
+    
+    results.forEach((result, index) => {
+        const resultDiv = document.createElement('div');
+        resultDiv.className = 'col-md-6 mb-3';
+        
+        let cardClass = '';
+        if (result.name.includes('520') || result.name.includes('Switch') || result.name.includes('寿司郎')) {
+            cardClass = 'legendary';
+        } else if (result.name.includes('荒野乱斗') || result.name.includes('5折') || result.name.includes('600')) {
+            cardClass = 'epic';
+        } else if (result.name.includes('优惠券') || result.name.includes('70')) {
+            cardClass = 'rare';
+        }
+        
+        resultDiv.innerHTML = `
+            <div class="draw-result ${cardClass}">
+                <h6>${result.name.includes('switch碎片') ? (hasSwitchFragments ? '🎮 神秘游戏设备碎片' : '🎁 惊喜大礼') : result.name}</h6>
+                <p class="mb-0">${result.name.includes('switch碎片') ? (hasSwitchFragments ? '神秘的游戏设备碎片，收集12个即可合成完整设备' : '神秘的惊喜大礼，获得后将揭开谜底') : result.description}</p>
+            </div>
+        `;
+        
+        resultsContainer.appendChild(resultDiv);
+    });
+    
+    const modal = new bootstrap.Modal(document.getElementById('resultModal'));
+    modal.show();
+}
+
+function showToast(message, type = 'info') {
+    // 创建 toast 元素
+    const toastHtml = `
+        <div class="toast align-items-center text-white bg-${type === 'error' ? 'danger' : 'success'} border-0" role="alert">
+            <div class="d-flex">
+                <div class="toast-body">${message}</div>
+                <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast"></button>
+            </div>
+        </div>
+    `;
+    
+    // 添加到页面
+    let toastContainer = document.getElementById('toastContainer');
+    if (!toastContainer) {
+        toastContainer = document.createElement('div');
+        toastContainer.id = 'toastContainer';
+        toastContainer.className = 'toast-container position-fixed top-0 end-0 p-3';
+        toastContainer.style.zIndex = '9999';
+        document.body.appendChild(toastContainer);
+    }
+    
+    toastContainer.insertAdjacentHTML('beforeend', toastHtml);
+    const toastElement = toastContainer.lastElementChild;
+    const toast = new bootstrap.Toast(toastElement);
+    toast.show();
+    
+    // 3秒后自动移除
+    setTimeout(() => {
+        toastElement.remove();
+    }, 3000);
+}
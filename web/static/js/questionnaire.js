@@ -0,0 +1,45 @@
+function goBack() {
+    // 检查是否有历史记录可以返回
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        // 如果没有历史记录，返回到客户端主页
+        window.location.href = '/customer';
+    }
+}
+
+function generateRandomReward() {
+    // 生成随机奖励
+    const random = Math.random();
+    let reward;
+    
+    if (random < 0.0052) { // 0.52% 概率获得520币
+        reward = 520;
+    } else if (random < 0.0252) { // 2% 概率获得52币
+        reward = 52;
+    } else if (random < 0.0752) { // 5% 概率获得40币
+        reward = 40;
+    } else if (random < 0.1752) { // 10% 概率获得30-39币
+        reward = Math.floor(Math.random() * 10) + 30;
+    } else if (random < 0.3252) { // 15% 概率获得20-29币
+        reward = Math.floor(Math.random() * 10) + 20;
+    } else { // 67.48% 概率获得1-19币
+        reward = Math.floor(Math.random() * 19) + 1;
+    }
+    
+    // 显示结果
+    document.getElementById('randomRewardAmount').textContent = reward;
+    document.getElementById('randomRewardResult').style.display = 'block';
+    document.getElementById('randomRewardInput').value = reward;
+    
+    // 禁用按钮并更改文本
+    const btn = document.getElementById('randomRewardBtn');
+    btn.disabled = true;
+    btn.innerHTML = '<i class="fas fa-check me-2"></i>已获得奖励';
+    btn.classList.remove('btn-warning');
+    btn.classList.add('btn-success');
+    
+    // 启用提交按钮
+    document.getElementById('submitBtn').disabled = false;
+    document.querySelector('.text-muted').textContent = '现在可以提交问卷了！';
+}
@@ -0,0 +1,344 @@
+let gameInProgress = false;
+
+$(document).ready(function() {
+    // 滚动到当前位置
+    scrollToCurrentPosition();
+    
+    // 购买骰子
+    $('#buyDiceBtn').click(function() {
+        if (gameInProgress) return;
+        
+        gameInProgress = true;
+        $(this).prop('disabled', true).html('<i class="fas fa-spinner fa-spin me-2"></i>投掷中...');
+        
+        $.ajax({
+            url: '/buy_treasure_dice',
+            method: 'POST',
+            contentType: 'application/json',
+            success: function(response) {
+                if (response.success) {
+                    showDiceResult(response);
+                    setTimeout(() => {
+                        movePlayer(response.old_position, response.new_position, response);
+                    }, 1000);
+                } else {
+                    showError(response.message);
+                    resetBuyButton();
+                }
+            },
+            error: function() {
+                showError('网络错误，请重试');
+                resetBuyButton();
+            }
+        });
+    });
+    
+    // 领取完圈奖励
+    $('#claimRewardBtn').click(function() {
+        if ($(this).prop('disabled')) return;
+        
+        $(this).prop('disabled', true).html('<i class="fas fa-spinner fa-spin me-2"></i>领取中...');
+        
+        $.ajax({
+            url: '/claim_completion_reward',
+            method: 'POST',
+            contentType: 'application/json',
+            success: function(response) {
+                if (response.success) {
+                    showCompletionReward(response);
+                    updateClaimButton(response.remaining_rewards);
+                } else {
+                    showError(response.message);
+                    resetClaimButton();
+                }
+            },
+            error: function() {
+                showError('网络错误，请重试');
+                resetClaimButton();
+            }
+        });
+    });
+});
+
+function scrollToCurrentPosition() {
+    const currentCell = $('.current-player');
+    if (currentCell.length > 0) {
+        const container = $('.treasure-map');
+        const cellPosition = currentCell.position().left;
+        const containerWidth = container.width();
+        const scrollLeft = cellPosition - (containerWidth / 2) + 25; // 25 是格子宽度的一半
+        container.animate({scrollLeft: scrollLeft}, 500);
+    }
+}
+
+function showDiceResult(response) {
+    const diceIcons = [
+        'fas fa-dice-one',
+        'fas fa-dice-two', 
+        'fas fa-dice-three',
+        'fas fa-dice-four',
+        'fas fa-dice-five',
+        'fas fa-dice-six'
+    ];
+    
+    $('#diceResult .dice-icon i').attr('class', diceIcons[response.dice_result - 1]);
+    $('#diceResult .dice-number').text(response.dice_result);
+    $('#diceResult').show().addClass('animate__animated animate__bounceIn');
+}
+
+function movePlayer(oldPos, newPos, response) {
+    // 移除旧位置的玩家图标和样式
+    const oldCell = $(`#cell-${oldPos}`);
+    oldCell.removeClass('current-player')
+           .find('.player-icon').remove();
+    
+    // 重置旧位置的样式（保持特殊格子的样式）
+    if (!oldCell.find('.special-icon').length) {
+        oldCell.css({
+            'background': 'rgba(255, 255, 255, 0.95)',
+            'border': '2px solid #e0e0e0',
+            'transform': 'none',
+            'box-shadow': '0 2px 8px rgba(0,0,0,0.1)'
+        });
+    } else {
+        // 特殊格子保持原有样式但移除玩家高亮
+        oldCell.css('transform', 'none');
+        if (oldCell.find('.treasure-icon').length) {
+            oldCell.css({
+                'background': 'linear-gradient(45deg, #FFD700, #FFA500)',
+                'border': '3px solid #FF8C00',
+                'box-shadow': '0 0 15px rgba(255, 215, 0, 0.6)'
+            });
+        } else if (oldCell.find('.crack-icon').length) {
+            oldCell.css({
+                'background': 'linear-gradient(45deg, #8B0000, #DC143C)',
+                'border': '3px solid #B22222',
+                'box-shadow': '0 0 15px rgba(220, 20, 60, 0.6)'
+            });
+        }
+    }
+    
+    // 添加新位置的玩家图标和样式
+    const newCell = $(`#cell-${newPos}`);
+    newCell.addClass('current-player')
+           .css({
+               'background': 'linear-gradient(45deg, #4CAF50, #45a049)',
+               'transform': 'scale(1.1)',
+               'box-shadow': '0 0 20px rgba(76, 175, 80, 0.8)',
+               'z-index': '20'
+           })
+           .append('<div class="player-icon"><i class="fas fa-user-circle text-white"></i></div>');
+    
+    // 滚动到新位置
+    scrollToCurrentPosition();
+    
+    // 显示结果
+    setTimeout(() => {
+        showGameResult(response);
+        resetBuyButton();
+        updateBalance(response.new_balance);
+        
+        // 如果完成一圈，更新地图奖励
+        if (response.completed_round) {
+            updateMapRewards(response.map_rewards, response.special_types);
+        }
+    }, 500);
+}
+
+function showGameResult(response) {
+    let content = `
+        <div class="mb-3">
+            <h5><i class="fas fa-dice me-2"></i>骰子点数: ${response.dice_result}</h5>
+            <p>从第${response.old_position + 1}格移动到第${response.new_position + 1}格</p>
+        </div>
+    `;
+    
+    // 根据格子类型显示不同的消息
+    if (response.grid_type === 'treasure') {
+        content += `
+            <div class="alert alert-warning" style="background: linear-gradient(45deg, #FFD700, #FFA500); color: #8B4513;">
+                <i class="fas fa-gem me-2"></i>
+                <strong>发现宝藏格子！</strong><br>
+                恭喜！获得 ${response.grid_reward} 宝宝币超级奖励！
+            </div>
+        `;
+    } else if (response.grid_type === 'crack') {
+        content += `
+            <div class="alert alert-danger" style="background: linear-gradient(45deg, #8B0000, #DC143C); color: #FFFFFF;">
+                <i class="fas fa-skull-crossbones me-2"></i>
+                <strong>踩到裂开格子！</strong><br>
+                很遗憾，扣除 ${Math.abs(response.grid_reward)} 宝宝币
+            </div>
+        `;
+    } else if (response.grid_reward > 0) {
+        content += `
+            <div class="alert alert-success">
+                <i class="fas fa-coins me-2"></i>
+                恭喜！获得 ${response.grid_reward} 宝宝币奖励！
+            </div>
+        `;
+    } else if (response.grid_reward < 0) {
+        content += `
+            <div class="alert alert-danger">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                很遗憾，扣除 ${Math.abs(response.grid_reward)} 宝宝币
+            </div>
+        `;
+    } else {
+        content += `
+            <div class="alert alert-info">
+                <i class="fas fa-info-circle me-2"></i>
+                这是一个安全格子，没有奖励或惩罚
+            </div>
+        `;
+    }
+    
+    if (response.completed_round) {
+        content += `
+            <div class="alert alert-warning">
+                <i class="fas fa-trophy me-2"></i>
+                <strong>完成一圈！</strong>地图奖励已刷新，可以在右下角领取完圈奖励！
+            </div>
+        `;
+    }
+    
+    $('#modalContent').html(content);
+    $('#resultModal').modal('show');
+}
+
+function showCompletionReward(response) {
+    let content = `
+        <div class="text-center mb-3">
+            <i class="fas fa-gift text-warning" style="font-size: 3rem;"></i>
+            <h4 class="mt-2">完圈奖励</h4>
+        </div>
+    `;
+    
+    const reward = response.reward;
+    if (reward.type === 'balance') {
+        content += `
+            <div class="alert alert-success">
+                <i class="fas fa-coins me-2"></i>
+                恭喜获得 ${reward.value} 宝宝币！
+            </div>
+        `;
+    } else if (reward.type === 'coupon') {
+        content += `
+            <div class="alert alert-info">
+                <i class="fas fa-ticket-alt me-2"></i>
+                恭喜获得 ${reward.name}！
+            </div>
+        `;
+    } else if (reward.type === 'physical_item') {
+        content += `
+            <div class="alert alert-warning">
+                <i class="fas fa-star me-2"></i>
+                恭喜获得实物奖励：${reward.name}！
+            </div>
+        `;
+    }
+    
+    $('#modalContent').html(content);
+    $('#resultModal').modal('show');
+    updateBalance(response.new_balance);
+}
+
+function showError(message) {
+    $('#modalContent').html(`
+        <div class="alert alert-danger">
+            <i class="fas fa-exclamation-triangle me-2"></i>
+            ${message}
+        </div>
+    `);
+    $('#resultModal').modal('show');
+}
+
+function resetBuyButton() {
+    gameInProgress = false;
+    $('#buyDiceBtn').prop('disabled', false).html('<i class="fas fa-dice me-2"></i>购买骰子 (52宝宝币)');
+}
+
+function resetClaimButton() {
+    $('#claimRewardBtn').prop('disabled', false).html('<i class="fas fa-gift me-2"></i>领取完圈奖励');
+}
+
+function updateClaimButton(remainingRewards) {
+    const btn = $('#claimRewardBtn');
+    if (remainingRewards > 0) {
+        btn.prop('disabled', false)
+           .html(`<i class="fas fa-gift me-2"></i>领取完圈奖励 <span class="badge bg-danger ms-2">${remainingRewards}</span>`);
+    } else {
+        btn.prop('disabled', true)
+           .html('<i class="fas fa-gift me-2"></i>领取完圈奖励');
+    }
+}
+
+function updateBalance(newBalance) {
+    $('.fw-bold.text-primary').first().text(newBalance);
+}
+
+function updateMapRewards(newRewards, newSpecialTypes) {
+    newRewards.forEach((reward, index) => {
+        const cell = $(`#cell-${index}`);
+        const rewardSpan = cell.find('.cell-reward');
+        
+        // 移除旧的特殊图标
+        cell.find('.special-icon').remove();
+        
+        // 重置样式
+        cell.css({
+            'background': 'rgba(255, 255, 255, 0.95)',
+            'border': '2px solid #e0e0e0',
+            'box-shadow': '0 2px 8px rgba(0,0,0,0.1)'
+        });
+        
+        // 根据特殊类型设置样式和内容
+        if (newSpecialTypes && newSpecialTypes[index] === 'treasure') {
+            cell.css({
+                'background': 'linear-gradient(45deg, #FFD700, #FFA500)',
+                'border': '3px solid #FF8C00',
+                'box-shadow': '0 0 15px rgba(255, 215, 0, 0.6)'
+            });
+            rewardSpan.html(`<span class="text-warning fw-bold">+1314</span>`);
+            cell.append('<div class="special-icon treasure-icon"><i class="fas fa-gem"></i></div>');
+        } else if (newSpecialTypes && newSpecialTypes[index] === 'crack') {
+            cell.css({
+                'background': 'linear-gradient(45deg, #8B0000, #DC143C)',
+                'border': '3px solid #B22222',
+                'box-shadow': '0 0 15px rgba(220, 20, 60, 0.6)'
+            });
+            rewardSpan.html(`<span class="text-light fw-bold">-520</span>`);
+            cell.append('<div class="special-icon crack-icon"><i class="fas fa-skull-crossbones"></i></div>');
+        } else {
+            // 普通格子
+            if (reward > 0) {
+                rewardSpan.html(`<span class="text-success fw-bold">+${reward}</span>`);
+            } else if (reward < 0) {
+                rewardSpan.html(`<span class="text-danger fw-bold">${reward}</span>`);
+            } else {
+                rewardSpan.html(`<span class="text-muted">0</span>`);
+            }
+        }
+        
+        // 如果是当前位置，重新设置玩家样式
+        if (cell.hasClass('current-player')) {
+            cell.css({
+                'background': 'linear-gradient(45deg, #4CAF50, #45a049)',
+                'transform': 'scale(1.1)',
+                'box-shadow': '0 0 20px rgba(76, 175, 80, 0.8)',
+                'z-index': '20'
+            });
+        }
+    });
+    
+    // 刷新后滚动到当前位置
+    setTimeout(scrollToCurrentPosition, 100);
+}
+
+function goBack() {
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        window.location.href = '/daily_tasks';
+    }
+}
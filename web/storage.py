@@ -0,0 +1,980 @@
+"""用户数据存储层
+
+用户数据按子系统拆分为几个部分，每部分单独加载、单独保存：
+- core: 余额、问卷、连续天数等（以及其他未归类的字段）
+- farm: 农场
+- treasure: 寻宝
+- inventory: 背包、优惠券、补签卡
+- checkin: 签到历史和统计
+- games: 猜数字等小游戏的次数和历史
+交易记录不放在用户数据中，而是由各后端的 ledger（只追加的账本）单独保存。
+
+提供可插拔的存储后端：
+- JsonPartsUserStore: 每部分一个 JSON 文件，首次使用时自动拆分旧的 user_data.json
+- SqliteUserStore: SQLite (WAL 模式)，余额、交易记录、优惠券、背包、农场作物、签到历史分表存储
+- JsonUserStore: 单文件格式，只用于导入/导出
+
+请求中通过 UserDocument 按需加载：访问哪个字段才加载它所属的部分，
+提交时只写回内容发生变化的部分。
+
+每个部分带一个版本号，提交时做比较并交换（CAS）：只在提交的短暂窗口内加跨进程锁，
+如果本次请求读过的任何部分已被其他请求（或其他 worker 进程）修改则抛出 ConflictError，
+由调用方重新执行请求。只读请求从不加锁。
+"""
+import os
+import copy
+import json
+import fcntl
+import atexit
+import sqlite3
+import threading
+from collections import deque
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+from ledger import JsonlLedger
+
+
+# 各部分包含的顶层字段，未列出的字段都属于 core
+USER_DATA_PARTS = {
+    'farm': ('farm',),
+    'treasure': ('treasure_hunt',),
+    'inventory': ('inventory', 'coupons', 'make_up_cards'),
+    'checkin': ('check_in_history', 'consecutive_days', 'total_check_ins'),
+    'games': ('guess_game_history', 'daily_guess_games', 'last_game_date', 'extra_game_chances'),
+}
+CORE_PART = 'core'
+PART_NAMES = (CORE_PART,) + tuple(USER_DATA_PARTS)
+_KEY_PARTS = {key: part for part, keys in USER_DATA_PARTS.items() for key in keys}
+
+# 单独建表存储的字段，其余顶层字段存入 fields 表
+TABLE_FIELDS = ('transactions', 'coupons', 'inventory', 'farm', 'check_in_history')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fields (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    description TEXT,
+    type TEXT,
+    timestamp INTEGER,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_id ON transactions(id);
+CREATE TABLE IF NOT EXISTS ledger_checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    seq INTEGER NOT NULL,
+    running_total INTEGER NOT NULL,
+    total_income INTEGER NOT NULL,
+    total_expense INTEGER NOT NULL,
+    balance INTEGER
+);
+CREATE TABLE IF NOT EXISTS coupons (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inventory (
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS farm (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS farm_crops (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS check_ins (
+    date TEXT PRIMARY KEY,
+    reward INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS part_versions (
+    part TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+class ConflictError(Exception):
+    """提交时发现读取过的数据已被其他请求修改"""
+
+    def __init__(self, parts):
+        super().__init__(f'用户数据已被其他请求修改: {", ".join(sorted(parts))}')
+        self.parts = parts
+
+
+def _check_versions(expected, current):
+    """比较读取时的版本和当前版本，不一致时抛出 ConflictError"""
+    conflicts = [name for name, version in expected.items() if current.get(name, 0) != version]
+    if conflicts:
+        raise ConflictError(conflicts)
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def part_for_key(key):
+    """字段所属的部分"""
+    return _KEY_PARTS.get(key, CORE_PART)
+
+
+def split_parts(data):
+    """把完整用户数据拆分为 {部分名: 字段字典}"""
+    parts = {name: {} for name in PART_NAMES}
+    for key, value in data.items():
+        parts[part_for_key(key)][key] = value
+    return parts
+
+
+class PartitionedStore:
+    """按部分读写的存储后端基类，完整的 load/save 由各部分组装
+
+    子类实现 read_part(name) -> (版本号, 数据) 和 save_parts(parts, transactions, expected)。
+    """
+
+    def load_part(self, name):
+        return self.read_part(name)[1]
+
+    def part_version(self, name):
+        """某个部分的当前版本号（用于发现其他进程的修改）"""
+        return self.read_part(name)[0]
+
+    def load(self):
+        """读取完整用户数据，不存在时返回 None"""
+        if not self.exists():
+            return None
+        data = {}
+        for name in PART_NAMES:
+            data.update(self.load_part(name))
+        return data
+
+    def save(self, data, transactions=()):
+        """写入完整用户数据，并把本次新增的交易记录追加到账本"""
+        self.save_parts(split_parts(data), transactions)
+
+    def flush(self):
+        """每次保存都已直接写入"""
+
+
+class JsonUserStore:
+    """单文件 JSON 格式（原有的 user_data.json 格式），用于导入/导出
+
+    ledger_dir 为 None 时交易记录内嵌在文件的 transactions 字段中。
+    """
+
+    name = 'json'
+
+    def __init__(self, path, ledger_dir=None, fsync=False):
+        self.path = path
+        self.ledger = JsonlLedger(ledger_dir) if ledger_dir else None
+        self.fsync = fsync
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """读取完整用户数据，文件不存在时返回 None"""
+        if not self.exists():
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if self.ledger is not None and 'transactions' in data:
+            # 旧格式：把内嵌的交易记录迁移到账本
+            self.ledger.append(list(reversed(data.pop('transactions'))), balance=data.get('balance'))
+            self._write(data)
+        return data
+
+    def save(self, data, transactions=()):
+        """写入完整用户数据，并把本次新增的交易记录追加到账本"""
+        self._write(data)
+        if transactions:
+            self.ledger.append(transactions, balance=data.get('balance'))
+
+    def _write(self, data):
+        _write_json(self.path, data, self.fsync)
+
+    def flush(self):
+        """每次 save 都已直接写入文件"""
+
+    def export_document(self):
+        """导出包含全部交易记录（内嵌在 transactions 中）的完整文档"""
+        data = self.load()
+        if data is not None and 'transactions' not in data:
+            data['transactions'] = self.ledger.export() if self.ledger else []
+        return data
+
+    def import_document(self, data):
+        """用内嵌交易记录的完整文档覆盖当前数据"""
+        data = dict(data)
+        if self.ledger is None:
+            data.setdefault('transactions', [])
+            self._write(data)
+            return
+        self.ledger.reset(data.pop('transactions', []))
+        self._write(data)
+
+
+def _write_json(path, data, fsync=False):
+    """先写临时文件再原子替换，写到一半崩溃也不会留下损坏的文件"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonPartsUserStore(PartitionedStore):
+    """按部分拆分的 JSON 后端：directory 下每部分一个文件（core.json、farm.json ...）
+
+    目录中还没有 core.json 而 legacy_path 指向的旧 user_data.json 存在时，
+    首次访问会以它为初始数据写入各部分文件（内嵌的交易记录写入账本）；原文件只读取，
+    不改写也不改名，仓库中自带的示例数据因此不会被修改。
+    """
+
+    name = 'json'
+
+    def __init__(self, directory, ledger_dir, legacy_path=None, fsync=False):
+        self.directory = directory
+        self.ledger = JsonlLedger(ledger_dir)
+        self.legacy_path = legacy_path
+        self.fsync = fsync
+        self.versions_file = os.path.join(directory, 'versions.json')
+        self.lock_file = os.path.join(directory, 'commit.lock')
+        self._commit_lock = threading.Lock()
+        self._migrate_lock = threading.Lock()
+        self._migrated = False
+
+    def _part_path(self, name):
+        return os.path.join(self.directory, f'{name}.json')
+
+    @contextmanager
+    def _locked(self):
+        """提交窗口：进程内和进程间互斥"""
+        with self._commit_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_versions(self):
+        try:
+            with open(self.versions_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _migrate_legacy(self):
+        if self._migrated:
+            return
+        with self._migrate_lock:
+            if self._migrated:
+                return
+            if (self.legacy_path and os.path.exists(self.legacy_path)
+                    and not os.path.exists(self._part_path(CORE_PART))):
+                with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                transactions = list(reversed(data.pop('transactions', [])))
+                try:
+                    # 以 core 版本为 0 为前提提交，多个进程同时启动时只有一个写入
+                    self.save_parts(split_parts(data), transactions, expected={CORE_PART: 0})
+                except ConflictError:
+                    pass
+            self._migrated = True
+
+    def exists(self):
+        self._migrate_legacy()
+        return os.path.exists(self._part_path(CORE_PART))
+
+    def part_version(self, name):
+        self._migrate_legacy()
+        return self._read_versions().get(name, 0)
+
+    def read_part(self, name):
+        """读取一个部分及其版本号，文件不存在时返回空字典
+
+        先读版本再读数据：提交时先写数据再写版本，因此读到的数据不会比版本旧，
+        最坏情况只是多一次不必要的冲突重试。
+        """
+        self._migrate_legacy()
+        version = self._read_versions().get(name, 0)
+        try:
+            with open(self._part_path(name), 'r', encoding='utf-8') as f:
+                return version, json.load(f)
+        except FileNotFoundError:
+            return version, {}
+
+    def save_parts(self, parts, transactions=(), expected=None):
+        """在提交锁内检查版本后写入给定的部分（core 最后写入，它的存在表示数据已初始化）"""
+        with self._locked():
+            versions = self._read_versions()
+            if expected:
+                _check_versions(expected, versions)
+            for name in sorted(parts, key=lambda n: n == CORE_PART):
+                _write_json(self._part_path(name), parts[name], self.fsync)
+            if transactions:
+                self.ledger.append(transactions, balance=parts.get(CORE_PART, {}).get('balance'))
+            for name in parts:
+                versions[name] = versions.get(name, 0) + 1
+            _write_json(self.versions_file, versions, self.fsync)
+
+    def export_document(self):
+        """导出包含全部交易记录（内嵌在 transactions 中）的完整文档"""
+        data = self.load()
+        if data is not None:
+            data['transactions'] = self.ledger.export()
+        return data
+
+    def import_document(self, data):
+        """用内嵌交易记录的完整文档覆盖当前数据"""
+        self._migrate_legacy()
+        data = dict(data)
+        self.ledger.reset(data.pop('transactions', []))
+        self.save(data)
+
+
+def _field_filter(name):
+    """fields 表中属于某个部分的键对应的 SQL 条件"""
+    if name == CORE_PART:
+        keys = [key for key in _KEY_PARTS if key not in TABLE_FIELDS]
+        operator = 'NOT IN'
+    else:
+        keys = [key for key in USER_DATA_PARTS[name] if key not in TABLE_FIELDS]
+        operator = 'IN'
+    return f"key {operator} ({', '.join('?' * len(keys))})", keys
+
+
+class SqliteUserStore(PartitionedStore):
+    """SQLite 后端，使用 WAL 模式，每个线程一个连接"""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self.ledger = SqliteLedger(self)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def exists(self):
+        if not os.path.exists(self.path):
+            return False
+        row = self._connect().execute('SELECT 1 FROM fields LIMIT 1').fetchone()
+        return row is not None
+
+    def read_part(self, name):
+        """在一个读事务中查询某个部分的版本号和它涉及的表"""
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            row = conn.execute('SELECT version FROM part_versions WHERE part = ?', (name,)).fetchone()
+            version = row[0] if row else 0
+            return version, self._load_part(conn, name, saved=version > 0)
+        finally:
+            conn.execute('COMMIT')
+
+    def part_version(self, name):
+        row = self._connect().execute('SELECT version FROM part_versions WHERE part = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _load_part(self, conn, name, saved=True):
+        """读取一个部分；分表存储的字段只在该部分保存过（或表中有数据）时返回，
+        否则与 JSON 后端一样视为缺失，由迁移补齐完整的默认值"""
+        where, params = _field_filter(name)
+        data = {key: json.loads(value) for key, value in conn.execute(
+            f'SELECT key, value FROM fields WHERE {where}', params)}
+        if name == 'farm':
+            farm = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM farm')}
+            crops = [json.loads(row[0]) for row in conn.execute('SELECT data FROM farm_crops ORDER BY position')]
+            if saved or farm or crops:
+                data['farm'] = dict(farm, planted_crops=crops)
+        elif name == 'inventory':
+            coupons = [json.loads(row[0]) for row in conn.execute('SELECT data FROM coupons ORDER BY position')]
+            inventory = [json.loads(row[0]) for row in conn.execute('SELECT data FROM inventory ORDER BY position')]
+            if saved or coupons or inventory:
+                data['coupons'] = coupons
+                data['inventory'] = inventory
+        elif name == 'checkin':
+            history = {d: reward for d, reward in conn.execute('SELECT date, reward FROM check_ins ORDER BY date')}
+            if saved or history:
+                data['check_in_history'] = history
+        return data
+
+    def save_parts(self, parts, transactions=(), expected=None):
+        """在一个写事务（BEGIN IMMEDIATE 即提交锁）中检查版本并写入给定的部分，
+        只写入发生变化的行；新增交易记录一并写入账本"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if expected:
+                _check_versions(expected, dict(conn.execute('SELECT part, version FROM part_versions')))
+            for name, part in parts.items():
+                self._save_part(conn, name, part)
+                conn.execute('INSERT INTO part_versions (part, version) VALUES (?, 1) '
+                             'ON CONFLICT(part) DO UPDATE SET version = version + 1', (name,))
+            self.ledger.insert(conn, transactions, balance=parts.get(CORE_PART, {}).get('balance'))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            self.ledger.reset_cache()
+            raise
+
+    def _save_part(self, conn, name, part):
+        where, params = _field_filter(name)
+        fields = {key: value for key, value in part.items() if key not in TABLE_FIELDS}
+        self._sync_mapping(conn, 'fields', fields, where, params)
+        if name == 'farm':
+            farm = dict(part.get('farm', {}))
+            crops = farm.pop('planted_crops', [])
+            self._sync_mapping(conn, 'farm', farm)
+            self._sync_rows(conn, 'farm_crops', crops, key='id')
+        elif name == 'inventory':
+            self._sync_rows(conn, 'coupons', part.get('coupons', []), key='id')
+            self._sync_rows(conn, 'inventory', part.get('inventory', []))
+        elif name == 'checkin':
+            self._sync_check_ins(conn, part.get('check_in_history', {}))
+
+    def _sync_mapping(self, conn, table, mapping, where='1', params=()):
+        """键值表：更新变化的键，删除（where 范围内）已移除的键"""
+        existing = dict(conn.execute(f'SELECT key, value FROM {table} WHERE {where}', params))
+        for key, value in mapping.items():
+            encoded = _encode(value)
+            if existing.get(key) != encoded:
+                conn.execute(f'INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)', (key, encoded))
+        removed = [key for key in existing if key not in mapping]
+        for key in removed:
+            conn.execute(f'DELETE FROM {table} WHERE key = ?', (key,))
+
+    def _sync_rows(self, conn, table, rows, key=None):
+        """按位置存储的列表：只改写内容变化的位置，删除多余的位置"""
+        existing = dict(conn.execute(f'SELECT position, data FROM {table}'))
+        for position, row in enumerate(rows):
+            encoded = _encode(row)
+            if existing.get(position) != encoded:
+                if key:
+                    conn.execute(f'INSERT OR REPLACE INTO {table} (position, {key}, data) VALUES (?, ?, ?)',
+                                 (position, row.get(key), encoded))
+                else:
+                    conn.execute(f'INSERT OR REPLACE INTO {table} (position, data) VALUES (?, ?)',
+                                 (position, encoded))
+        conn.execute(f'DELETE FROM {table} WHERE position >= ?', (len(rows),))
+
+    def _sync_check_ins(self, conn, history):
+        existing = dict(conn.execute('SELECT date, reward FROM check_ins'))
+        for d, reward in history.items():
+            if existing.get(d) != reward:
+                conn.execute('INSERT OR REPLACE INTO check_ins (date, reward) VALUES (?, ?)', (d, reward))
+        for d in existing:
+            if d not in history:
+                conn.execute('DELETE FROM check_ins WHERE date = ?', (d,))
+
+    def export_document(self):
+        """导出包含全部交易记录（内嵌在 transactions 中）的完整文档"""
+        data = self.load()
+        if data is not None:
+            data['transactions'] = self.ledger.export()
+        return data
+
+    def import_document(self, data):
+        """用内嵌交易记录的完整文档覆盖当前数据"""
+        data = dict(data)
+        transactions = data.pop('transactions', [])
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM transactions')
+            conn.execute('DELETE FROM ledger_checkpoint')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.ledger.reset_cache()
+        self.save(data, list(reversed(transactions)))
+
+
+class SqliteLedger:
+    """基于 transactions 表的账本，序号即自增主键"""
+
+    COLUMNS = ('id', 'amount', 'description', 'type', 'timestamp', 'date')
+
+    def __init__(self, store, cache_size=50):
+        self.store = store
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._tail = deque(maxlen=cache_size)
+        self._tail_seq = None
+
+    def reset_cache(self):
+        with self._lock:
+            self._tail.clear()
+            self._tail_seq = None
+
+    def _row_to_entry(self, row):
+        entry = dict(zip(self.COLUMNS, row[1:]))
+        entry['seq'] = row[0]
+        return entry
+
+    def checkpoint(self):
+        """读取检查点：最后序号、累计金额、累计收入/支出、余额快照"""
+        conn = self.store._connect()
+        row = conn.execute(
+            'SELECT seq, running_total, total_income, total_expense, balance FROM ledger_checkpoint WHERE id = 1').fetchone()
+        if row is None:
+            # 从未建立检查点（例如旧数据库），汇总一次
+            row = conn.execute(
+                'SELECT COALESCE(MAX(seq), 0), COALESCE(SUM(amount), 0), '
+                'COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0), '
+                'COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END), 0), NULL FROM transactions').fetchone()
+        return dict(zip(('seq', 'running_total', 'total_income', 'total_expense', 'balance'), row))
+
+    def insert(self, conn, entries, balance=None):
+        """在调用方的事务中追加记录并更新检查点"""
+        if not entries:
+            return []
+        checkpoint = self.checkpoint()
+        written = []
+        for entry in entries:
+            cursor = conn.execute(
+                'INSERT INTO transactions (id, amount, description, type, timestamp, date) VALUES (?, ?, ?, ?, ?, ?)',
+                tuple(entry.get(column, 0 if column == 'amount' else None) for column in self.COLUMNS))
+            written.append(dict(entry, seq=cursor.lastrowid))
+            amount = entry.get('amount', 0)
+            checkpoint['running_total'] += amount
+            if amount > 0:
+                checkpoint['total_income'] += amount
+            else:
+                checkpoint['total_expense'] -= amount
+        conn.execute(
+            'INSERT OR REPLACE INTO ledger_checkpoint (id, seq, running_total, total_income, total_expense, balance) '
+            'VALUES (1, ?, ?, ?, ?, ?)',
+            (written[-1]['seq'], checkpoint['running_total'], checkpoint['total_income'],
+             checkpoint['total_expense'], balance if balance is not None else checkpoint['balance']))
+        with self._lock:
+            if self._tail_seq is not None and self._tail_seq == checkpoint['seq']:
+                self._tail.extend(written)
+                self._tail_seq = written[-1]['seq']
+            else:
+                self._tail_seq = None
+        return written
+
+    def append(self, entries, balance=None):
+        """按时间顺序追加交易记录"""
+        conn = self.store._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            written = self.insert(conn, entries, balance)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            self.reset_cache()
+            raise
+        return written
+
+    def latest(self, n=10):
+        """最近 n 条记录（最新的在前）"""
+        last_seq = self.checkpoint()['seq']
+        if n > self.cache_size:
+            return self.page(limit=n)[0]
+        with self._lock:
+            if self._tail_seq != last_seq:
+                entries, _ = self.page(limit=self.cache_size)
+                self._tail = deque(reversed(entries), maxlen=self.cache_size)
+                self._tail_seq = last_seq
+            return list(reversed(self._tail))[:n]
+
+    def page(self, before=None, limit=20):
+        """按序号游标翻页（最新的在前），返回 (记录列表, 下一页游标)"""
+        conn = self.store._connect()
+        query = 'SELECT seq, id, amount, description, type, timestamp, date FROM transactions'
+        if before is None:
+            rows = conn.execute(query + ' ORDER BY seq DESC LIMIT ?', (limit,)).fetchall()
+        else:
+            rows = conn.execute(query + ' WHERE seq < ? ORDER BY seq DESC LIMIT ?', (int(before), limit)).fetchall()
+        entries = [self._row_to_entry(row) for row in rows]
+        next_cursor = None
+        if entries and conn.execute('SELECT 1 FROM transactions WHERE seq < ? LIMIT 1', (entries[-1]['seq'],)).fetchone():
+            next_cursor = entries[-1]['seq']
+        return entries, next_cursor
+
+    def export(self):
+        """导出全部记录（最新的在前，不含序号）"""
+        conn = self.store._connect()
+        return [dict(zip(self.COLUMNS, row)) for row in conn.execute(
+            'SELECT id, amount, description, type, timestamp, date FROM transactions ORDER BY seq DESC')]
+
+
+class WriteBehindLedger:
+    """延迟写入模式下的账本视图：尚未写入的交易记录（已按写入后的序号编号）加上底层账本"""
+
+    def __init__(self, store):
+        self.store = store
+        self.ledger = store.store.ledger
+
+    @property
+    def directory(self):
+        return self.ledger.directory
+
+    def _unflushed(self):
+        """尚未写入底层账本的记录（按时间顺序）；正在写入时底层检查点已前进的部分不再计入"""
+        last_seq = self.ledger.checkpoint()['seq']
+        with self.store._lock:
+            return [entry for entry in self.store._transactions if entry['seq'] > last_seq]
+
+    def checkpoint(self):
+        checkpoint = dict(self.ledger.checkpoint())
+        for entry in self._unflushed():
+            amount = entry.get('amount', 0)
+            checkpoint['seq'] = entry['seq']
+            checkpoint['running_total'] += amount
+            if amount > 0:
+                checkpoint['total_income'] += amount
+            else:
+                checkpoint['total_expense'] -= amount
+        with self.store._lock:
+            if self.store._balance is not None:
+                checkpoint['balance'] = self.store._balance
+        return checkpoint
+
+    def append(self, entries, balance=None):
+        """不在请求中记录的交易：与用户数据一起延迟写入"""
+        return self.store.save_parts({}, entries)
+
+    def latest(self, n=10):
+        unflushed = list(reversed(self._unflushed()))[:n]
+        return unflushed + (self.ledger.latest(n - len(unflushed)) if len(unflushed) < n else [])
+
+    def page(self, before=None, limit=20):
+        entries = [entry for entry in reversed(self._unflushed()) if before is None or entry['seq'] < int(before)][:limit]
+        if len(entries) == limit:
+            return entries, (entries[-1]['seq'] if entries[-1]['seq'] > 1 else None)
+        older_than = entries[-1]['seq'] if entries else before
+        rest, next_cursor = self.ledger.page(before=older_than, limit=limit - len(entries))
+        return entries + rest, next_cursor
+
+    def export(self):
+        self.store.flush()
+        return self.ledger.export()
+
+    def reset(self, entries):
+        self.store.flush()
+        self.ledger.reset(entries)
+
+
+class WriteBehindStore(PartitionedStore):
+    """延迟写入（write-behind）包装
+
+    保存时只更新内存中的最新文档并记下变化的部分，由后台线程按固定间隔或累计修改次数
+    （先到者为准）合并写入一次；交易记录也暂存在内存中，与文档在同一次 save_parts 中写入，
+    崩溃时两者一起丢失最近一段时间的修改，而不会出现账本已记账、余额却未保存的情况。
+    余额以用户数据（core 部分）为准，账本是交易历史，检查点中的余额只是快照。
+    进程退出时自动 flush，对持久性要求高的操作可以主动调用 flush()。
+    只适用于单进程部署：多个进程各自持有内存文档会互相覆盖。
+    """
+
+    def __init__(self, store, interval=1.0, max_pending=50):
+        self.store = store
+        self.name = store.name
+        self.interval = interval
+        self.max_pending = max_pending
+        self._doc = None
+        self._versions = {}
+        self._dirty_parts = set()
+        self._transactions = []  # 尚未写入的交易记录（带预先分配的序号）
+        self._balance = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self.ledger = WriteBehindLedger(self)
+        atexit.register(self.flush)
+
+    def _ensure_flusher(self):
+        # 在第一次写入时才启动线程，保证 fork 之后的每个进程都有自己的刷写线程
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='user-data-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._wakeup.wait_for(lambda: self._pending >= self.max_pending, timeout=self.interval)
+            self.flush()
+
+    def _document(self):
+        """内存中的完整文档，首次使用时从底层存储读取"""
+        if self._doc is None:
+            data = self.store.load()
+            with self._lock:
+                if self._doc is None and data is not None:
+                    self._doc = data
+        return self._doc
+
+    def exists(self):
+        return self._doc is not None or self.store.exists()
+
+    def read_part(self, name):
+        doc = self._document()
+        with self._lock:
+            if doc is None:
+                return self._versions.get(name, 0), {}
+            return self._versions.get(name, 0), {key: copy.deepcopy(value) for key, value in doc.items()
+                                                 if part_for_key(key) == name}
+
+    def part_version(self, name):
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def save_parts(self, parts, transactions=(), expected=None):
+        self._document()
+        with self._lock:
+            if expected:
+                _check_versions(expected, self._versions)
+            if transactions:
+                # 单进程内账本只由这里写入，写入时分配的序号与此处一致
+                seq = max(self.store.ledger.checkpoint()['seq'],
+                          self._transactions[-1]['seq'] if self._transactions else 0)
+                self._transactions.extend(dict(entry, seq=seq + i) for i, entry in enumerate(transactions, 1))
+                if parts.get(CORE_PART, {}).get('balance') is not None:
+                    self._balance = parts[CORE_PART]['balance']
+            if self._doc is None:
+                self._doc = {}
+            for name, part in parts.items():
+                for key in [key for key in self._doc if part_for_key(key) == name]:
+                    del self._doc[key]
+                self._doc.update(copy.deepcopy(part))
+                self._versions[name] = self._versions.get(name, 0) + 1
+            self._dirty_parts.update(parts)
+            self._pending += 1
+            self._ensure_flusher()
+            if self._pending >= self.max_pending:
+                self._wakeup.notify()
+
+    def flush(self):
+        """把尚未写入的部分和交易记录一起写回底层存储"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                parts = split_parts(copy.deepcopy(self._doc))
+                parts = {name: parts[name] for name in self._dirty_parts}
+                transactions = [{key: value for key, value in entry.items() if key != 'seq'}
+                                for entry in self._transactions]
+                self._dirty_parts = set()
+                self._pending = 0
+            try:
+                self.store.save_parts(parts, transactions)
+            except Exception:
+                with self._lock:
+                    self._dirty_parts.update(parts)
+                    self._pending += 1
+                raise
+            with self._lock:
+                # 写入期间新增的记录留到下一次
+                del self._transactions[:len(transactions)]
+
+    def export_document(self):
+        self.flush()
+        return self.store.export_document()
+
+    def import_document(self, data):
+        self.flush()
+        with self._lock:
+            self._doc = None
+            self._balance = None
+        self.store.import_document(data)
+
+
+def create_user_store(backend, json_dir, sqlite_path, ledger_dir, legacy_json=None, write_behind=False,
+                      flush_interval=1.0, flush_max_pending=50):
+    """根据配置创建存储后端"""
+    if backend == 'sqlite':
+        return SqliteUserStore(sqlite_path)
+    if backend == 'json':
+        if write_behind:
+            return WriteBehindStore(JsonPartsUserStore(json_dir, ledger_dir, legacy_json, fsync=True),
+                                    interval=flush_interval, max_pending=flush_max_pending)
+        return JsonPartsUserStore(json_dir, ledger_dir, legacy_json)
+    raise ValueError(f'未知的用户数据存储后端: {backend}')
+
+
+def copy_user_data(source, target):
+    """在两个存储后端之间复制用户数据（含交易记录），返回复制的交易记录条数"""
+    data = source.export_document()
+    if data is None:
+        raise ValueError('源存储中没有用户数据')
+    target.import_document(data)
+    return len(data['transactions'])
+
+
+class UserDocument(MutableMapping):
+    """按需加载的用户数据视图
+
+    访问某个字段时才加载它所属的部分（每部分只加载一次），修改直接作用于已加载的部分。
+    changed_parts() 与加载时的快照比较，只返回内容发生变化的部分。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.initial_balance = None
+        self.versions = {}
+        self._parts = {}
+        self._snapshots = {}
+
+    def part(self, name):
+        """加载并返回某个部分"""
+        if name not in self._parts:
+            try:
+                self.versions[name], data = self.store.read_part(name)
+            except ValueError as e:
+                print(f"Error loading user data ({name}): {e}")
+                self.versions[name], data = 0, {}
+            self._snapshots[name] = _encode(data)
+            if name == CORE_PART:
+                self.initial_balance = data.get('balance')
+            self._parts[name] = data
+        return self._parts[name]
+
+    def is_loaded(self, name):
+        return name in self._parts
+
+    def __getitem__(self, key):
+        return self.part(part_for_key(key))[key]
+
+    def __setitem__(self, key, value):
+        self.part(part_for_key(key))[key] = value
+
+    def __delitem__(self, key):
+        del self.part(part_for_key(key))[key]
+
+    def __contains__(self, key):
+        return key in self.part(part_for_key(key))
+
+    def __iter__(self):
+        for name in PART_NAMES:
+            yield from list(self.part(name))
+
+    def __len__(self):
+        return sum(len(self.part(name)) for name in PART_NAMES)
+
+    def balance_changed(self):
+        """本次请求中余额是否发生了变化"""
+        return CORE_PART in self._parts and self._parts[CORE_PART].get('balance') != self.initial_balance
+
+    def changed_parts(self):
+        """内容与加载时不同的部分"""
+        return {name: data for name, data in self._parts.items() if _encode(data) != self._snapshots[name]}
+
+    def mark_saved(self, names):
+        for name in names:
+            self._snapshots[name] = _encode(self._parts[name])
+            self.versions[name] += 1
+
+
+class UserDataSession:
+    """请求级别的用户数据工作单元
+
+    data 是按需加载的 UserDocument，save 只标记为已修改，
+    由调用方在请求结束时 commit 一次，只写回发生变化的部分；出现异常时 rollback 丢弃全部修改。
+    commit 以本次读取过的各部分版本做比较并交换，冲突时回滚并抛出 ConflictError。
+    """
+
+    def __init__(self, store, loader):
+        self.store = store
+        self._loader = loader
+        self._data = None
+        self.dirty = False
+        self._transactions = []
+        self._on_commit = []
+        self._on_rollback = []
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._loader()
+        return self._data
+
+    def stage(self, data):
+        """登记需要写回的数据"""
+        if data is not self.data:
+            self.data.update(data)
+        self.dirty = True
+
+    def record_transaction(self, transaction):
+        """登记一笔新交易，提交时与用户数据一起写入账本"""
+        self._transactions.append(transaction)
+        self.dirty = True
+
+    def on_commit(self, callback):
+        """注册提交成功后执行的回调"""
+        self._on_commit.append(callback)
+
+    def on_rollback(self, callback):
+        """注册回滚时执行的回调（用于撤销文件等副作用）"""
+        self._on_rollback.append(callback)
+
+    def commit(self):
+        """写回修改过的部分"""
+        if self.dirty:
+            parts = self._data.changed_parts() if self._data is not None else {}
+            expected = dict(self._data.versions) if self._data is not None else {}
+            try:
+                if parts or self._transactions:
+                    self.store.save_parts(parts, self._transactions, expected)
+            except Exception:
+                self.rollback()
+                raise
+            if parts:
+                self._data.mark_saved(parts)
+            self.dirty = False
+            self._transactions = []
+        callbacks, self._on_commit, self._on_rollback = self._on_commit, [], []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        """丢弃未提交的修改"""
+        self._data = None
+        self.dirty = False
+        self._transactions = []
+        callbacks, self._on_commit, self._on_rollback = self._on_rollback, [], []
+        for callback in callbacks:
+            callback()
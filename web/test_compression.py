@@ -0,0 +1,55 @@
+"""响应压缩测试
+
+    cd web
+    python -m unittest test_compression
+"""
+import gzip
+import unittest
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+
+from compression import CompressionMiddleware
+
+BODY = b'{"orders": []}' * 200
+
+
+@Request.application
+def app(request):
+    response = Response(BODY, mimetype='application/json')
+    response.set_etag('orders-1')
+    return response.make_conditional(request)
+
+
+class CompressionMiddlewareTest(unittest.TestCase):
+    """压缩后的 ETag 和条件请求"""
+
+    def setUp(self):
+        self.client = Client(CompressionMiddleware(app))
+
+    def test_compressed_response_has_suffixed_etag(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['ETag'], '"orders-1-gzip"')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), BODY)
+
+    def test_uncompressed_response_keeps_etag(self):
+        response = self.client.get('/')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['ETag'], '"orders-1"')
+        self.assertEqual(response.data, BODY)
+
+    def test_suffixed_if_none_match_returns_304(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"orders-1-gzip"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], '"orders-1-gzip"')
+
+    def test_stale_etag_returns_full_response(self):
+        response = self.client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"orders-0-gzip"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(gzip.decompress(response.data), BODY)
+
+
+if __name__ == '__main__':
+    unittest.main()
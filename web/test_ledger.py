@@ -0,0 +1,78 @@
+"""账本测试
+
+    cd web
+    python -m unittest test_ledger
+"""
+import json
+import shutil
+import tempfile
+import unittest
+
+from ledger import JsonlLedger
+
+
+class JsonlLedgerTest(unittest.TestCase):
+    """分段 JSONL 账本"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ledger = JsonlLedger(self.directory, segment_size=3, cache_size=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append_assigns_seq_and_updates_checkpoint(self):
+        written = self.ledger.append([{'amount': 520}, {'amount': -52}], balance=468)
+        self.assertEqual([entry['seq'] for entry in written], [1, 2])
+        checkpoint = self.ledger.checkpoint()
+        self.assertEqual(checkpoint['seq'], 2)
+        self.assertEqual(checkpoint['running_total'], 468)
+        self.assertEqual(checkpoint['total_income'], 520)
+        self.assertEqual(checkpoint['total_expense'], 52)
+        self.assertEqual(checkpoint['balance'], 468)
+
+    def test_page_crosses_segments(self):
+        self.ledger.append([{'amount': i} for i in range(1, 8)])
+        entries, cursor = self.ledger.page(limit=5)
+        self.assertEqual([entry['seq'] for entry in entries], [7, 6, 5, 4, 3])
+        self.assertEqual(cursor, 3)
+        entries, cursor = self.ledger.page(before=cursor, limit=5)
+        self.assertEqual([entry['seq'] for entry in entries], [2, 1])
+        self.assertIsNone(cursor)
+
+    def test_latest_uses_tail_cache_and_falls_back_to_page(self):
+        self.ledger.append([{'amount': i} for i in range(1, 6)])
+        self.assertEqual([entry['seq'] for entry in self.ledger.latest(3)], [5, 4, 3])
+        self.ledger.append([{'amount': 6}])
+        self.assertEqual([entry['seq'] for entry in self.ledger.latest(3)], [6, 5, 4])
+        # 超过缓存大小时直接翻页读取
+        self.assertEqual([entry['seq'] for entry in self.ledger.latest(6)], [6, 5, 4, 3, 2, 1])
+
+    def test_export_and_reset(self):
+        self.ledger.append([{'amount': 1}, {'amount': 2}])
+        self.assertEqual(self.ledger.export(), [{'amount': 2}, {'amount': 1}])
+        self.ledger.reset([{'amount': 3}, {'amount': 4}])
+        self.assertEqual(self.ledger.export(), [{'amount': 3}, {'amount': 4}])
+        self.assertEqual(self.ledger.checkpoint()['seq'], 2)
+
+    def test_append_recovers_entries_missing_from_checkpoint(self):
+        self.ledger.append([{'amount': 10}, {'amount': -3}])
+        checkpoint = self.ledger.checkpoint()
+        # 模拟写入分段后、更新检查点前崩溃，最后一行只写了一半
+        self.ledger.append([{'amount': 5}, {'amount': 1}])
+        with open(self.ledger.checkpoint_file, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        with open(self.ledger._segment_path(1), 'a', encoding='utf-8') as f:
+            f.write('{"amount": 2, "se')
+
+        written = self.ledger.append([{'amount': -1}])
+        self.assertEqual(written[0]['seq'], 5)
+        self.assertEqual([entry['seq'] for entry in self.ledger.page(limit=10)[0]], [5, 4, 3, 2, 1])
+        checkpoint = self.ledger.checkpoint()
+        self.assertEqual(checkpoint['running_total'], 12)
+        self.assertEqual(checkpoint['total_income'], 16)
+        self.assertEqual(checkpoint['total_expense'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""订单存储测试
+
+    cd web
+    python -m unittest test_order_store
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from order_store import OrderStore
+
+
+class ChangesSinceTest(unittest.TestCase):
+    """按版本号的增量同步"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = OrderStore(self.directory)
+        for i in range(3):
+            self.store.save({'id': f'order{i}', 'timestamp': i, 'status': 'pending'})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_initial_sync_is_full(self):
+        changes = self.store.changes_since(0)
+        self.assertTrue(changes['full'])
+        self.assertEqual([order['id'] for order in changes['orders']], ['order2', 'order1', 'order0'])
+        self.assertEqual(changes['version'], self.store.version)
+
+    def test_delta_contains_changed_and_removed_orders(self):
+        version = self.store.version
+        self.store.save({'id': 'order3', 'timestamp': 3, 'status': 'pending'})
+        self.store.delete('order0')
+        changes = self.store.changes_since(version)
+        self.assertFalse(changes['full'])
+        self.assertEqual([order['id'] for order in changes['orders']], ['order3'])
+        self.assertEqual(changes['removed'], ['order0'])
+        self.assertEqual(changes['total'], 3)
+
+    def test_current_version_has_no_changes(self):
+        changes = self.store.changes_since(self.store.version)
+        self.assertFalse(changes['full'])
+        self.assertEqual(changes['orders'], [])
+        self.assertEqual(changes['removed'], [])
+
+    def test_rebuilt_index_returns_full_list_to_old_clients(self):
+        version = self.store.version
+        os.remove(self.store.index_file)
+        store = OrderStore(self.directory)
+        # 重建后的版本号不会与重建前发出的版本号重复
+        self.assertGreater(store.version, version)
+        changes = store.changes_since(version)
+        self.assertTrue(changes['full'])
+        self.assertEqual(len(changes['orders']), 3)
+
+    def test_version_newer_than_index_returns_full_list(self):
+        changes = self.store.changes_since(self.store.version + 100)
+        self.assertTrue(changes['full'])
+        self.assertEqual(len(changes['orders']), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""存储后端测试
+
+    cd web
+    python -m unittest test_storage
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from storage import ConflictError, JsonPartsUserStore, SqliteUserStore, UserDataSession, UserDocument
+
+FARM = {
+    'seeds_inventory': {},
+    'planted_crops': [],
+    'last_farm_visit': None,
+    'farm_slots': 6,
+    'fertilizer': 0,
+    'daily_poop_count': 0,
+    'last_poop_date': None,
+}
+
+
+class FreshSqliteStoreTest(unittest.TestCase):
+    """新建的 SQLite 数据库"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SqliteUserStore(os.path.join(self.directory, 'user_data.db'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_unsaved_table_parts_are_missing(self):
+        # 缺失的字段由迁移按默认值整体补齐，不能返回只有 planted_crops 的 farm
+        self.assertFalse(self.store.exists())
+        self.assertNotIn('farm', self.store.load_part('farm'))
+        self.assertNotIn('coupons', self.store.load_part('inventory'))
+        self.assertNotIn('check_in_history', self.store.load_part('checkin'))
+
+    def test_saved_farm_round_trips(self):
+        self.store.save({'balance': 520, 'farm': dict(FARM), 'coupons': [], 'inventory': [], 'check_in_history': {}})
+        document = UserDocument(self.store)
+        document['farm']['fertilizer'] += 1
+        self.store.save_parts({'farm': {'farm': document['farm']}})
+        self.assertEqual(self.store.load_part('farm')['farm'], dict(FARM, fertilizer=1))
+        # 保存过的部分即使表中没有数据也返回空列表
+        self.assertEqual(self.store.load_part('inventory'), {'coupons': [], 'inventory': []})
+
+
+class UserDataSessionTest(unittest.TestCase):
+    """按部分版本比较并交换的提交"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = JsonPartsUserStore(os.path.join(self.directory, 'user_data'),
+                                        os.path.join(self.directory, 'ledger'))
+        self.store.save({'balance': 520, 'farm': dict(FARM)})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def session(self):
+        return UserDataSession(self.store, lambda: UserDocument(self.store))
+
+    def test_concurrent_commit_conflicts_and_retry_succeeds(self):
+        first, second = self.session(), self.session()
+        first.data['balance'] -= 52
+        second.data['balance'] -= 30
+        first.stage(first.data)
+        second.stage(second.data)
+        first.commit()
+        with self.assertRaises(ConflictError):
+            second.commit()
+        # 重新读取后再执行一次，基于最新的余额
+        retry = self.session()
+        retry.data['balance'] -= 30
+        retry.stage(retry.data)
+        retry.commit()
+        self.assertEqual(self.store.load_part('core')['balance'], 438)
+
+    def test_commits_to_different_parts_do_not_conflict(self):
+        first, second = self.session(), self.session()
+        first.data['balance'] += 1
+        second.data['farm']['fertilizer'] += 1
+        first.stage(first.data)
+        second.stage(second.data)
+        first.commit()
+        second.commit()
+        self.assertEqual(self.store.load_part('core')['balance'], 521)
+        self.assertEqual(self.store.load_part('farm')['farm']['fertilizer'], 1)
+
+    def test_transactions_are_written_with_the_commit(self):
+        session = self.session()
+        session.data['balance'] -= 52
+        session.stage(session.data)
+        session.record_transaction({'amount': -52, 'description': '购买菜品订单'})
+        session.commit()
+        self.assertEqual([entry['amount'] for entry in self.store.ledger.latest()], [-52])
+        self.assertEqual(self.store.ledger.checkpoint()['balance'], 468)
+
+
+class LegacyJsonTest(unittest.TestCase):
+    """旧的 user_data.json 作为初始数据"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.legacy_path = os.path.join(self.directory, 'user_data.json')
+        with open(self.legacy_path, 'w', encoding='utf-8') as f:
+            json.dump({'balance': 468, 'transactions': [{'amount': -52}, {'amount': 520}]}, f)
+        with open(self.legacy_path, 'rb') as f:
+            self.legacy = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_legacy_file_is_read_but_not_modified(self):
+        store = JsonPartsUserStore(os.path.join(self.directory, 'user_data'),
+                                   os.path.join(self.directory, 'ledger'), self.legacy_path)
+        self.assertEqual(store.load_part('core'), {'balance': 468})
+        self.assertEqual([entry['amount'] for entry in store.ledger.latest()], [-52, 520])
+        with open(self.legacy_path, 'rb') as f:
+            self.assertEqual(f.read(), self.legacy)
+        self.assertFalse(os.path.exists(self.legacy_path + '.bak'))
+
+
+if __name__ == '__main__':
+    unittest.main()
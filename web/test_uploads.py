@@ -0,0 +1,67 @@
+"""分块上传测试
+
+    cd web
+    python -m unittest test_uploads
+"""
+import io
+import shutil
+import tempfile
+import unittest
+
+from uploads import OffsetMismatch, UploadError, UploadSessionStore
+
+
+class UploadSessionStoreTest(unittest.TestCase):
+    """分块按偏移量顺序写入"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = UploadSessionStore(self.directory)
+        self.session = self.store.create('dish.jpg', 10, dish_name='测试')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, offset, data):
+        return self.store.write_chunk(self.session['id'], offset, io.BytesIO(data), len(data))
+
+    def test_chunks_are_appended_in_order(self):
+        self.assertEqual(self.write(0, b'abcd'), 4)
+        self.assertEqual(self.write(4, b'efghij'), 10)
+        path, session = self.store.complete(self.session['id'])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'abcdefghij')
+        self.assertEqual(session['info'], {'dish_name': '测试'})
+
+    def test_wrong_offset_reports_received_bytes(self):
+        self.write(0, b'abcd')
+        for offset in (0, 6):
+            with self.assertRaises(OffsetMismatch) as context:
+                self.write(offset, b'xy')
+            self.assertEqual(context.exception.received, 4)
+        self.assertEqual(self.store.get(self.session['id'])['received'], 4)
+
+    def test_chunk_beyond_size_is_rejected(self):
+        with self.assertRaises(UploadError):
+            self.write(0, b'x' * 11)
+        self.assertEqual(self.store.get(self.session['id'])['received'], 0)
+
+    def test_interrupted_chunk_keeps_written_bytes(self):
+        # 声明 6 字节但连接在 3 字节后断开，客户端从已收到的位置继续
+        received = self.store.write_chunk(self.session['id'], 0, io.BytesIO(b'abc'), 6)
+        self.assertEqual(received, 3)
+        self.assertEqual(self.write(3, b'defghij'), 10)
+
+    def test_incomplete_upload_cannot_complete(self):
+        self.write(0, b'abcd')
+        with self.assertRaises(UploadError):
+            self.store.complete(self.session['id'])
+
+    def test_unknown_upload(self):
+        self.assertIsNone(self.store.get('not-an-id'))
+        with self.assertRaises(KeyError):
+            self.store.write_chunk('0' * 32, 0, io.BytesIO(b'a'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""分块上传（可断点续传）
+
+每个上传会话在 sessions 目录中对应两个文件：<id>.json 记录文件名、总大小和附带信息，
+<id>.part 是已经收到的数据。分块按偏移量顺序追加写入磁盘，请求只在内存中保留一小段缓冲区；
+连接中断后客户端查询已收到的字节数，从该位置继续上传。
+多个 worker 之间通过会话文件上的 flock 互斥，超过 SESSION_TTL 未完成的会话会被清理。
+"""
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+from contextlib import contextmanager
+
+# 未完成的上传会话保留时间（秒）
+SESSION_TTL = 24 * 3600
+
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """上传请求无效"""
+
+
+class OffsetMismatch(UploadError):
+    """分块的偏移量与已收到的字节数不一致，客户端应从 received 处继续上传"""
+
+    def __init__(self, received):
+        super().__init__(f'已收到 {received} 字节，请从该位置继续上传')
+        self.received = received
+
+
+class UploadSessionStore:
+    """保存在磁盘上的上传会话"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.directory, f'{upload_id}.json')
+
+    def data_path(self, upload_id):
+        return os.path.join(self.directory, f'{upload_id}.part')
+
+    @contextmanager
+    def _locked(self, upload_id):
+        with open(self._meta_path(upload_id), 'r') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def create(self, filename, size, **info):
+        """创建上传会话，返回会话信息"""
+        os.makedirs(self.directory, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        session = {'id': upload_id, 'filename': filename, 'size': size, 'info': info, 'created': time.time()}
+        open(self.data_path(upload_id), 'wb').close()
+        tmp_path = self._meta_path(upload_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path(upload_id))
+        session['received'] = 0
+        return session
+
+    def get(self, upload_id):
+        """会话信息（含已收到的字节数 received），不存在时返回 None"""
+        if not UPLOAD_ID.match(upload_id):
+            return None
+        try:
+            with open(self._meta_path(upload_id), 'r', encoding='utf-8') as f:
+                session = json.load(f)
+            session['received'] = os.path.getsize(self.data_path(upload_id))
+        except (FileNotFoundError, ValueError):
+            return None
+        return session
+
+    def write_chunk(self, upload_id, offset, stream, length, buffer_size=1 << 16):
+        """把 stream 中的 length 字节写到 offset 处，返回写入后已收到的字节数
+
+        连接在分块中途断开时已经写入的部分会保留，客户端查询后从新的位置继续。
+        """
+        session = self.get(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        with self._locked(upload_id):
+            data_path = self.data_path(upload_id)
+            received = os.path.getsize(data_path)
+            if offset != received:
+                raise OffsetMismatch(received)
+            if received + length > session['size']:
+                raise UploadError('分块超出了文件大小')
+            with open(data_path, 'ab') as f:
+                remaining = length
+                while remaining:
+                    chunk = stream.read(min(buffer_size, remaining))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    remaining -= len(chunk)
+                return f.tell()
+
+    def complete(self, upload_id):
+        """检查上传是否完整，返回 (数据文件路径, 会话信息)"""
+        session = self.get(upload_id)
+        if session is None:
+            raise KeyError(upload_id)
+        if session['received'] != session['size']:
+            raise UploadError(f'文件 {session["filename"]} 尚未上传完成（{session["received"]}/{session["size"]} 字节）')
+        return self.data_path(upload_id), session
+
+    def discard(self, upload_id):
+        """删除会话（数据文件已被移走时只删除记录）"""
+        for path in (self.data_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def expire(self, ttl=SESSION_TTL):
+        """清理超时未完成的会话，返回清理的数量"""
+        if not os.path.isdir(self.directory):
+            return 0
+        expired = 0
+        deadline = time.time() - ttl
+        for name in os.listdir(self.directory):
+            upload_id, ext = os.path.splitext(name)
+            if ext == '.json' and UPLOAD_ID.match(upload_id):
+                session = self.get(upload_id)
+                if session is None or session['created'] < deadline:
+                    self.discard(upload_id)
+                    expired += 1
+        return expired